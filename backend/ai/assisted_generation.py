@@ -0,0 +1,118 @@
+import threading
+import time
+
+import torch
+
+from ai.metrics import registry
+
+ASSISTED_DRAFT_TOKENS = registry.counter(
+    'loopfund_assisted_draft_tokens_total', 'Tokens proposed by the draft model in assisted generation')
+ASSISTED_ACCEPTED_TOKENS = registry.counter(
+    'loopfund_assisted_accepted_tokens_total', 'Draft tokens accepted by the main model in assisted generation')
+ASSISTED_ACCEPTANCE_RATE = registry.gauge(
+    'loopfund_assisted_acceptance_rate', 'Share of draft tokens accepted since start')
+
+
+def load_draft_model(backend, draft_model_name, main_model, model_store=None):
+    """Load the draft model with the main model's backend and check it shares the vocabulary"""
+    from ai.inference_backends import load_backend
+
+    if model_store:
+        draft_model, _, _ = model_store.load(draft_model_name, backend)
+    else:
+        draft_model, _ = load_backend(backend, draft_model_name)
+    main_vocab = getattr(main_model.config, 'vocab_size', None)
+    draft_vocab = getattr(draft_model.config, 'vocab_size', None)
+    if main_vocab != draft_vocab:
+        raise ValueError(
+            f'Draft model {draft_model_name} has vocabulary size {draft_vocab}, '
+            f'the main model {main_vocab}; assisted generation needs the same tokenizer family'
+        )
+    return draft_model
+
+
+class AssistedGenerator:
+    def __init__(self, model, draft_model, num_draft_tokens=5):
+        """Speculative decoding: `draft_model` proposes tokens, `model` verifies them in one forward pass
+
+        Each round the draft proposes up to `num_draft_tokens` tokens
+        (adapted by transformers' heuristic schedule). The main model keeps
+        the longest prefix that matches its own choice and adds one token of
+        its own. With sampling, a draft token is kept only when it equals
+        the token sampled from the main model, so answers follow the main
+        model's configured distribution exactly.
+
+        Forward hooks on both models count verification rounds and draft
+        tokens. Acceptance is then (generated - rounds) / drafted.
+        """
+        self.model = model
+        self.draft_model = draft_model
+        self.draft_model.generation_config.num_assistant_tokens = num_draft_tokens
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {
+            'generations': 0,
+            'rounds': 0,
+            'draft_tokens': 0,
+            'accepted_tokens': 0,
+            'generated_tokens': 0,
+            'seconds': 0.0
+        }
+
+        model.register_forward_hook(self._count('rounds'))
+        draft_model.register_forward_hook(self._count('draft_tokens'))
+
+    def _count(self, field):
+        def hook(module, inputs, outputs):
+            # Only calls made inside generate() on this thread are counted
+            counts = getattr(self._local, 'counts', None)
+            if counts is not None:
+                counts[field] += 1
+        return hook
+
+    def generate(self, input_ids, attention_mask=None, **generation_kwargs):
+        """Assisted generate for one prompt (transformers supports batch size 1 only); returns the output ids"""
+        self._local.counts = {'rounds': 0, 'draft_tokens': 0}
+        started = time.perf_counter()
+        try:
+            with torch.no_grad():
+                outputs = self.model.generate(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    assistant_model=self.draft_model,
+                    **generation_kwargs
+                )
+        finally:
+            counts = self._local.counts
+            self._local.counts = None
+
+        elapsed = time.perf_counter() - started
+        generated = outputs.shape[1] - input_ids.shape[1]
+        # Every round yields its accepted draft tokens plus one token from the main model
+        accepted = max(0, generated - counts['rounds'])
+
+        with self._lock:
+            self._stats['generations'] += 1
+            self._stats['rounds'] += counts['rounds']
+            self._stats['draft_tokens'] += counts['draft_tokens']
+            self._stats['accepted_tokens'] += accepted
+            self._stats['generated_tokens'] += generated
+            self._stats['seconds'] += elapsed
+            drafted = self._stats['draft_tokens']
+            acceptance_rate = self._stats['accepted_tokens'] / drafted if drafted else 0.0
+
+        ASSISTED_DRAFT_TOKENS.inc(counts['draft_tokens'])
+        ASSISTED_ACCEPTED_TOKENS.inc(accepted)
+        ASSISTED_ACCEPTANCE_RATE.set(round(acceptance_rate, 4))
+        return outputs
+
+    def stats(self):
+        """Acceptance rate, tokens per verification round and tokens/sec since start"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['acceptance_rate'] = round(stats['accepted_tokens'] / stats['draft_tokens'], 4) if stats['draft_tokens'] else 0.0
+        stats['tokens_per_round'] = round(stats['generated_tokens'] / stats['rounds'], 2) if stats['rounds'] else 0.0
+        stats['tokens_per_second'] = round(stats['generated_tokens'] / stats['seconds'], 2) if stats['seconds'] else 0.0
+        stats['seconds'] = round(stats['seconds'], 3)
+        return stats
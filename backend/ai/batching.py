@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from ai import profiling
+
+
+class AdviceBatcher:
+    def __init__(self, generate_batch, max_batch_size=8, max_wait_ms=10):
+        """Collect concurrent generation requests and run them as one padded batch
+
+        `generate_batch` receives a list of prompts and must return one
+        generated text per prompt, in the same order.
+        """
+        self.generate_batch = generate_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms) / 1000.0)
+
+        self._start()
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'largest_batch': 0
+        }
+
+        self._worker = threading.Thread(target=self._run, name='advice-batcher', daemon=True)
+        self._worker.start()
+
+    def after_fork(self):
+        """Restart the batching thread in a forked worker (threads don't survive fork)"""
+        self._start()
+
+    def submit(self, prompt):
+        """Queue a prompt for the next batch and return a Future for its text"""
+        future = Future()
+        # Spans of the batch this prompt joins are recorded into the caller's profile, if any
+        self._queue.put((prompt, future, profiling.current()))
+        return future
+
+    def generate(self, prompt, timeout=None):
+        """Blocking helper: queue a prompt and wait for its generated text"""
+        return self.submit(prompt).result(timeout)
+
+    def stats(self):
+        """Return batching counters (requests, batches, average batch size)"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['average_batch_size'] = round(stats['requests'] / stats['batches'], 2) if stats['batches'] else 0
+        stats['queued'] = self._queue.qsize()
+        stats['max_batch_size'] = self.max_batch_size
+        stats['max_wait_ms'] = self.max_wait * 1000.0
+        return stats
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            # Skip requests whose callers cancelled while queued
+            batch = [
+                (prompt, future, profiles) for prompt, future, profiles in self._collect()
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+
+            with self._lock:
+                self._stats['requests'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+
+            try:
+                with profiling.attach(profile for _, _, profiles in batch for profile in profiles):
+                    results = list(self.generate_batch([prompt for prompt, _, _ in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"generate_batch returned {len(results)} results for {len(batch)} prompts")
+            except Exception as e:
+                # Every caller gets an answer or an error; none is left waiting
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
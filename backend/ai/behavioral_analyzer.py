@@ -2,6 +2,41 @@ import json
 import re
 from datetime import datetime, timedelta
 
+from ai.keyword_matcher import KeywordMatcher
+
+# Keyword categories for spending-pattern analysis; tuples group the forms of one keyword
+SPENDING_KEYWORDS = KeywordMatcher({
+    'spending': [
+        ('spend', 'spends', 'spending', 'spent'),
+        ('bought', 'buy', 'buying'),
+        ('purchase', 'purchases', 'purchased'),
+        ('expense', 'expenses'),
+        ('cost', 'costs'),
+        ('price', 'prices'),
+        'shopping'
+    ],
+    'saving': [
+        ('save', 'saves', 'saved', 'saving', 'savings'),
+        ('budget', 'budgets', 'budgeting'),
+        ('cut', 'cuts', 'cutting'),
+        ('reduce', 'reduced', 'reducing'),
+        ('limit', 'limits', 'limited')
+    ],
+    'emotional': [
+        ('stress', 'stressed'),
+        'bored',
+        'sad',
+        'excited',
+        ('impulse', 'impulsive'),
+        ('treat', 'treated')
+    ],
+    'budget_awareness': [
+        ('budget', 'budgets', 'budgeting'),
+        ('plan', 'plans', 'planning'),
+        ('track', 'tracks', 'tracking')
+    ]
+})
+
 class BehavioralAnalyzer:
     def __init__(self):
         """Initialize the AI Behavioral Analyzer"""
@@ -35,19 +70,51 @@ class BehavioralAnalyzer:
                 "error": f"Error analyzing behavior: {str(e)}"
             }
     
+    def analyze_batch(self, userTexts, userHistories=None):
+        """analyze() for every text, with one shared timestamp; returns one result per text
+
+        A convenience for bulk jobs rather than a faster path: each text
+        still gets its own matcher pass (bulk_analyze.py parallelizes
+        across processes). A record that can't be analyzed fails only its
+        own result.
+        """
+        if userHistories is None:
+            userHistories = [None] * len(userTexts)
+        
+        timestamp = datetime.now().isoformat()
+        results = []
+        for userText, userHistory in zip(userTexts, userHistories):
+            try:
+                spending_insights = self._analyzeSpendingPatterns(userText)
+                savings_insights = self._analyzeSavingsBehavior(userHistory)
+                results.append({
+                    "success": True,
+                    "analysis": {
+                        "spending_patterns": spending_insights,
+                        "savings_behavior": savings_insights,
+                        "recommendations": self._generateRecommendations(spending_insights, savings_insights),
+                        "timestamp": timestamp
+                    }
+                })
+            except Exception as e:
+                results.append({
+                    "success": False,
+                    "error": f"Error analyzing behavior: {str(e)}"
+                })
+        
+        return results
+    
     def _analyzeSpendingPatterns(self, userText):
         """Analyze spending patterns from user text"""
+        return self._spendingInsights(SPENDING_KEYWORDS.count(userText))
+    
+    def _spendingInsights(self, counts):
+        """Turn per-category keyword counts into spending insights"""
         insights = []
         
-        # Look for spending-related keywords
-        spending_keywords = ['spend', 'bought', 'purchase', 'expense', 'cost', 'price', 'shopping']
-        saving_keywords = ['save', 'budget', 'cut', 'reduce', 'limit']
-        
-        text_lower = userText.lower()
-        
         # Analyze spending vs saving language
-        spending_count = sum(1 for word in spending_keywords if word in text_lower)
-        saving_count = sum(1 for word in saving_keywords if word in text_lower)
+        spending_count = counts['spending']
+        saving_count = counts['saving']
         
         if spending_count > saving_count:
             insights.append("💸 Your language suggests a spending-focused mindset")
@@ -59,15 +126,12 @@ class BehavioralAnalyzer:
             insights.append("⚖️ Balanced approach to spending and saving")
         
         # Look for emotional spending indicators
-        emotional_words = ['stress', 'bored', 'sad', 'excited', 'impulse', 'treat']
-        emotional_count = sum(1 for word in emotional_words if word in text_lower)
-        
-        if emotional_count > 0:
+        if counts['emotional'] > 0:
             insights.append("😊 Be mindful of emotional spending triggers")
             insights.append("💡 Try the 24-hour rule for non-essential purchases")
         
         # Look for budget awareness
-        if any(word in text_lower for word in ['budget', 'plan', 'track']):
+        if counts['budget_awareness'] > 0:
             insights.append("📊 You're showing good budget awareness")
         else:
             insights.append("📝 Consider tracking your spending to identify patterns")
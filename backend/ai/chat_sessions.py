@@ -0,0 +1,206 @@
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Longest excerpt of a message kept in the rolling summary
+SUMMARY_EXCERPT_CHARS = 160
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token) for when no tokenizer is loaded"""
+    return max(1, len(text) // 4)
+
+
+def _excerpt(text):
+    """First sentence of `text`, capped at SUMMARY_EXCERPT_CHARS"""
+    text = ' '.join(text.split())
+    match = re.match(r'(.+?[.!?])(\s|$)', text)
+    sentence = match.group(1) if match else text
+    if len(sentence) > SUMMARY_EXCERPT_CHARS:
+        sentence = sentence[:SUMMARY_EXCERPT_CHARS - 1].rstrip() + '…'
+    return sentence
+
+
+class ChatSession:
+    def __init__(self, session_id, max_context_tokens, count_tokens):
+        """One conversation: recent turns verbatim plus a rolling summary of older ones
+
+        Turns are kept while the summary and the turns fit in
+        `max_context_tokens`. Beyond that the oldest turn is folded into
+        the summary. The summary gets at most a third of the budget and
+        drops its oldest lines to stay there. Prompt size therefore stays
+        bounded however long the conversation runs.
+        """
+        self.session_id = session_id
+        self.max_context_tokens = max_context_tokens
+        self.summary_budget = max_context_tokens // 3
+        self.count_tokens = count_tokens
+        self.last_used = time.time()
+        # Serializes changes to this session; the store's lock only guards the session table
+        self.lock = threading.Lock()
+        # Size last added to the store's memory total, kept by ChatSessionStore under its lock
+        self.accounted_bytes = 0
+
+        self.turns = []            # (user, ai, tokens)
+        self.summary = []          # (line, tokens)
+        self.summarized_turns = 0  # turns folded into the summary, including dropped lines
+        self.dropped_lines = 0
+        self.total_turns = 0
+
+    @property
+    def size(self):
+        """Approximate memory held by the session's text, in bytes"""
+        return sum(len(user) + len(ai) for user, ai, _ in self.turns) + sum(len(line) for line, _ in self.summary)
+
+    def add_turn(self, user_message, ai_response):
+        # Count once when stored so later requests never re-encode old turns
+        tokens = self.count_tokens(f"User: {user_message}\nAI: {ai_response}")
+        self.turns.append((user_message, ai_response, tokens))
+        self.total_turns += 1
+        self._fit_budget()
+
+    def context(self):
+        """Conversation context for the next prompt, or '' for a new session"""
+        parts = []
+        if self.summary:
+            lines = [line for line, _ in self.summary]
+            if self.dropped_lines:
+                lines.insert(0, f"(… {self.dropped_lines} earlier exchange(s) omitted)")
+            parts.append("Summary of earlier conversation:\n" + "\n".join(lines))
+        if self.turns:
+            parts.append("Previous conversation:\n" + "\n".join(
+                f"User: {user}\nAI: {ai}" for user, ai, _ in self.turns
+            ))
+        return "\n\n".join(parts) + "\n\n" if parts else ""
+
+    def stats(self):
+        return {
+            'session_id': self.session_id,
+            'turns': self.total_turns,
+            'recent_turns': len(self.turns),
+            'summarized_turns': self.summarized_turns,
+            'context_tokens': self._summary_tokens() + self._turn_tokens()
+        }
+
+    def _summary_tokens(self):
+        return sum(tokens for _, tokens in self.summary)
+
+    def _turn_tokens(self):
+        return sum(tokens for _, _, tokens in self.turns)
+
+    def _fit_budget(self):
+        # Always keep the latest turn verbatim, even when it alone exceeds the budget
+        while len(self.turns) > 1 and self._summary_tokens() + self._turn_tokens() > self.max_context_tokens:
+            user, ai, _ = self.turns.pop(0)
+            line = f"- User asked: {_excerpt(user)} Advice: {_excerpt(ai)}"
+            self.summary.append((line, self.count_tokens(line)))
+            self.summarized_turns += 1
+
+            while len(self.summary) > 1 and self._summary_tokens() > self.summary_budget:
+                self.summary.pop(0)
+                self.dropped_lines += 1
+
+
+class ChatSessionStore:
+    def __init__(self, max_sessions=1000, idle_timeout=1800, max_context_tokens=384,
+                 max_memory_bytes=64 * 1024 * 1024, count_tokens=None):
+        """Server-side chat sessions addressed by id
+
+        Sessions idle for more than `idle_timeout` seconds are dropped. When
+        there are more than `max_sessions` sessions, or their text takes more
+        than `max_memory_bytes`, the least recently used are evicted.
+        `count_tokens` measures turn length for the context budget; it
+        defaults to a character-based estimate.
+        """
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_timeout = float(idle_timeout)
+        self.max_context_tokens = max(16, int(max_context_tokens))
+        self.max_memory_bytes = int(max_memory_bytes)
+        self.count_tokens = count_tokens or estimate_tokens
+
+        self._sessions = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'created': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+
+    def get(self, session_id=None):
+        """Return (session, created): the live session for `session_id`, or a new one
+
+        An unknown or expired id starts a new session with a fresh id, so
+        callers should always send back the id they receive.
+        """
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_used = time.time()
+                return session, False
+
+            session = ChatSession(uuid.uuid4().hex, self.max_context_tokens, self.count_tokens)
+            self._sessions[session.session_id] = session
+            self._stats['created'] += 1
+            self._evict()
+            return session, True
+
+    def add_turn(self, session, user_message, ai_response):
+        """Record a finished exchange and enforce the memory cap
+
+        Tokenizing the turn and rebuilding the summary only hold the
+        session's own lock, so chats on other sessions don't wait for it.
+        """
+        with session.lock:
+            session.add_turn(user_message, ai_response)
+            size = session.size
+
+            with self._lock:
+                session.last_used = time.time()
+                # The session may have been evicted while the answer was generated
+                if self._sessions.get(session.session_id) is session:
+                    self._memory_bytes += size - session.accounted_bytes
+                    session.accounted_bytes = size
+                    self._sessions.move_to_end(session.session_id)
+                    self._evict()
+
+    def delete(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._memory_bytes -= session.accounted_bytes
+            return True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sessions'] = len(self._sessions)
+            stats['memory_bytes'] = self._memory_bytes
+            stats['max_sessions'] = self.max_sessions
+            stats['max_context_tokens'] = self.max_context_tokens
+        return stats
+
+    def _remove_oldest(self):
+        _, session = self._sessions.popitem(last=False)
+        self._memory_bytes -= session.accounted_bytes
+
+    def _expire(self):
+        # Least recently used first, so stop at the first live session
+        cutoff = time.time() - self.idle_timeout
+        while self._sessions and next(iter(self._sessions.values())).last_used <= cutoff:
+            self._remove_oldest()
+            self._stats['expired'] += 1
+
+    def _evict(self):
+        # The most recently used session is never evicted to make room for itself
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions
+            or (self.max_memory_bytes and self._memory_bytes > self.max_memory_bytes)
+        ):
+            self._remove_oldest()
+            self._stats['evictions'] += 1
@@ -0,0 +1,66 @@
+import math
+import threading
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight=4, queue_depth=16):
+        """Bound how much generation work the server accepts
+
+        Up to `max_in_flight` requests generate at once and up to
+        `queue_depth` more wait for a slot; anything beyond that is rejected
+        immediately so callers can back off instead of piling up.
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.queue_depth = max(0, int(queue_depth))
+
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._average_seconds = None
+        self._stats = {
+            'admitted': 0,
+            'rejected': 0,
+            'completed': 0
+        }
+
+    @property
+    def capacity(self):
+        return self.max_in_flight + self.queue_depth
+
+    def try_acquire(self):
+        """Admit a request if there is room in flight or in the queue; returns False when full"""
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self._stats['rejected'] += 1
+                return False
+            self._admitted += 1
+            self._stats['admitted'] += 1
+            return True
+
+    def release(self, elapsed_seconds=None):
+        """Mark an admitted request as finished, recording how long it took"""
+        with self._lock:
+            self._admitted -= 1
+            self._stats['completed'] += 1
+            if elapsed_seconds is not None:
+                if self._average_seconds is None:
+                    self._average_seconds = elapsed_seconds
+                else:
+                    # Exponential moving average keeps the estimate current under changing load
+                    self._average_seconds = 0.8 * self._average_seconds + 0.2 * elapsed_seconds
+
+    def retry_after(self):
+        """Seconds a rejected client should wait: roughly the time to drain the current queue"""
+        with self._lock:
+            average = self._average_seconds or 1.0
+            waves = self._admitted / self.max_in_flight
+        return max(1, math.ceil(average * waves))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = min(self._admitted, self.max_in_flight)
+            stats['queued'] = max(0, self._admitted - self.max_in_flight)
+            stats['max_in_flight'] = self.max_in_flight
+            stats['queue_depth'] = self.queue_depth
+            stats['average_seconds'] = round(self._average_seconds, 3) if self._average_seconds else None
+        return stats
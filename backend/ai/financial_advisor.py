@@ -1,72 +1,517 @@
-from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM, LogitsProcessorList, StoppingCriteriaList, TextIteratorStreamer
 import torch
 import json
 import re
+import threading
+import time
+from concurrent.futures import CancelledError
 from datetime import datetime, timedelta
 
+from ai.assisted_generation import AssistedGenerator, load_draft_model
+from ai.batching import AdviceBatcher
+from ai.chat_sessions import estimate_tokens
+from ai.goal_recommender import GoalRecommender, GoalRules
+from ai.inference_backends import load_backend, supports_assisted_generation, supports_prefix_cache
+from ai.knowledge_base import KnowledgeBase
+from ai.metrics import (ADVICE_STAGE_SECONDS, PROMPT_TOKENS, PROMPT_TRUNCATED_TOKENS, GENERATED_TOKENS, GENERATION_TOKENS_PER_SECOND,
+                        GENERATED_TOKENS_PER_ANSWER, GENERATION_STOPS, STOP_SEQUENCE_TOKENS_SAVED)
+from ai.model_store import ModelStore, peak_rss_mb
+from ai.prefix_cache import PrefixCache
+from ai.profiling import span
+from ai.prompt_builder import PromptBuilder, PromptTooLongError, pad_batch
+from ai.response_cache import ResponseCache
+from ai.retrieval_advisor import RetrievalAdvisor
+from ai.single_flight import SingleFlight, wait_for
+from ai.stopping import DEFAULT_STOP_SEQUENCES, StopSequences, truncate_at_stop
+from ai.streaming import StreamingCleaner
+
+MODEL_NAME = "mistralai/Mistral-7B-Instruct"
+
+# Base financial advisor instructions
+BASE_INSTRUCTIONS = """You are LoopFund AI, a professional financial advisor specializing in savings, budgeting, and financial planning. 
+
+Your role is to provide:
+- Clear, actionable financial advice
+- Specific savings calculations and timelines
+- Motivational and encouraging responses
+- Practical tips for achieving financial goals
+- Risk-aware recommendations
+
+Always respond in a friendly, professional tone and provide specific numbers when possible."""
+
+# Financial knowledge base, used when no retrieval index is configured (see ai.knowledge_base)
+FINANCIAL_KNOWLEDGE = """
+Financial Knowledge Base:
+- Emergency Fund: 3-6 months of expenses
+- 50/30/20 Rule: 50% needs, 30% wants, 20% savings
+- Compound Interest: Money grows exponentially over time
+- Diversification: Don't put all eggs in one basket
+- Pay Yourself First: Save before spending
+"""
+
+PROMPT_TOO_LONG_MESSAGE = "Your question is too long for me to answer. Please shorten it and try again."
+CANCELLED_MESSAGE = "Request cancelled."
+
+# Seconds a streamed answer waits for the next token before giving up
+STREAM_TOKEN_TIMEOUT = 60
+
+# Identical for every request without a knowledge index, so its key/value state is computed once at load time
+STATIC_PROMPT_PREFIX = f"{BASE_INSTRUCTIONS}\n\n{FINANCIAL_KNOWLEDGE}"
+
 class FinancialAdvisor:
-    def __init__(self):
-        """Initialize the AI Financial Advisor with Mistral-7B-Instruct"""
-        try:
-            # Load pre-trained models
-            self.conversation_model = pipeline(
-                "text-generation", 
-                model="mistralai/Mistral-7B-Instruct",
-                torch_dtype=torch.float16,
-                device_map="auto"
+    def __init__(self, batch_max_size=8, batch_wait_ms=10, deterministic=False,
+                 cache_size=1024, cache_ttl=3600, cache_db=None, prefix_cache=True,
+                 load_model=True, model_name=MODEL_NAME, backend='torch-fp16', onnx_dir=None,
+                 max_new_tokens=200, max_prompt_tokens=1024, draft_model=None, draft_tokens=5,
+                 model_dir=None, persist_artifacts=True, goal_rules=None, coalesce=True,
+                 retrieval_advisor=None, knowledge_index=None, knowledge_top_k=4, knowledge_tokens=256,
+                 stop_sequences=DEFAULT_STOP_SEQUENCES):
+        """Initialize the AI Financial Advisor with Mistral-7B-Instruct
+
+        Concurrent getAdvice calls are grouped into batches of up to
+        `batch_max_size` prompts, waiting at most `batch_wait_ms` for a
+        batch to fill before generating.
+
+        With `deterministic=True` generation is greedy, so identical
+        questions get identical answers and responses are served from a
+        ResponseCache (`cache_size` entries in memory, persisted to
+        `cache_db` when given).
+
+        With `prefix_cache=True` the key/value state of the static prompt
+        prefix is computed once at load time and reused by every generate call.
+
+        Pass `load_model=False` to construct the advisor immediately and
+        call load_model() later (e.g. from a ModelLoader thread); the
+        rule-based methods work without a model.
+
+        `backend` selects how the model runs (see ai.inference_backends):
+        'torch-fp16' on GPU nodes, 'torch-int8' or 'onnx' (from `onnx_dir`)
+        on CPU-only nodes.
+
+        Prompts are assembled as token ids and limited to `max_prompt_tokens`
+        (see ai.prompt_builder), and every answer is limited to
+        `max_new_tokens`, so the cost of a request is bounded up front.
+
+        With `draft_model` set (a smaller model sharing the tokenizer), answers
+        use assisted generation: the draft proposes up to `draft_tokens`
+        tokens and the main model verifies them in one forward pass (see
+        ai.assisted_generation). Answers follow the same sampling settings,
+        but prompts are decoded one at a time instead of in padded batches.
+
+        With `model_dir` set, models resolve only from pinned snapshots in that
+        directory and torch-fp32 weights are memory-mapped (see ai.model_store);
+        `persist_artifacts` keeps converted/quantized weights for later starts.
+
+        With `coalesce=True`, concurrent getAdvice calls whose prompts are
+        identical share one generation (see ai.single_flight); with sampling
+        enabled they all receive the same sampled answer.
+
+        Until the model is loaded, advice is the best-matching answer from
+        `retrieval_advisor` (a RetrievalAdvisor over the curated corpus).
+
+        With `knowledge_index` set (a directory built by
+        scripts/build_knowledge_index.py), the fixed knowledge block is
+        replaced by the `knowledge_top_k` passages most relevant to each
+        question, packed into at most `knowledge_tokens` prompt tokens; only
+        the instructions are then a cached prefix.
+
+        Generation stops as soon as an answer contains one of
+        `stop_sequences` (by default a new "User Question:" turn or an
+        end-of-turn marker, see ai.stopping), also inside a padded batch,
+        and the answer ends before it.
+
+        recommendGoals applies the rules table in the CSV file `goal_rules`
+        (default ai/data/goal_rules.csv, see ai.goal_recommender).
+        """
+        self.conversation_model = None
+        self.batcher = None
+        self.prefix_cache = None
+        self.prompt_builder = None
+        self.assisted_generator = None
+        self.response_cache = None
+        self.single_flight = SingleFlight() if coalesce else None
+        self.load_stats = None
+        self.model_store = ModelStore(model_dir, persist_artifacts=persist_artifacts) if model_dir else None
+        self.deterministic = deterministic
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_dir = onnx_dir
+        self.use_prefix_cache = prefix_cache and supports_prefix_cache(backend)
+        self.batch_max_size = batch_max_size
+        self.batch_wait_ms = batch_wait_ms
+        self.max_prompt_tokens = max_prompt_tokens
+        self.draft_model_name = draft_model if draft_model and supports_assisted_generation(backend) else None
+        self.draft_tokens = draft_tokens
+        self.stop_sequences = tuple(stop for stop in stop_sequences or () if stop)
+        self.goal_recommender = GoalRecommender(GoalRules.load(goal_rules))
+        self.retrieval_advisor = retrieval_advisor or RetrievalAdvisor()
+        self.knowledge_base = None
+        self.knowledge_top_k = knowledge_top_k
+        self.knowledge_tokens = knowledge_tokens
+        if knowledge_index:
+            try:
+                self.knowledge_base = KnowledgeBase(knowledge_index)
+                print(f"✅ Knowledge index mapped: {self.knowledge_base.manifest['passages']} passages "
+                      f"in {self.knowledge_base.open_seconds}s")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not open knowledge index, using the fixed knowledge base: {e}")
+        
+        if deterministic:
+            self.generation_kwargs = {'max_new_tokens': max_new_tokens, 'do_sample': False}
+        else:
+            self.generation_kwargs = {'max_new_tokens': max_new_tokens, 'temperature': 0.7, 'do_sample': True}
+        
+        # Sampled answers differ on every call, so only deterministic output is cached
+        if deterministic and cache_size:
+            self.response_cache = ResponseCache(
+                max_entries=cache_size,
+                ttl_seconds=cache_ttl,
+                db_path=cache_db,
+                namespace=json.dumps([
+                    model_name, backend, self.generation_kwargs, max_prompt_tokens, self.stop_sequences,
+                    [self.knowledge_base.fingerprint, knowledge_top_k, knowledge_tokens] if self.knowledge_base else None
+                ], sort_keys=True)
             )
-            print("✅ AI Financial Advisor initialized successfully!")
-        except Exception as e:
-            print(f"❌ Error initializing AI: {e}")
-            # Fallback to a simpler model if needed
-            self.conversation_model = None
+        
+        if load_model:
+            try:
+                self.load_model()
+            except Exception as e:
+                print(f"❌ Error initializing AI: {e}")
+    
+    def load_model(self):
+        """Load the text-generation model; raises if it cannot be loaded"""
+        # Load pre-trained models with the configured inference backend
+        if self.model_store:
+            model, tokenizer, load_stats = self.model_store.load(self.model_name, self.backend, onnx_dir=self.onnx_dir)
+        else:
+            started = time.perf_counter()
+            model, tokenizer = load_backend(self.backend, self.model_name, onnx_dir=self.onnx_dir)
+            load_stats = {
+                'model': self.model_name,
+                'backend': self.backend,
+                'source': 'hub',
+                'load_seconds': round(time.perf_counter() - started, 2),
+                'peak_rss_mb': peak_rss_mb()
+            }
+        self.load_stats = load_stats
+        print(f"⏱️ Loaded {self.model_name} from {load_stats['source']} in {load_stats['load_seconds']}s "
+              f"(peak RSS {load_stats['peak_rss_mb']} MB)")
+        conversation_model = pipeline("text-generation", model=model, tokenizer=tokenizer)
+        
+        # Batched generation needs a pad token and left padding for a decoder-only model
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+        
+        # Leave room for the answer inside the model's context window
+        budget = self.max_prompt_tokens
+        context_window = getattr(getattr(model, 'config', None), 'max_position_embeddings', None)
+        if context_window:
+            budget = min(budget, context_window - self.generation_kwargs['max_new_tokens'])
+        self.prompt_builder = PromptBuilder(
+            tokenizer,
+            BASE_INSTRUCTIONS,
+            None if self.knowledge_base else FINANCIAL_KNOWLEDGE,
+            max_prompt_tokens=budget,
+            max_knowledge_tokens=self.knowledge_tokens
+        )
+        
+        if self.draft_model_name:
+            try:
+                draft = load_draft_model(self.backend, self.draft_model_name, conversation_model.model, self.model_store)
+                self.assisted_generator = AssistedGenerator(conversation_model.model, draft, self.draft_tokens)
+                print(f"✅ Assisted generation enabled with draft model {self.draft_model_name}")
+            except Exception as e:
+                print(f"⚠️ Could not load draft model, using plain decoding: {e}")
+        
+        # The draft model has no key/value state for the cached prefix, so assisted prompts are encoded in full
+        if self.use_prefix_cache and not self.assisted_generator:
+            try:
+                self.prefix_cache = PrefixCache(conversation_model.model, tokenizer, self.prompt_builder.prefix_ids)
+                print(f"✅ Cached {self.prefix_cache.prefix_length} static prompt tokens")
+            except Exception as e:
+                print(f"⚠️ Could not precompute prompt prefix, encoding full prompts: {e}")
+        
+        if self.batcher is None:
+            self.batcher = AdviceBatcher(
+                self._generate_batch,
+                # Assisted generation decodes one prompt at a time, so there is nothing to batch
+                max_batch_size=1 if self.assisted_generator else self.batch_max_size,
+                max_wait_ms=self.batch_wait_ms
+            )
+        
+        # Publish last so requests never see a half-initialized model
+        self.conversation_model = conversation_model
+        print(f"✅ AI Financial Advisor initialized successfully! ({self.backend})")
+    
+    def warmup(self, user_query):
+        """Run one uncached generation so the first real request doesn't pay for lazy initialization"""
+        return self._generate_batch([self._build_prompt_ids(user_query, None)])[0]
     
-    def getAdvice(self, user_query, user_profile=None):
-        """Generate personalized financial advice based on user query and profile"""
+    def getAdvice(self, user_query, user_profile=None, history=None, cancelled=None):
+        """Generate personalized financial advice based on user query, profile and conversation history
+
+        `cancelled` is polled while waiting for the model; once it returns
+        True (e.g. the client disconnected) this request stops waiting and
+        its queued generation is dropped unless other requests share it.
+        """
         if not self.conversation_model:
-            return "AI service temporarily unavailable. Please try again later."
+            return self.retrieval_advisor.answer(user_query)['advice']
         
         try:
+            cache_key = None
+            if self.response_cache:
+                cache_key = self.response_cache.make_key(user_query, user_profile, history)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
             # Build context-aware prompt
-            context = self._build_context_prompt(user_query, user_profile)
+            with ADVICE_STAGE_SECONDS.time(stage='prompt_build'):
+                context = self._build_prompt_ids(user_query, user_profile, history)
             
-            # Generate response
-            response = self.conversation_model(
-                context,
-                max_length=300,
-                temperature=0.7,
-                do_sample=True,
-                pad_token_id=self.conversation_model.tokenizer.eos_token_id
-            )
+            # Generate response (shares a padded batch with concurrent requests, and
+            # one generation with concurrent requests for the identical prompt)
+            joined = False
+            if self.single_flight:
+                future, joined = self.single_flight.submit(tuple(context), lambda: self.batcher.submit(context))
+            else:
+                future = self.batcher.submit(context)
+            with span('generation_wait'):
+                generated_text = wait_for(future, cancelled)
             
             # Extract and clean the response
-            advice = self._clean_response(response[0]['generated_text'])
+            with ADVICE_STAGE_SECONDS.time(stage='cleaning'), span('cleaning'):
+                advice = self._clean_response(generated_text)
+            
+            # The request that started the generation stores it for all of them
+            if cache_key and not joined:
+                self.response_cache.set(cache_key, advice)
             return advice
             
+        except PromptTooLongError:
+            return PROMPT_TOO_LONG_MESSAGE
+        except CancelledError:
+            return CANCELLED_MESSAGE
         except Exception as e:
             print(f"Error generating advice: {e}")
             return "I'm having trouble processing your request. Please try again."
     
-    def get_financial_advice(self, user_query, user_profile=None):
-        """Legacy method for backward compatibility"""
-        return self.getAdvice(user_query, user_profile)
+    def streamAdvice(self, user_query, user_profile=None, history=None):
+        """Yield cleaned advice text chunks as soon as the model generates them
+
+        Streaming requests bypass the batcher: each one runs its own
+        generate call so tokens can be forwarded while they are produced.
+        """
+        if not self.conversation_model:
+            yield self.retrieval_advisor.answer(user_query)['advice']
+            return
+        
+        cache_key = None
+        if self.response_cache:
+            cache_key = self.response_cache.make_key(user_query, user_profile, history)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        try:
+            context = self._build_prompt_ids(user_query, user_profile, history)
+        except PromptTooLongError:
+            yield PROMPT_TOO_LONG_MESSAGE
+            return
+        tokenizer = self.conversation_model.tokenizer
+        model = self.conversation_model.model
+        
+        with span('tokenization'):
+            inputs = self._encode_prompts([context])
+        # Raises queue.Empty in the loop below if the model stalls
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=STREAM_TOKEN_TIMEOUT)
+        stops, stopping = self._stopping(inputs, cancellable=True)
+        generate = self.assisted_generator.generate if self.assisted_generator else model.generate
+        failures = []
+        
+        def run_generation():
+            try:
+                generate(
+                    **inputs,
+                    streamer=streamer,
+                    pad_token_id=tokenizer.eos_token_id,
+                    **stopping,
+                    **self.generation_kwargs
+                )
+            except Exception as e:
+                failures.append(e)
+                # generate only ends the streamer when it returns
+                streamer.end()
+        
+        threading.Thread(target=run_generation, daemon=True).start()
+        
+        # The prompt is skipped by the streamer, so only the stop sequence, artifact and ending rules apply
+        cleaner = StreamingCleaner(self.stop_sequences)
+        chunks = []
+        try:
+            with span('generation'):
+                for text in streamer:
+                    chunk = cleaner.feed(text)
+                    if chunk:
+                        chunks.append(chunk)
+                        yield chunk
+        finally:
+            # Stops decoding when the client disconnects, the generator is closed or the stream failed
+            stops.cancel()
+        if failures:
+            raise failures[0]
+        
+        tail = cleaner.finish()
+        if tail:
+            chunks.append(tail)
+            yield tail
+        
+        if cache_key:
+            self.response_cache.set(cache_key, ''.join(chunks))
+    
+    def count_tokens(self, text):
+        """Token count with the model's tokenizer, or an estimate before it is loaded"""
+        if not self.conversation_model:
+            return estimate_tokens(text)
+        return len(self.conversation_model.tokenizer.encode(text, add_special_tokens=False))
     
-    def _build_context_prompt(self, user_query, user_profile):
-        """Build a comprehensive prompt with financial context and instructions"""
+    def _encode_prompts(self, prompts):
+        """Batch prompt token ids for generate, reusing the static prefix state when available"""
+        if self.prefix_cache:
+            return self.prefix_cache.build_inputs(prompts)
         
-        # Base financial advisor instructions
-        base_instructions = """You are LoopFund AI, a professional financial advisor specializing in savings, budgeting, and financial planning. 
-
-Your role is to provide:
-- Clear, actionable financial advice
-- Specific savings calculations and timelines
-- Motivational and encouraging responses
-- Practical tips for achieving financial goals
-- Risk-aware recommendations
+        return pad_batch(prompts, self.conversation_model.tokenizer.pad_token_id, self.conversation_model.model.device)
+    
+    def _generate_batch(self, prompts):
+        """Run one padded generate call for a batch of prompts and return the generated text of each"""
+        if self.assisted_generator:
+            return [self._generate_assisted(ids) for ids in prompts]
+        
+        tokenizer = self.conversation_model.tokenizer
+        with ADVICE_STAGE_SECONDS.time(stage='tokenization'), span('tokenization'):
+            inputs = self._encode_prompts(prompts)
+        
+        stops, stopping = self._stopping(inputs)
+        started = time.perf_counter()
+        with torch.no_grad(), span('generation'):
+            outputs = self.conversation_model.model.generate(
+                **inputs,
+                pad_token_id=tokenizer.eos_token_id,
+                **stopping,
+                **self.generation_kwargs
+            )
+        
+        return self._decode_new_tokens(inputs, outputs, time.perf_counter() - started, stops)
+    
+    def _generate_assisted(self, prompt_ids):
+        """Generate one answer with the draft model proposing tokens (assisted generation is batch size 1)"""
+        tokenizer = self.conversation_model.tokenizer
+        with ADVICE_STAGE_SECONDS.time(stage='tokenization'), span('tokenization'):
+            inputs = self._encode_prompts([prompt_ids])
+        
+        stops, stopping = self._stopping(inputs)
+        started = time.perf_counter()
+        with span('generation'):
+            outputs = self.assisted_generator.generate(
+                **inputs,
+                pad_token_id=tokenizer.eos_token_id,
+                **stopping,
+                **self.generation_kwargs
+            )
+        
+        return self._decode_new_tokens(inputs, outputs, time.perf_counter() - started, stops)[0]
+    
+    def _stopping(self, inputs, cancellable=False):
+        """(StopSequences, generate kwargs) stopping each row of `inputs` at the stop sequences
 
-Always respond in a friendly, professional tone and provide specific numbers when possible."""
+        With `cancellable`, the kwargs are returned even without stop
+        sequences, so StopSequences.cancel() can end the generate call.
+        """
+        if not self.stop_sequences and not cancellable:
+            return None, {}
+        input_ids = inputs['input_ids']
+        stops = StopSequences(self.conversation_model.tokenizer, self.stop_sequences, input_ids.shape[1], input_ids.shape[0])
+        return stops, {
+            'logits_processor': LogitsProcessorList([stops.logits_processor]),
+            'stopping_criteria': StoppingCriteriaList([stops.stopping_criteria])
+        }
+    
+    def _decode_new_tokens(self, inputs, outputs, generation_seconds, stops=None):
+        """Record token metrics for a generate call and return the generated text of each prompt, cut at stop sequences"""
+        tokenizer = self.conversation_model.tokenizer
+        prompt_length = inputs['input_ids'].shape[1]
+        new_tokens = outputs[:, prompt_length:]
+        # Padding (EOS) after an early-finished sequence is not generated work
+        per_answer = ((new_tokens != tokenizer.pad_token_id) & (new_tokens != tokenizer.eos_token_id)).sum(dim=1).tolist()
+        generated = sum(per_answer)
+        
+        ADVICE_STAGE_SECONDS.observe(generation_seconds, stage='generation')
+        PROMPT_TOKENS.inc(int(inputs['attention_mask'].sum()))
+        GENERATED_TOKENS.inc(generated)
+        if generation_seconds > 0:
+            GENERATION_TOKENS_PER_SECOND.set(round(generated / generation_seconds, 2))
+        
+        max_new_tokens = self.generation_kwargs['max_new_tokens']
+        for row, tokens in enumerate(per_answer):
+            GENERATED_TOKENS_PER_ANSWER.observe(tokens)
+            if stops and stops.stopped[row]:
+                GENERATION_STOPS.inc(reason='stop_sequence')
+                STOP_SEQUENCE_TOKENS_SAVED.inc(max(0, max_new_tokens - tokens))
+            else:
+                GENERATION_STOPS.inc(reason='eos' if tokens < max_new_tokens else 'length')
+        
+        texts = tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        return [truncate_at_stop(text, self.stop_sequences) for text in texts]
+    
+    def get_financial_advice(self, user_query, user_profile=None, history=None, cancelled=None):
+        """Legacy method for backward compatibility"""
+        return self.getAdvice(user_query, user_profile, history, cancelled)
+    
+    def _build_prompt_ids(self, user_query, user_profile, history=None):
+        """Token ids of the prompt, cut to the prompt budget (profile, then history, then knowledge)"""
+        with span('prompt_build'):
+            ids, truncated = self.prompt_builder.build(
+                user_query, self._profile_context(user_profile), history or '', self._knowledge_passages(user_query)
+            )
+        for segment, tokens in truncated.items():
+            PROMPT_TRUNCATED_TOKENS.inc(tokens, segment=segment)
+        return ids
+    
+    def _build_context_prompt(self, user_query, user_profile, history=None):
+        """Build a comprehensive prompt with financial context and instructions
 
-        # User profile context
+        The static instructions (and the fixed knowledge base, without a
+        knowledge index) come first so their key/value state can be
+        computed once and reused (see PrefixCache).
+        This is the text form of the prompt; generation uses the budgeted
+        token ids from _build_prompt_ids.
+        """
+        with span('prompt_build'):
+            history_context = f"{history.strip()}\n\n" if history else ""
+            
+            # Build the complete prompt
+            passages = self._knowledge_passages(user_query)
+            if passages is None:
+                prefix = STATIC_PROMPT_PREFIX
+            else:
+                knowledge = ''.join(f"\n- {' '.join(text.split())}" for text in passages)
+                prefix = f"{BASE_INSTRUCTIONS}\n\nFinancial Knowledge Base:{knowledge}" if passages else BASE_INSTRUCTIONS
+            full_prompt = f"{prefix}\n\n{self._profile_context(user_profile)}\n\n{history_context}User Question: {user_query}\n\nLoopFund AI Response:"
+        
+        return full_prompt
+    
+    def _knowledge_passages(self, user_query):
+        """Texts of the passages most relevant to `user_query`, best first (None without a knowledge index)"""
+        if not self.knowledge_base:
+            return None
+        with span('knowledge_retrieval'):
+            return [passage['text'] for passage in self.knowledge_base.search(user_query, self.knowledge_top_k)]
+    
+    def _profile_context(self, user_profile):
+        """User profile section of the prompt ('' without a profile)"""
         profile_context = ""
         if user_profile:
             profile_context = f"""
@@ -77,21 +522,7 @@ User Profile:
 - Financial Goals: {user_profile.get('goals', 'Not specified')}
 - Risk Tolerance: {user_profile.get('risk_tolerance', 'Not specified')}
 """
-
-        # Financial knowledge base
-        financial_knowledge = """
-Financial Knowledge Base:
-- Emergency Fund: 3-6 months of expenses
-- 50/30/20 Rule: 50% needs, 30% wants, 20% savings
-- Compound Interest: Money grows exponentially over time
-- Diversification: Don't put all eggs in one basket
-- Pay Yourself First: Save before spending
-"""
-
-        # Build the complete prompt
-        full_prompt = f"{base_instructions}\n\n{profile_context}\n\n{financial_knowledge}\n\nUser Question: {user_query}\n\nLoopFund AI Response:"
-        
-        return full_prompt
+        return profile_context
     
     def _clean_response(self, response):
         """Clean and format the AI response"""
@@ -238,63 +669,8 @@ Would you like me to help you adjust your goal or create a more realistic timeli
     def recommendGoals(self, user_profile):
         """Recommend financial goals based on user profile"""
         try:
-            # Basic goal recommendations based on age and income
-            age = user_profile.get('age', 25)
-            income = user_profile.get('income', 50000)
-            
-            recommendations = []
-            
-            if age < 30:
-                recommendations.append({
-                    'type': 'emergency_fund',
-                    'name': 'Emergency Fund',
-                    'target_amount': income * 0.1,  # 10% of income
-                    'timeline_months': 6,
-                    'priority': 'high',
-                    'description': 'Build a safety net for unexpected expenses'
-                })
-                recommendations.append({
-                    'type': 'debt_payoff',
-                    'name': 'High-Interest Debt Payoff',
-                    'target_amount': 0,  # Variable
-                    'timeline_months': 12,
-                    'priority': 'high',
-                    'description': 'Focus on paying off credit cards and loans'
-                })
-            elif age < 40:
-                recommendations.append({
-                    'type': 'retirement',
-                    'name': 'Retirement Savings',
-                    'target_amount': income * 0.15,  # 15% of income
-                    'timeline_months': 240,  # 20 years
-                    'priority': 'high',
-                    'description': 'Increase retirement contributions'
-                })
-                recommendations.append({
-                    'type': 'investment',
-                    'name': 'Investment Portfolio',
-                    'target_amount': income * 0.2,  # 20% of income
-                    'timeline_months': 120,  # 10 years
-                    'priority': 'medium',
-                    'description': 'Build a diversified investment portfolio'
-                })
-            else:
-                recommendations.append({
-                    'type': 'retirement',
-                    'name': 'Retirement Catch-up',
-                    'target_amount': income * 0.25,  # 25% of income
-                    'timeline_months': 180,  # 15 years
-                    'priority': 'high',
-                    'description': 'Accelerate retirement savings'
-                })
-                recommendations.append({
-                    'type': 'estate',
-                    'name': 'Estate Planning',
-                    'target_amount': 0,  # Variable
-                    'timeline_months': 60,  # 5 years
-                    'priority': 'medium',
-                    'description': 'Plan for wealth transfer and legacy'
-                })
+            # Goal recommendations from the rules table, by age and income bracket
+            recommendations = self.goal_recommender.recommend(user_profile)
             
             return {
                 'success': True,
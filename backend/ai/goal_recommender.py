@@ -0,0 +1,245 @@
+import csv
+import os
+
+import numpy as np
+
+# Goal rules shipped with the backend; GOAL_RULES_FILE points at another table
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'goal_rules.csv')
+
+RULE_TEXT_FIELDS = ('type', 'name', 'priority', 'description')
+# Empty bounds are unbounded; min_* is inclusive and max_* exclusive
+RULE_BOUND_FIELDS = ('min_age', 'max_age', 'min_income', 'max_income')
+
+# Same defaults as recommendGoals for a profile without age or income
+DEFAULT_AGE = 25
+DEFAULT_INCOME = 50000
+
+
+def _number(row, field, line, default):
+    value = (row.get(field) or '').strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Goal rules line {line}: {field} must be a number, got '{value}'")
+
+
+def _column(profiles, field):
+    """One column of `profiles` as float64, NaN where missing (dict of arrays, DataFrame or Arrow table)"""
+    if isinstance(profiles, dict):
+        if field not in profiles:
+            return None
+        values = profiles[field]
+        if isinstance(values, np.ndarray):
+            return values.astype(np.float64, copy=False)
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    names = profiles.schema.names if hasattr(profiles, 'schema') else profiles.columns
+    if field not in names:
+        return None
+    column = profiles.column(field).to_pandas() if hasattr(profiles, 'schema') else profiles[field]
+    return column.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class GoalRules:
+    def __init__(self, rules):
+        """Goal recommendation rules as a table, one rule per recommendation
+
+        Each rule has the RULE_TEXT_FIELDS, an age range and an income
+        range (RULE_BOUND_FIELDS), `income_share` (target amount as a share
+        of income, 0 for a variable target) and `timeline_months`. A
+        profile gets every rule whose ranges contain its age and income,
+        in table order.
+        """
+        if not rules:
+            raise ValueError("Goal rules table is empty")
+        self.rules = rules
+        self.text = {field: [rule[field] for rule in rules] for field in RULE_TEXT_FIELDS}
+        self.bounds = {field: np.array([rule[field] for rule in rules], dtype=np.float64) for field in RULE_BOUND_FIELDS}
+        self.income_share = np.array([rule['income_share'] for rule in rules], dtype=np.float64)
+        self.timeline_months = np.array([rule['timeline_months'] for rule in rules], dtype=np.int64)
+
+    @classmethod
+    def load(cls, path=None):
+        """Read rules from a CSV file with a header row (see ai/data/goal_rules.csv)"""
+        path = path or DEFAULT_RULES_PATH
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            missing = set(RULE_TEXT_FIELDS + RULE_BOUND_FIELDS + ('income_share', 'timeline_months')) - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"Goal rules in {path} are missing columns: {', '.join(sorted(missing))}")
+
+            rules = []
+            for line, row in enumerate(reader, start=2):
+                rule = {field: (row[field] or '').strip() for field in RULE_TEXT_FIELDS}
+                if not rule['type']:
+                    raise ValueError(f"Goal rules line {line}: type is required")
+                for field in ('min_age', 'min_income'):
+                    rule[field] = _number(row, field, line, -np.inf)
+                for field in ('max_age', 'max_income'):
+                    rule[field] = _number(row, field, line, np.inf)
+                if rule['min_age'] >= rule['max_age'] or rule['min_income'] >= rule['max_income']:
+                    raise ValueError(f"Goal rules line {line}: each min bound must be below its max bound")
+                rule['income_share'] = _number(row, 'income_share', line, 0.0)
+                rule['timeline_months'] = int(_number(row, 'timeline_months', line, 0))
+                rules.append(rule)
+        return cls(rules)
+
+    def matching(self, age, income):
+        """Indices of the rules that apply to one profile"""
+        bounds = self.bounds
+        return np.nonzero(
+            (bounds['min_age'] <= age) & (age < bounds['max_age']) &
+            (bounds['min_income'] <= income) & (income < bounds['max_income'])
+        )[0]
+
+    def brackets(self, field):
+        """Sorted finite bounds of `field` ('age' or 'income'); bracket b is [edges[b-1], edges[b])"""
+        edges = np.concatenate([self.bounds[f'min_{field}'], self.bounds[f'max_{field}']])
+        return np.unique(edges[np.isfinite(edges)])
+
+
+class GoalRecommender:
+    def __init__(self, rules=None):
+        """Goal recommendations from a GoalRules table, per profile or for a whole user base
+
+        recommend() gives the recommendations for one profile, as returned
+        by FinancialAdvisor.recommendGoals. recommend_batch() takes columnar
+        profiles (a dict of arrays, a pandas DataFrame or a pyarrow Table
+        with `age` and `income` columns), assigns every profile to an age
+        and income bracket with np.searchsorted and expands the rules of
+        each bracket in one pass. recommend_chunks() streams the same
+        output chunk by chunk for inputs larger than memory.
+        """
+        self.rules = rules or GoalRules.load()
+
+        # Every bracket lies entirely inside or outside each rule's range, so
+        # the rules of a bracket cell are found once here, not per profile
+        self.age_edges = self.rules.brackets('age')
+        self.income_edges = self.rules.brackets('income')
+        ages = self._representatives(self.age_edges)
+        incomes = self._representatives(self.income_edges)
+
+        cell_rules = [self.rules.matching(age, income) for age in ages for income in incomes]
+        self.cell_counts = np.array([len(indices) for indices in cell_rules], dtype=np.int64)
+        self.cell_offsets = np.cumsum(self.cell_counts) - self.cell_counts
+        self.cell_rules = np.concatenate(cell_rules).astype(np.int32) if self.cell_counts.sum() else np.zeros(0, dtype=np.int32)
+
+    @staticmethod
+    def _representatives(edges):
+        """A value inside each bracket of `edges`"""
+        if not len(edges):
+            return np.zeros(1)
+        return np.concatenate([[edges[0] - 1], edges])
+
+    def recommend(self, user_profile):
+        """Recommendations for one profile as a list of dicts"""
+        age = user_profile.get('age', DEFAULT_AGE)
+        income = user_profile.get('income', DEFAULT_INCOME)
+
+        recommendations = []
+        for index in self.rules.matching(float(age), float(income)):
+            rule = self.rules.rules[index]
+            recommendations.append({
+                'type': rule['type'],
+                'name': rule['name'],
+                # A zero share marks a variable target, reported as 0
+                'target_amount': income * rule['income_share'] if rule['income_share'] else 0,
+                'timeline_months': rule['timeline_months'],
+                'priority': rule['priority'],
+                'description': rule['description']
+            })
+        return recommendations
+
+    def recommend_batch(self, profiles, start=0):
+        """Recommendations for columnar profiles, one output row per (profile, rule)
+
+        Missing or null ages and incomes get the recommendGoals defaults.
+        Returns a dict of NumPy arrays: `profile_index` (row in `profiles`
+        plus `start`), `rule` (index into self.rules, whose text and
+        timeline columns expand it) and `target_amount`. Rows are ordered by
+        profile, then by rule.
+        """
+        age = _column(profiles, 'age')
+        income = _column(profiles, 'income')
+        if age is None and income is None:
+            raise ValueError("Profiles need an age or income column")
+        length = len(age if age is not None else income)
+        age = np.full(length, float(DEFAULT_AGE)) if age is None else np.where(np.isnan(age), DEFAULT_AGE, age)
+        income = np.full(length, float(DEFAULT_INCOME)) if income is None else np.where(np.isnan(income), DEFAULT_INCOME, income)
+
+        cell = np.searchsorted(self.age_edges, age, side='right') * (len(self.income_edges) + 1)
+        cell += np.searchsorted(self.income_edges, income, side='right')
+
+        counts = self.cell_counts[cell]
+        total = int(counts.sum())
+        profile = np.repeat(np.arange(length, dtype=np.int64), counts)
+        # Position of each output row among its profile's rules
+        within = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+        rule = self.cell_rules[np.repeat(self.cell_offsets[cell], counts) + within]
+
+        return {
+            'profile_index': profile + start,
+            'rule': rule,
+            'target_amount': income[profile] * self.rules.income_share[rule]
+        }
+
+    def recommend_chunks(self, profiles, chunk_rows=100000):
+        """Yield recommend_batch results chunk by chunk
+
+        `profiles` is a single columnar input (sliced into `chunk_rows`
+        rows) or an iterable of them, e.g. pandas.read_csv(..., chunksize=n)
+        or pyarrow's ParquetFile.iter_batches(); profile indices continue
+        across chunks.
+        """
+        if isinstance(profiles, dict) or hasattr(profiles, 'columns') or hasattr(profiles, 'schema'):
+            length = len(next(iter(profiles.values()))) if isinstance(profiles, dict) else len(profiles)
+            chunks = (self._slice(profiles, start, chunk_rows) for start in range(0, length, chunk_rows))
+        else:
+            chunks = profiles
+
+        start = 0
+        for chunk in chunks:
+            length = len(next(iter(chunk.values()))) if isinstance(chunk, dict) else len(chunk)
+            yield self.recommend_batch(chunk, start=start)
+            start += length
+
+    @staticmethod
+    def _slice(profiles, start, rows):
+        if isinstance(profiles, dict):
+            return {field: values[start:start + rows] for field, values in profiles.items()}
+        if hasattr(profiles, 'schema'):
+            return profiles.slice(start, rows)
+        return profiles.iloc[start:start + rows]
+
+    def to_records(self, result, count, start=0):
+        """Per-profile recommendation lists, as recommend() returns them, for `count` profiles from `start`"""
+        records = [[] for _ in range(count)]
+        rules = self.rules.rules
+        for profile, rule, target in zip(result['profile_index'].tolist(), result['rule'].tolist(), result['target_amount'].tolist()):
+            spec = rules[rule]
+            records[profile - start].append({
+                'type': spec['type'],
+                'name': spec['name'],
+                'target_amount': target if spec['income_share'] else 0,
+                'timeline_months': spec['timeline_months'],
+                'priority': spec['priority'],
+                'description': spec['description']
+            })
+        return records
+
+    def to_frame(self, result):
+        """A recommend_batch result as a pandas DataFrame with categorical text columns"""
+        import pandas as pd
+
+        rule = result['rule']
+        frame = pd.DataFrame({
+            'profile_index': result['profile_index'],
+            'target_amount': result['target_amount'],
+            'timeline_months': self.rules.timeline_months[rule]
+        })
+        for field in RULE_TEXT_FIELDS:
+            categories, codes = np.unique(self.rules.text[field], return_inverse=True)
+            frame[field] = pd.Categorical.from_codes(codes[rule], categories=categories.tolist())
+        return frame
@@ -0,0 +1,93 @@
+import os
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+# torch-fp16: the original fp16 `device_map="auto"` setup (GPU nodes)
+# torch-fp32: unquantized CPU baseline
+# torch-int8: fp32 weights with Linear layers dynamically quantized to int8 (CPU)
+# bnb-int8 / bnb-int4: bitsandbytes weight quantization (CUDA only)
+# onnx: ONNX Runtime CPU session exported with optimum (see scripts/export_quantized_model.py)
+BACKENDS = ('torch-fp16', 'torch-fp32', 'torch-int8', 'bnb-int8', 'bnb-int4', 'onnx')
+
+# Written by ORTQuantizer next to the exported fp32 graph
+ONNX_QUANTIZED_FILE = 'model_quantized.onnx'
+
+
+def load_backend(backend, model_name, onnx_dir=None):
+    """Load (model, tokenizer) for `model_name` using the selected inference backend"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+    tokenizer = AutoTokenizer.from_pretrained(onnx_dir if backend == 'onnx' and onnx_dir else model_name)
+
+    if backend == 'torch-fp16':
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float16, device_map="auto")
+
+    elif backend == 'torch-fp32':
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32, low_cpu_mem_usage=True)
+
+    elif backend == 'torch-int8':
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32, low_cpu_mem_usage=True)
+        model = quantize_int8(model)
+
+    elif backend in ('bnb-int8', 'bnb-int4'):
+        from transformers import BitsAndBytesConfig
+        if backend == 'bnb-int8':
+            quantization_config = BitsAndBytesConfig(load_in_8bit=True)
+        else:
+            quantization_config = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_compute_dtype=torch.float16
+            )
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            quantization_config=quantization_config,
+            device_map="auto"
+        )
+
+    else:
+        try:
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError:
+            raise ImportError("The onnx backend needs optimum[onnxruntime]: pip install 'optimum[onnxruntime]'")
+        # Without an exported directory, export on the fly (slow; meant for development)
+        file_name = None
+        if onnx_dir and os.path.exists(os.path.join(onnx_dir, ONNX_QUANTIZED_FILE)):
+            file_name = ONNX_QUANTIZED_FILE
+        model = ORTModelForCausalLM.from_pretrained(
+            onnx_dir or model_name,
+            export=onnx_dir is None,
+            file_name=file_name,
+            use_cache=True,
+            provider="CPUExecutionProvider"
+        )
+
+    if hasattr(model, 'eval'):
+        model.eval()
+    return model, tokenizer
+
+
+def quantize_int8(model):
+    """Dynamically quantize every nn.Linear to int8 weights for CPU inference"""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def supports_prefix_cache(backend):
+    """ONNX Runtime sessions don't accept a precomputed past_key_values in generate"""
+    return backend != 'onnx'
+
+
+def supports_assisted_generation(backend):
+    """Assisted generation drives the draft and main model through torch's generate loop"""
+    return backend != 'onnx'
+
+
+def supports_fork_sharing(backend):
+    """CPU torch weights can be loaded once and shared copy-on-write with forked workers
+
+    CUDA contexts and ONNX Runtime thread pools don't survive fork, so
+    those backends load the model in every worker instead.
+    """
+    return backend in ('torch-fp32', 'torch-int8')
@@ -0,0 +1,47 @@
+import re
+
+
+class KeywordMatcher:
+    def __init__(self, categories):
+        """Count keyword hits per category in a single regex pass over the text
+
+        `categories` maps a category name to its keywords. A keyword is a
+        string or a tuple of surface forms counted as one keyword, e.g.
+        ('spend', 'spends', 'spending', 'spent'). Matching is
+        case-insensitive on whole words, so 'cost' does not match 'costume'.
+        A keyword may belong to several categories.
+        """
+        self.categories = tuple(categories)
+        self._forms = {}
+
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                forms = (keyword,) if isinstance(keyword, str) else tuple(keyword)
+                canonical = forms[0].lower()
+                for form in forms:
+                    entry = self._forms.setdefault(form.lower(), (canonical, set()))
+                    entry[1].add(category)
+
+        # Longest first so multi-word phrases win over their prefixes
+        alternation = '|'.join(re.escape(form) for form in sorted(self._forms, key=len, reverse=True))
+        self._pattern = re.compile(r'\b(?:' + alternation + r')\b')
+
+    def matches(self, text):
+        """Return {canonical keyword: categories} for the keywords found in `text`"""
+        found = {}
+        for form in self._pattern.findall(text.lower()):
+            canonical, categories = self._forms[form]
+            found[canonical] = categories
+        return found
+
+    def count(self, text):
+        """Return {category: number of distinct keywords found}"""
+        counts = dict.fromkeys(self.categories, 0)
+        for categories in self.matches(text).values():
+            for category in categories:
+                counts[category] += 1
+        return counts
+
+    def count_batch(self, texts):
+        """Return one count() dict per text (a loop; one pass over the joined texts measured no faster)"""
+        return [self.count(text) for text in texts]
@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import shutil
+import time
+from collections import Counter
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from ai.metrics import registry
+
+# Curated passages shipped with the backend, the default input of scripts/build_knowledge_index.py
+DEFAULT_PASSAGES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'knowledge_passages.jsonl')
+
+INDEX_MANIFEST = 'manifest.json'
+INDEX_FORMAT = 1
+
+# Okapi BM25 parameters: term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[/.'][a-z0-9]+)*")
+
+KNOWLEDGE_SEARCH_SECONDS = registry.histogram(
+    'loopfund_knowledge_search_duration_seconds', 'Time to rank knowledge base passages for a question')
+
+
+def tokenize(text):
+    """Lowercased word tokens without stop words, with plurals folded ('expenses' -> 'expense')"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in ENGLISH_STOP_WORDS:
+            continue
+        if len(token) > 4 and token.endswith('ies'):
+            token = token[:-3] + 'y'
+        elif len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def read_passages(path):
+    """Yield passages from JSONL, one {"text", optional "id" and "title"} object per line"""
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            passage = json.loads(line)
+            if not passage.get('text'):
+                raise ValueError(f"Knowledge passage on line {line_number} has no text")
+            passage.setdefault('id', str(line_number))
+            yield passage
+
+
+def build_index(passages, directory, source=None):
+    """Write a BM25 index of `passages` (iterable of dicts with 'text') to `directory`
+
+    Postings are stored per term as doc ids with precomputed BM25 weights
+    (idf times the saturated, length-normalized term frequency), so a
+    query only sums the weights of its terms' postings. Everything is
+    written as .npy / flat binary files that KnowledgeBase memory-maps.
+    Returns the manifest.
+    """
+    started = time.perf_counter()
+    vocabulary = {}
+    term_ids, doc_ids, frequencies = [], [], []
+    lengths = []
+    records = bytearray()
+    record_offsets = [0]
+
+    for doc, passage in enumerate(passages):
+        tokens = tokenize(f"{passage.get('title', '')} {passage['text']}")
+        lengths.append(len(tokens))
+        for term, count in Counter(tokens).items():
+            term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+            doc_ids.append(doc)
+            frequencies.append(count)
+        records += json.dumps({field: passage[field] for field in ('id', 'title', 'text') if field in passage}).encode('utf-8')
+        record_offsets.append(len(records))
+
+    count = len(lengths)
+    if not count:
+        raise ValueError("Knowledge base has no passages")
+
+    term_ids = np.array(term_ids, dtype=np.int64)
+    doc_ids = np.array(doc_ids, dtype=np.int32)
+    frequencies = np.array(frequencies, dtype=np.float32)
+    lengths = np.array(lengths, dtype=np.float32)
+
+    # Group postings by term; the stable sort keeps doc ids ascending within a term
+    order = np.argsort(term_ids, kind='stable')
+    term_ids, doc_ids, frequencies = term_ids[order], doc_ids[order], frequencies[order]
+    document_frequency = np.bincount(term_ids, minlength=len(vocabulary))
+    offsets = np.concatenate([[0], np.cumsum(document_frequency)]).astype(np.int64)
+
+    average_length = float(lengths.mean()) or 1.0
+    idf = np.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+    normalization = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_ids] / average_length)
+    weights = idf[term_ids] * frequencies * (BM25_K1 + 1) / (frequencies + normalization)
+
+    manifest = {
+        'format': INDEX_FORMAT,
+        'passages': count,
+        'terms': len(vocabulary),
+        'postings': int(len(doc_ids)),
+        'average_length': round(average_length, 3),
+        'k1': BM25_K1,
+        'b': BM25_B,
+        'source': source,
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    }
+
+    # Write into a staging directory and swap it in, so readers never see a half-written index
+    directory = directory.rstrip(os.sep)
+    staging = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    np.save(os.path.join(staging, 'postings_offsets.npy'), offsets)
+    np.save(os.path.join(staging, 'postings_docs.npy'), doc_ids)
+    np.save(os.path.join(staging, 'postings_weights.npy'), weights.astype(np.float32))
+    np.save(os.path.join(staging, 'passage_offsets.npy'), np.array(record_offsets, dtype=np.int64))
+    with open(os.path.join(staging, 'passages.bin'), 'wb') as f:
+        f.write(records)
+    with open(os.path.join(staging, 'vocabulary.json'), 'w') as f:
+        json.dump(vocabulary, f, separators=(',', ':'))
+    manifest['build_seconds'] = round(time.perf_counter() - started, 3)
+    with open(os.path.join(staging, INDEX_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # The previous index is moved aside and deleted only after the swap, so
+    # the directory is missing just between the two renames
+    retired = f"{directory}.old-{os.getpid()}"
+    shutil.rmtree(retired, ignore_errors=True)
+    try:
+        os.replace(directory, retired)
+    except FileNotFoundError:
+        retired = None
+    os.replace(staging, directory)
+    if retired:
+        shutil.rmtree(retired, ignore_errors=True)
+    return manifest
+
+
+class KnowledgeBase:
+    def __init__(self, directory):
+        """Memory-mapped BM25 index over knowledge passages, built by scripts/build_knowledge_index.py
+
+        Postings and passage text stay on disk and are paged in as queries
+        touch them; only the vocabulary is read into memory. Opening a
+        100k-passage index takes milliseconds, and every process serving
+        the same index shares its pages.
+        """
+        started = time.perf_counter()
+        self.directory = directory
+        try:
+            with open(os.path.join(directory, INDEX_MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No knowledge index in {directory} (build it with scripts/build_knowledge_index.py)")
+        if self.manifest.get('format') != INDEX_FORMAT:
+            raise ValueError(f"Knowledge index in {directory} has format {self.manifest.get('format')}, expected {INDEX_FORMAT}; rebuild it")
+
+        with open(os.path.join(directory, 'vocabulary.json')) as f:
+            self.vocabulary = json.load(f)
+        self.offsets = np.load(os.path.join(directory, 'postings_offsets.npy'), mmap_mode='r')
+        self.docs = np.load(os.path.join(directory, 'postings_docs.npy'), mmap_mode='r')
+        self.weights = np.load(os.path.join(directory, 'postings_weights.npy'), mmap_mode='r')
+        self.passage_offsets = np.load(os.path.join(directory, 'passage_offsets.npy'), mmap_mode='r')
+        self.passages = np.memmap(os.path.join(directory, 'passages.bin'), dtype=np.uint8, mode='r') \
+            if self.passage_offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+        self.open_seconds = round(time.perf_counter() - started, 4)
+
+    @property
+    def fingerprint(self):
+        """Identifies this build of the index, e.g. for cache namespaces"""
+        return f"{self.manifest['built_at']}/{self.manifest['passages']}/{self.manifest['postings']}"
+
+    def search(self, query, k=4):
+        """Top `k` passages for `query` as [{'id', 'title', 'text', 'score'}], best first
+
+        Only passages sharing at least one term with the query are ranked.
+        """
+        with KNOWLEDGE_SEARCH_SECONDS.time():
+            terms = {self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary}
+            if not terms or k <= 0:
+                return []
+
+            docs = np.concatenate([self.docs[self.offsets[term]:self.offsets[term + 1]] for term in terms])
+            weights = np.concatenate([self.weights[self.offsets[term]:self.offsets[term + 1]] for term in terms])
+            # Dense accumulation is linear in postings and passages; sorting the
+            # candidates instead is slower once a common term has long postings
+            scores = np.bincount(docs, weights=weights, minlength=self.manifest['passages'])
+
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.lexsort((top, -scores[top]))]
+            return [dict(self.passage(int(doc)), score=round(float(scores[doc]), 4)) for doc in top if scores[doc] > 0]
+
+    def passage(self, doc):
+        start, end = int(self.passage_offsets[doc]), int(self.passage_offsets[doc + 1])
+        return json.loads(self.passages[start:end].tobytes())
+
+    def stats(self):
+        return dict(self.manifest, directory=self.directory, open_seconds=self.open_seconds)
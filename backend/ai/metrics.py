@@ -0,0 +1,180 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; fine-grained at the low end for the sub-millisecond stages
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f'{self.name} expects labels {self.labels}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items):
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}' for key, value in items]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), then sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key, [('le', _format_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Process-wide metrics rendered in the Prometheus text exposition format
+
+        Updates are a dict lookup and an add under a per-metric lock, so
+        instrumentation is cheap enough to leave on in production.
+        """
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    'loopfund_http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status'))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'loopfund_http_request_duration_seconds', 'HTTP request latency by route', ('route', 'method'))
+
+ADVICE_STAGE_SECONDS = registry.histogram(
+    'loopfund_advice_stage_duration_seconds',
+    'Time per advice stage: prompt_build and cleaning per request, tokenization and generation per batch',
+    ('stage',))
+PROMPT_TOKENS = registry.counter('loopfund_prompt_tokens_total', 'Prompt tokens sent to the model')
+PROMPT_TRUNCATED_TOKENS = registry.counter(
+    'loopfund_prompt_truncated_tokens_total', 'Prompt tokens cut to fit the prompt budget, by segment', ('segment',))
+GENERATED_TOKENS = registry.counter('loopfund_generated_tokens_total', 'Tokens generated by the model')
+GENERATION_TOKENS_PER_SECOND = registry.gauge(
+    'loopfund_generation_tokens_per_second', 'Generated tokens per second in the latest batch')
+GENERATED_TOKENS_PER_ANSWER = registry.histogram(
+    'loopfund_generated_tokens_per_answer', 'Tokens generated for one answer, up to where it stopped',
+    buckets=(8, 16, 32, 64, 96, 128, 192, 256, 384, 512, 1024))
+GENERATION_STOPS = registry.counter(
+    'loopfund_generation_stops_total', 'Why each answer stopped: stop_sequence, eos or length (max_new_tokens)', ('reason',))
+STOP_SEQUENCE_TOKENS_SAVED = registry.counter(
+    'loopfund_stop_sequence_tokens_saved_total',
+    'Tokens not generated because an answer hit a stop sequence (upper bound: up to max_new_tokens)')
+
+MODEL_AVAILABLE = registry.gauge('loopfund_model_available', '1 when the advisor model is ready to serve')
+MODEL_LOAD_SECONDS = registry.gauge('loopfund_model_load_seconds', 'Seconds the last successful model load took')
+MODEL_LOAD_PEAK_RSS_BYTES = registry.gauge(
+    'loopfund_model_load_peak_rss_bytes', 'Peak resident memory of the process when the model finished loading')
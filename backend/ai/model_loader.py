@@ -0,0 +1,115 @@
+import threading
+import time
+
+LOADING = 'loading'
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class ModelLoader:
+    def __init__(self, advisor, max_attempts=5, backoff_seconds=2.0, max_backoff_seconds=60.0, warmup_query=None):
+        """Load the advisor's model on a background thread and track its readiness
+
+        The state moves loading -> warming -> ready. A failed load is
+        retried with exponential backoff; after `max_attempts` failures
+        (0 retries forever) the state becomes failed. `warmup_query`, when
+        set, is generated once before the model is reported ready. A failed
+        warmup only costs the first request its latency, so the loaded
+        model is still reported ready, with the error in `last_error`.
+        """
+        self.advisor = advisor
+        self.max_attempts = int(max_attempts)
+        self.backoff_seconds = float(backoff_seconds)
+        self.max_backoff_seconds = float(max_backoff_seconds)
+        self.warmup_query = warmup_query
+
+        self._lock = threading.Lock()
+        self._state = LOADING
+        self._attempts = 0
+        self._last_error = None
+        self._started_at = None
+        self._load_seconds = None
+        self._warmup_seconds = None
+        self._thread = None
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def start(self):
+        """Start loading in the background (no-op if already started)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name='model-loader', daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        """Block until loading has finished (ready or failed); returns True when ready"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def status(self):
+        """Snapshot of the loader state for health checks"""
+        with self._lock:
+            return {
+                'state': self._state,
+                'attempts': self._attempts,
+                'last_error': self._last_error,
+                'load_seconds': self._load_seconds,
+                'warmup_seconds': self._warmup_seconds,
+                'uptime_seconds': round(time.time() - self._started_at, 1) if self._started_at else None
+            }
+
+    def _set(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, f'_{name}', value)
+
+    def _run(self):
+        delay = self.backoff_seconds
+
+        while True:
+            with self._lock:
+                self._attempts += 1
+                attempt = self._attempts
+                self._state = LOADING
+
+            try:
+                started = time.perf_counter()
+                self.advisor.load_model()
+                self._set(load_seconds=round(time.perf_counter() - started, 2), state=WARMING, last_error=None)
+
+            except Exception as e:
+                print(f"❌ Error loading AI (attempt {attempt}): {e}")
+                self._set(last_error=str(e))
+
+                if self.max_attempts and attempt >= self.max_attempts:
+                    self._set(state=FAILED)
+                    return
+
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff_seconds)
+                continue
+
+            # The model is loaded and published; a warmup failure must not reload it
+            if self.warmup_query:
+                try:
+                    started = time.perf_counter()
+                    self.advisor.warmup(self.warmup_query)
+                    self._set(warmup_seconds=round(time.perf_counter() - started, 2))
+                except Exception as e:
+                    print(f"⚠️ AI warmup failed, serving without it: {e}")
+                    self._set(last_error=f"Warmup failed: {e}")
+
+            self._set(state=READY)
+            print(f"🚀 AI model ready after {attempt} attempt(s)")
+            return
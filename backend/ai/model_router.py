@@ -0,0 +1,229 @@
+import math
+import re
+import threading
+import time
+
+from ai.keyword_matcher import KeywordMatcher
+from ai.metrics import registry
+
+LARGE = 'large'
+SMALL = 'small'
+FALLBACK = 'fallback'
+TIERS = (LARGE, SMALL, FALLBACK)
+
+# Signals that a question needs real planning rather than a stock answer
+COMPLEXITY_KEYWORDS = KeywordMatcher({
+    'planning': [
+        ('plan', 'plans', 'planning'),
+        ('invest', 'investing', 'investment', 'investments'),
+        ('retire', 'retirement', 'retiring'),
+        ('mortgage', 'mortgages'),
+        'portfolio',
+        ('strategy', 'strategies'),
+        ('compare', 'comparing', 'versus', 'vs'),
+        ('allocate', 'allocation'),
+        ('loan', 'loans', 'debt', 'debts'),
+        ('tax', 'taxes'),
+        ('afford', 'affordable'),
+        ('timeline', 'years', 'months'),
+        'how much',
+        'how long',
+        'should i'
+    ]
+})
+
+# Question categories for the small model's prompt and the fallback tier, in priority order
+CONTEXT_KEYWORDS = KeywordMatcher({
+    'budget_advice': [('budget', 'budgets', 'budgeting'), ('expense', 'expenses'), ('spend', 'spending')],
+    'goal_setting': [('goal', 'goals'), ('target', 'targets'), ('milestone', 'milestones')],
+    'savings_plan': [('save', 'saving', 'savings'), 'emergency fund']
+})
+
+ROUTER_DECISIONS = registry.counter(
+    'loopfund_router_decisions_total', 'Advice requests by model tier and routing reason', ('tier', 'reason'))
+ROUTER_TIER_SECONDS = registry.histogram(
+    'loopfund_router_tier_duration_seconds', 'Advice latency by model tier', ('tier',))
+
+
+def query_complexity(user_query, user_profile=None, history=None):
+    """Score 0-1 of how much reasoning a question needs
+
+    Longer questions, planning vocabulary, concrete numbers and
+    follow-ups in a conversation all push the score up.
+    """
+    words = len(user_query.split())
+    score = 0.4 * min(1.0, words / 40)
+    score += 0.4 * min(1.0, COMPLEXITY_KEYWORDS.count(user_query)['planning'] / 3)
+    score += min(0.3, 0.15 * len(re.findall(r'\d+(?:[.,]\d+)?', user_query)))
+    if history:
+        # Follow-ups lean on earlier turns only the large model sees
+        score += 0.15
+    if user_profile:
+        score += 0.05
+    return round(min(1.0, score), 3)
+
+
+def context_type(user_query):
+    """Advice category for a question ('general' when nothing matches)"""
+    counts = CONTEXT_KEYWORDS.count(user_query)
+    matched = [category for category in CONTEXT_KEYWORDS.categories if counts[category]]
+    return matched[0] if matched else 'general'
+
+
+class ModelRouter:
+    def __init__(self, large_advisor, large_loader, small_advisor, small_loader,
+                 large_threshold=0.45, faq_threshold=0.15, faq_match_threshold=0.3, latency_slo_ms=15000, enabled=True):
+        """Send each advice request to the cheapest model tier that can answer it
+
+        Tiers are the large advisor (Mistral-7B), the small advisor
+        (DistilGPT-2) and the small advisor's retrieval fallback (answers
+        from the curated advice corpus, see ai.retrieval_advisor). Questions
+        scoring at least `large_threshold` (see query_complexity) go to the
+        large model, ones below `faq_threshold` to the fallback, and the
+        rest to the small model, unless the corpus has an answer with
+        similarity of at least `faq_match_threshold`; such common questions
+        are answered from the corpus in well under a millisecond. A tier that isn't loaded, or whose
+        expected latency with the current queue would miss the request's
+        latency SLO, hands the request down to the next tier.
+
+        With `enabled=False` every request is sent to the large model.
+        """
+        self.large_advisor = large_advisor
+        self.large_loader = large_loader
+        self.small_advisor = small_advisor
+        self.small_loader = small_loader
+        self.large_threshold = float(large_threshold)
+        self.faq_threshold = float(faq_threshold)
+        self.faq_match_threshold = float(faq_match_threshold)
+        self.latency_slo = float(latency_slo_ms) / 1000.0
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._in_flight = dict.fromkeys(TIERS, 0)
+        self._average_seconds = dict.fromkeys(TIERS)
+        self._decisions = dict.fromkeys(TIERS, 0)
+        self._reasons = {}
+
+    def available(self, tier):
+        if tier == LARGE:
+            return bool(self.large_advisor) and self.large_loader.ready
+        if tier == SMALL:
+            return self.small_loader.ready
+        return True
+
+    def expected_seconds(self, tier):
+        """Expected latency of a new request on `tier` given the requests already running there"""
+        with self._lock:
+            average = self._average_seconds[tier]
+            in_flight = self._in_flight[tier]
+        if average is None:
+            return 0.0
+        if tier == LARGE and self.large_advisor.batcher:
+            # Requests share padded batches, so the queue drains a batch at a time
+            return average * math.ceil((in_flight + 1) / self.large_advisor.batcher.max_batch_size)
+        return average * (in_flight + 1)
+
+    def route(self, user_query, user_profile=None, history=None, latency_slo_ms=None):
+        """Pick a tier; returns {'tier', 'reason', 'complexity', 'retrieval_score', 'context_type'}"""
+        complexity = query_complexity(user_query, user_profile, history)
+        slo = self.latency_slo if latency_slo_ms is None else float(latency_slo_ms) / 1000.0
+        retrieval_score = None
+
+        if not self.enabled:
+            wanted, reason = LARGE, 'routing_disabled'
+        elif complexity >= self.large_threshold:
+            wanted, reason = LARGE, 'complex'
+        elif complexity < self.faq_threshold:
+            wanted, reason = FALLBACK, 'faq'
+        else:
+            wanted, reason = SMALL, 'simple'
+            # A question the corpus already answers well doesn't need a model
+            retrieval_score = round(self.small_advisor.retrieval_advisor.best_score(user_query), 4)
+            if retrieval_score >= self.faq_match_threshold:
+                wanted, reason = FALLBACK, 'faq_match'
+
+        # Hand down until a tier can take the request; the reason records the first hand-down
+        tier = wanted
+        for candidate in (TIERS[TIERS.index(wanted):] if self.enabled else ()):
+            tier = candidate
+            if candidate == FALLBACK:
+                break
+            if not self.available(candidate):
+                reason = reason if candidate != wanted else f'{candidate}_unavailable'
+                continue
+            if self.expected_seconds(candidate) > slo:
+                reason = reason if candidate != wanted else f'{candidate}_over_slo'
+                continue
+            break
+
+        with self._lock:
+            self._decisions[tier] += 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+        ROUTER_DECISIONS.inc(tier=tier, reason=reason)
+
+        return {
+            'tier': tier,
+            'reason': reason,
+            'complexity': complexity,
+            'retrieval_score': retrieval_score,
+            'context_type': context_type(user_query)
+        }
+
+    def generate(self, decision, user_query, user_profile=None, history=None, cancelled=None):
+        """Answer on the decided tier and return the advice text (`cancelled` as for getAdvice)"""
+        tier = decision['tier']
+        self._start(tier)
+        started = time.perf_counter()
+        try:
+            if tier == LARGE:
+                return self.large_advisor.get_financial_advice(user_query, user_profile, history, cancelled)
+            if tier == SMALL:
+                return self.small_advisor.get_financial_advice(user_query, user_profile or {}, decision['context_type'])['advice']
+            return self.small_advisor._get_fallback_advice(user_query, decision['context_type'])['advice']
+        finally:
+            self._finish(tier, time.perf_counter() - started)
+
+    def stream(self, decision, user_query, user_profile=None, history=None):
+        """Yield advice chunks on the decided tier; only the large model streams token by token"""
+        if decision['tier'] != LARGE:
+            yield self.generate(decision, user_query, user_profile, history)
+            return
+
+        self._start(LARGE)
+        started = time.perf_counter()
+        try:
+            yield from self.large_advisor.streamAdvice(user_query, user_profile, history)
+        finally:
+            self._finish(LARGE, time.perf_counter() - started)
+
+    def stats(self):
+        """Decisions per tier and reason, tier shares and latency estimates"""
+        with self._lock:
+            total = sum(self._decisions.values())
+            return {
+                'decisions': dict(self._decisions),
+                'share': {tier: round(count / total, 3) if total else 0 for tier, count in self._decisions.items()},
+                'reasons': dict(self._reasons),
+                'in_flight': dict(self._in_flight),
+                'average_seconds': {
+                    tier: round(average, 3) if average is not None else None
+                    for tier, average in self._average_seconds.items()
+                },
+                'large_threshold': self.large_threshold,
+                'faq_threshold': self.faq_threshold,
+                'faq_match_threshold': self.faq_match_threshold,
+                'latency_slo_ms': self.latency_slo * 1000,
+                'enabled': self.enabled
+            }
+
+    def _start(self, tier):
+        with self._lock:
+            self._in_flight[tier] += 1
+
+    def _finish(self, tier, elapsed):
+        with self._lock:
+            self._in_flight[tier] -= 1
+            average = self._average_seconds[tier]
+            # Exponential moving average keeps the estimate current under changing load
+            self._average_seconds[tier] = elapsed if average is None else 0.8 * average + 0.2 * elapsed
+        ROUTER_TIER_SECONDS.observe(elapsed, tier=tier)
@@ -0,0 +1,333 @@
+import glob
+import json
+import mmap
+import os
+import resource
+import shutil
+import struct
+import time
+
+import torch
+import transformers
+
+from ai.inference_backends import load_backend, quantize_int8
+
+# Written by scripts/snapshot_model.py next to the snapshot files
+MANIFEST = 'snapshot.json'
+ARTIFACTS_DIR = 'artifacts'
+ARTIFACT_MANIFEST = 'artifact.json'
+
+# Backends whose weights are mapped straight from disk; the others are handed to load_backend
+MMAP_DTYPES = {'torch-fp32': torch.float32}
+
+# Module quantize_int8 puts in place of every nn.Linear
+QUANTIZED_LINEAR = torch.ao.nn.quantized.dynamic.Linear
+INT8_ARTIFACT = 'model.safetensors'
+
+SAFETENSORS_DTYPES = {
+    'F64': torch.float64,
+    'F32': torch.float32,
+    'F16': torch.float16,
+    'BF16': torch.bfloat16,
+    'I64': torch.int64,
+    'I32': torch.int32,
+    'I16': torch.int16,
+    'I8': torch.int8,
+    'U8': torch.uint8,
+    'BOOL': torch.bool
+}
+
+
+class SnapshotNotFoundError(FileNotFoundError):
+    """The model has no complete pinned snapshot in the model store"""
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far (ru_maxrss is KiB on Linux)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _read_header(f):
+    header_length = struct.unpack('<Q', f.read(8))[0]
+    header = json.loads(f.read(header_length))
+    header.pop('__metadata__', None)
+    return header, 8 + header_length
+
+
+def safetensors_dtypes(path):
+    """Tensor dtypes stored in a .safetensors file, read from its header only"""
+    with open(path, 'rb') as f:
+        header, _ = _read_header(f)
+    return {SAFETENSORS_DTYPES[spec['dtype']] for spec in header.values()}
+
+
+def mmap_safetensors(path):
+    """Map a .safetensors file and return {name: tensor} backed by its pages
+
+    Pages are mapped copy-on-write: nothing is read until a tensor is
+    used, the page cache is shared with every other process mapping the
+    file, and an in-place write only copies the touched page.
+    """
+    with open(path, 'rb') as f:
+        header, data_start = _read_header(f)
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    tensors = {}
+    for name, spec in header.items():
+        dtype = SAFETENSORS_DTYPES[spec['dtype']]
+        start, end = spec['data_offsets']
+        count = (end - start) // torch.empty((), dtype=dtype).element_size()
+        tensor = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + start) if count else torch.empty(0, dtype=dtype)
+        tensors[name] = tensor.reshape(spec['shape'])
+    return tensors
+
+
+def _set_tensor(model, name, tensor):
+    module_name, _, attribute = name.rpartition('.')
+    module = model.get_submodule(module_name) if module_name else model
+    if attribute in module._parameters:
+        module._parameters[attribute] = torch.nn.Parameter(tensor, requires_grad=False)
+    elif attribute in module._buffers:
+        module._buffers[attribute] = tensor
+    else:
+        return False
+    return True
+
+
+def int8_tensors(model):
+    """{name: tensor} of a quantize_int8 model for a .safetensors file
+
+    Every quantized Linear is stored as its int8 weight values with the
+    weight's scale and zero point, plus its float bias; all other
+    parameters are stored as they are.
+    """
+    tensors = {}
+    for name, module in model.named_modules():
+        if isinstance(module, QUANTIZED_LINEAR):
+            weight = module.weight()
+            tensors[f"{name}.weight"] = weight.int_repr()
+            tensors[f"{name}.weight_scale"] = torch.tensor(weight.q_scale(), dtype=torch.float64)
+            tensors[f"{name}.weight_zero_point"] = torch.tensor(weight.q_zero_point(), dtype=torch.int64)
+            if module.bias() is not None:
+                tensors[f"{name}.bias"] = module.bias().detach()
+    for name, parameter in model.named_parameters():
+        tensors[name] = parameter.detach().contiguous()
+    return tensors
+
+
+class ModelStore:
+    def __init__(self, root, persist_artifacts=True):
+        """Load models only from pinned local snapshots under `root`, never from the hub
+
+        A snapshot is a directory `<root>/<org>--<name>` holding config,
+        tokenizer and .safetensors files plus a snapshot.json manifest
+        (see scripts/snapshot_model.py). For torch-fp32 the weights are
+        memory-mapped rather than read into fresh allocations. torch-int8
+        maps the tensors it keeps in float (embeddings, norms); its int8
+        Linear weights are repacked into each process's own memory by the
+        quantized kernels, so only forked workers share them.
+
+        Weights in another dtype than the backend needs (e.g. bf16 for
+        torch-fp32), and the int8-quantized model, are converted once.
+        With `persist_artifacts` the result is saved under
+        `<snapshot>/artifacts/<backend>` so later starts skip conversion.
+        """
+        self.root = root
+        self.persist_artifacts = persist_artifacts
+
+    def snapshot_dir(self, model_name):
+        return os.path.join(self.root, model_name.replace('/', '--'))
+
+    def resolve(self, model_name):
+        """Return (snapshot directory, manifest), checking every pinned file is present at its pinned size"""
+        path = self.snapshot_dir(model_name)
+        try:
+            with open(os.path.join(path, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise SnapshotNotFoundError(f"No snapshot of {model_name} in {self.root} (create it with scripts/snapshot_model.py)")
+
+        for name, entry in manifest['files'].items():
+            file_path = os.path.join(path, name)
+            if not os.path.exists(file_path) or os.path.getsize(file_path) != entry['size']:
+                raise SnapshotNotFoundError(f"Snapshot of {model_name} is incomplete: {name} is missing or has the wrong size")
+        return path, manifest
+
+    def load(self, model_name, backend, onnx_dir=None):
+        """Return (model, tokenizer, load stats) for `model_name` from its snapshot"""
+        started = time.perf_counter()
+        path, manifest = self.resolve(model_name)
+        tokenizer = transformers.AutoTokenizer.from_pretrained(path, local_files_only=True)
+
+        source = 'snapshot'
+        if backend == 'torch-int8':
+            model, source = self._load_int8(path, manifest)
+        elif backend in MMAP_DTYPES:
+            model, source = self._load_mmap(path, manifest, backend)
+        else:
+            # GPU, bitsandbytes and ONNX backends place weights themselves; only resolution is local
+            model, _ = load_backend(backend, path, onnx_dir=onnx_dir)
+
+        if hasattr(model, 'eval'):
+            model.eval()
+        stats = {
+            'model': model_name,
+            'revision': manifest.get('revision'),
+            'backend': backend,
+            'source': source,
+            'load_seconds': round(time.perf_counter() - started, 2),
+            'peak_rss_mb': peak_rss_mb()
+        }
+        return model, tokenizer, stats
+
+    def _artifact_dir(self, path, backend):
+        return os.path.join(path, ARTIFACTS_DIR, backend)
+
+    def _artifact_key(self, manifest, backend):
+        # An artifact is stale once the snapshot or the libraries that wrote it change
+        return {
+            'revision': manifest.get('revision'),
+            'backend': backend,
+            'torch': torch.__version__,
+            'transformers': transformers.__version__
+        }
+
+    def _artifact(self, path, manifest, backend):
+        """Directory of a current artifact for `backend`, or None"""
+        directory = self._artifact_dir(path, backend)
+        try:
+            with open(os.path.join(directory, ARTIFACT_MANIFEST)) as f:
+                key = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return directory if key == self._artifact_key(manifest, backend) else None
+
+    def _save_artifact(self, path, manifest, backend, write):
+        """Write an artifact with `write(directory)` into a temporary directory, then swap it in
+
+        Returns the artifact directory, or None when it can't be written
+        (e.g. a read-only image); the caller then keeps the in-memory result.
+        """
+        directory = self._artifact_dir(path, backend)
+        staging = f"{directory}.tmp-{os.getpid()}"
+        try:
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            write(staging)
+            with open(os.path.join(staging, ARTIFACT_MANIFEST), 'w') as f:
+                json.dump(self._artifact_key(manifest, backend), f, indent=2)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(staging, directory)
+        except OSError as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            print(f"⚠️ Could not save {backend} artifact, converting again on the next start: {e}")
+            return None
+        print(f"💾 Saved {backend} artifact to {directory}")
+        return directory
+
+    def _build_from_files(self, path, files, dtype):
+        """Instantiate the model without allocating weights, then point every parameter at mapped tensors"""
+        from accelerate import init_empty_weights
+
+        config = transformers.AutoConfig.from_pretrained(path, local_files_only=True)
+        with init_empty_weights(include_buffers=False):
+            model = transformers.AutoModelForCausalLM.from_config(config, torch_dtype=dtype)
+
+        for file_path in files:
+            for name, tensor in mmap_safetensors(file_path).items():
+                if tensor.dtype != dtype and tensor.is_floating_point():
+                    tensor = tensor.to(dtype)
+                _set_tensor(model, name, tensor)
+
+        model.tie_weights()
+        if os.path.exists(os.path.join(path, 'generation_config.json')):
+            model.generation_config = transformers.GenerationConfig.from_pretrained(path, local_files_only=True)
+        missing = [name for name, parameter in model.named_parameters() if parameter.device.type == 'meta']
+        if missing:
+            raise ValueError(f"Snapshot at {path} has no weights for {', '.join(missing[:5])}")
+        return model
+
+    def _load_mmap(self, path, manifest, backend):
+        dtype = MMAP_DTYPES[backend]
+        files = sorted(glob.glob(os.path.join(path, '*.safetensors')))
+        if not files:
+            raise SnapshotNotFoundError(f"Snapshot at {path} has no .safetensors weights")
+
+        stored = set().union(*(safetensors_dtypes(file_path) for file_path in files))
+        if all(stored_dtype == dtype for stored_dtype in stored if stored_dtype.is_floating_point):
+            return self._build_from_files(path, files, dtype), 'snapshot'
+
+        artifact = self._artifact(path, manifest, backend)
+        if artifact:
+            return self._build_from_files(path, sorted(glob.glob(os.path.join(artifact, '*.safetensors'))), dtype), 'artifact'
+
+        if not self.persist_artifacts:
+            # Converted tensors are private copies, so this start gets no sharing or laziness
+            return self._build_from_files(path, files, dtype), 'converted'
+
+        from safetensors.torch import save_file
+
+        def write(directory):
+            # One output file per input shard keeps peak memory at a single shard
+            for file_path in files:
+                tensors = {
+                    name: (tensor.to(dtype) if tensor.is_floating_point() else tensor).contiguous()
+                    for name, tensor in mmap_safetensors(file_path).items()
+                }
+                save_file(tensors, os.path.join(directory, os.path.basename(file_path)), metadata={'format': 'pt'})
+                del tensors
+
+        artifact = self._save_artifact(path, manifest, backend, write)
+        # Map the written artifact so this start already gets shared, lazily loaded pages
+        files = sorted(glob.glob(os.path.join(artifact, '*.safetensors'))) if artifact else files
+        return self._build_from_files(path, files, dtype), 'converted'
+
+    def _load_int8(self, path, manifest):
+        artifact = self._artifact(path, manifest, 'torch-int8')
+        # Artifacts from before the safetensors format hold a pickled model.pt and are rebuilt
+        if artifact and os.path.exists(os.path.join(artifact, INT8_ARTIFACT)):
+            return self._build_int8(path, os.path.join(artifact, INT8_ARTIFACT)), 'artifact'
+
+        model, _ = self._load_mmap(path, manifest, 'torch-fp32')
+        model = quantize_int8(model)
+        if self.persist_artifacts:
+            from safetensors.torch import save_file
+
+            self._save_artifact(
+                path, manifest, 'torch-int8',
+                lambda directory: save_file(int8_tensors(model), os.path.join(directory, INT8_ARTIFACT), metadata={'format': 'pt'})
+            )
+        return model, 'converted'
+
+    def _build_int8(self, path, file_path):
+        """Rebuild a quantize_int8 model from an int8 artifact without unpickling anything"""
+        from accelerate import init_empty_weights
+
+        config = transformers.AutoConfig.from_pretrained(path, local_files_only=True)
+        with init_empty_weights(include_buffers=False):
+            model = transformers.AutoModelForCausalLM.from_config(config, torch_dtype=torch.float32)
+
+        tensors = mmap_safetensors(file_path)
+        for name, module in list(model.named_modules()):
+            if f"{name}.weight_scale" not in tensors:
+                continue
+            weight = torch._make_per_tensor_quantized_tensor(
+                tensors.pop(f"{name}.weight"),
+                float(tensors.pop(f"{name}.weight_scale")),
+                int(tensors.pop(f"{name}.weight_zero_point"))
+            )
+            linear = QUANTIZED_LINEAR(module.in_features, module.out_features, dtype=torch.qint8)
+            # Packing copies the weight into the kernel's layout, in this process's memory
+            linear.set_weight_bias(weight, tensors.pop(f"{name}.bias", None))
+            parent, _, attribute = name.rpartition('.')
+            setattr(model.get_submodule(parent) if parent else model, attribute, linear)
+
+        for name, tensor in tensors.items():
+            _set_tensor(model, name, tensor)
+
+        if os.path.exists(os.path.join(path, 'generation_config.json')):
+            model.generation_config = transformers.GenerationConfig.from_pretrained(path, local_files_only=True)
+        missing = [name for name, parameter in model.named_parameters() if parameter.device.type == 'meta']
+        if missing:
+            raise ValueError(f"int8 artifact {file_path} has no weights for {', '.join(missing[:5])}")
+        return model
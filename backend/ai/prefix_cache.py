@@ -0,0 +1,64 @@
+import copy
+
+import torch
+
+from ai.prompt_builder import pad_batch
+
+
+class PrefixCache:
+    def __init__(self, model, tokenizer, prefix_ids):
+        """Precompute the attention key/value state of a static prompt prefix
+
+        Every prompt whose token ids start with `prefix_ids` is encoded as
+        the cached prefix followed by its own suffix, so generate only has
+        to prefill the suffix tokens.
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prefix = list(prefix_ids)
+
+        self.prefix_ids = torch.tensor([self.prefix], dtype=torch.long, device=model.device)
+        with torch.no_grad():
+            self.past_key_values = model(self.prefix_ids, use_cache=True).past_key_values
+
+    @property
+    def prefix_length(self):
+        return self.prefix_ids.shape[1]
+
+    def build_inputs(self, prompts):
+        """Return generate() kwargs for a batch of prompt token id lists
+
+        Suffixes are left-padded after the shared prefix; the attention mask
+        hides the padding and position ids follow the unpadded tokens.
+        Prompts that don't start with the prefix are encoded in full.
+        """
+        length = len(self.prefix)
+        if not all(list(ids[:length]) == self.prefix and len(ids) > length for ids in prompts):
+            return pad_batch(prompts, self.tokenizer.pad_token_id, self.model.device)
+
+        encoded = pad_batch([ids[length:] for ids in prompts], self.tokenizer.pad_token_id, self.model.device)
+
+        batch_size = len(prompts)
+        prefix_ids = self.prefix_ids.expand(batch_size, -1)
+        prefix_mask = torch.ones_like(prefix_ids)
+
+        return {
+            'input_ids': torch.cat([prefix_ids, encoded['input_ids']], dim=-1),
+            'attention_mask': torch.cat([prefix_mask, encoded['attention_mask']], dim=-1),
+            'past_key_values': self._past_for_batch(batch_size)
+        }
+
+    def _past_for_batch(self, batch_size):
+        past = self.past_key_values
+        if hasattr(past, 'get_seq_length'):
+            # Cache objects are updated in place by generate, so each call needs its own copy
+            past = copy.deepcopy(past)
+            if batch_size > 1:
+                past.batch_repeat_interleave(batch_size)
+            return past
+
+        # Legacy tuples are never mutated; expanding shares the prefix tensors
+        return tuple(
+            tuple(tensor.expand(batch_size, *tensor.shape[1:]) for tensor in layer)
+            for layer in past
+        )
@@ -0,0 +1,265 @@
+import contextvars
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from ai.metrics import registry
+
+# Functions kept in a profile's JSON summary; the full stats are in its .prof file
+TOP_FUNCTIONS = 40
+
+PROFILE_ID = re.compile(r'^\d+-\d+-[a-z0-9_]+$')
+
+PROFILES_CAPTURED = registry.counter(
+    'loopfund_profiles_captured_total', 'Requests profiled, by what triggered it (header or sampled)', ('reason',))
+
+# The profiles the current request (or the batch being generated for it) records spans into
+_current = contextvars.ContextVar('loopfund_profiles', default=())
+_NO_SPAN = nullcontext()
+
+
+def span(name):
+    """Context manager timing a named stage into the profiles of the current request
+
+    Without a profiled request this is a context-variable lookup that
+    returns a shared no-op context manager.
+    """
+    profiles = _current.get()
+    if not profiles:
+        return _NO_SPAN
+    return _Span(name, profiles)
+
+
+def current():
+    """The profiles active in this context (an empty tuple when not profiling)"""
+    return _current.get()
+
+
+@contextmanager
+def attach(profiles):
+    """Record spans in the with-block into `profiles`, e.g. on a worker thread generating for them"""
+    profiles = tuple(profile for profile in profiles if profile)
+    if not profiles:
+        yield
+        return
+    token = _current.set(profiles)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class _Span:
+    __slots__ = ('name', 'profiles', 'started')
+
+    def __init__(self, name, profiles):
+        self.name = name
+        self.profiles = profiles
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        ended = time.perf_counter()
+        thread = threading.current_thread().name
+        for profile in self.profiles:
+            profile.add_span(self.name, self.started, ended, thread)
+
+
+class RequestProfile:
+    def __init__(self, profile_id, route, method, path, reason):
+        """cProfile run and named spans for one request
+
+        cProfile only sees the request's own thread; work done for the
+        request on other threads (the batching thread's tokenization and
+        generation) is covered by spans.
+        """
+        self.id = profile_id
+        self.route = route
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+        self.profiler = cProfile.Profile()
+        try:
+            self.profiler.enable()
+        except (ValueError, RuntimeError):
+            # Another profiler is active on this thread (or, on Python 3.12+, the process); keep the spans
+            self.profiler = None
+
+    def add_span(self, name, started, ended, thread):
+        self.spans.append({
+            'name': name,
+            'start_ms': round((started - self.started) * 1000, 3),
+            'duration_ms': round((ended - started) * 1000, 3),
+            'thread': thread
+        })
+
+    def finish(self, status):
+        """Stop profiling and return the JSON summary"""
+        duration = time.perf_counter() - self.started
+        if self.profiler:
+            self.profiler.disable()
+
+        stages = {}
+        for item in self.spans:
+            stages[item['name']] = round(stages.get(item['name'], 0) + item['duration_ms'], 3)
+
+        return {
+            'id': self.id,
+            'route': self.route,
+            'method': self.method,
+            'path': self.path,
+            'status': status,
+            'reason': self.reason,
+            'pid': os.getpid(),
+            'started_at': round(self.started_at, 3),
+            'duration_ms': round(duration * 1000, 3),
+            'stages_ms': stages,
+            'spans': sorted(self.spans, key=lambda item: item['start_ms']),
+            'top_functions': self._top_functions() if self.profiler else None
+        }
+
+    def _top_functions(self):
+        stats = pstats.Stats(self.profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        return [
+            {
+                'function': f"{os.path.basename(filename)}:{line}({name})" if line else name,
+                'calls': calls,
+                'own_ms': round(own * 1000, 3),
+                'cumulative_ms': round(cumulative * 1000, 3)
+            }
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows
+        ]
+
+
+class RequestProfiler:
+    def __init__(self, directory, max_profiles=50, sample_rate=0.0, token=None, excluded_prefixes=()):
+        """Opt-in request profiling into a bounded on-disk ring buffer
+
+        A request is profiled when it sends the X-Profile-Token header with
+        `token`, or by chance with probability `sample_rate`. Each profile
+        is a JSON summary (spans and the slowest functions by cumulative
+        time) plus a .prof file readable by pstats or snakeviz, both in
+        `directory`. Once more than `max_profiles` are stored, the oldest
+        are deleted, so every worker sharing the directory shares the bound.
+
+        Stored profiles are only readable with the token, so sampling
+        without one stays off. Without a token, the per-request cost is one
+        attribute check.
+        """
+        self.directory = directory
+        self.max_profiles = max(1, int(max_profiles))
+        self.sample_rate = float(sample_rate)
+        self.token = token or None
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        if self.sample_rate > 0 and not self.token:
+            print("⚠️ Profile sampling needs a profiling token to protect stored profiles; sampling disabled")
+            self.sample_rate = 0.0
+        self.enabled = bool(self.token)
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+
+    def authorized(self, headers):
+        """Whether `headers` carry the profiling token"""
+        supplied = headers.get('X-Profile-Token')
+        return bool(self.token and supplied) and hmac.compare_digest(supplied, self.token)
+
+    def start(self, route, method, path, headers):
+        """Return a RequestProfile when this request should be profiled, else None"""
+        if not self.enabled:
+            return None
+        if _current.get():
+            # A profile that finished in another context is still set on this thread
+            _current.set(())
+        if path.startswith(self.excluded_prefixes):
+            return None
+        if self.authorized(headers):
+            reason = 'header'
+        elif self.sample_rate and random.random() < self.sample_rate:
+            reason = 'sampled'
+        else:
+            return None
+
+        slug = re.sub(r'[^a-z0-9]+', '_', (route or 'unmatched').lower()).strip('_') or 'root'
+        profile = RequestProfile(f"{time.time_ns()}-{os.getpid()}-{slug}", route, method, path, reason)
+        profile.context_token = _current.set((profile,))
+        PROFILES_CAPTURED.inc(reason=reason)
+        return profile
+
+    def finish(self, profile, status):
+        """Write `profile` to the ring buffer and stop recording spans into it"""
+        try:
+            _current.reset(profile.context_token)
+        except ValueError:
+            # Finished from another context (e.g. a streamed body closed elsewhere)
+            _current.set(())
+        summary = profile.finish(status)
+
+        # Write then rename, so listings never see a partial file
+        path = os.path.join(self.directory, profile.id)
+        with open(f"{path}.json.tmp", 'w') as f:
+            json.dump(summary, f)
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+        if profile.profiler:
+            profile.profiler.dump_stats(f"{path}.prof")
+        self._prune()
+        return summary
+
+    def list(self):
+        """Stored profiles, newest first, without their span and function details"""
+        profiles = []
+        for profile_id in self._ids():
+            summary = self.get(profile_id)
+            if summary:
+                profiles.append({key: summary[key] for key in (
+                    'id', 'route', 'method', 'path', 'status', 'reason', 'pid', 'started_at', 'duration_ms', 'stages_ms'
+                )})
+        return profiles
+
+    def get(self, profile_id):
+        """The JSON summary of a stored profile, or None"""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def stats_path(self, profile_id):
+        """Path of a stored profile's .prof file, or None"""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.prof")
+        return path if os.path.exists(path) else None
+
+    def _ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # Ids start with a nanosecond timestamp, so newest first is a numeric sort
+        ids = {name[:-len('.json')] for name in names if name.endswith('.json')}
+        return sorted(ids, key=lambda profile_id: int(profile_id.split('-', 1)[0]), reverse=True)
+
+    def _prune(self):
+        with self._lock:
+            for profile_id in self._ids()[self.max_profiles:]:
+                for suffix in ('.json', '.prof'):
+                    try:
+                        os.remove(os.path.join(self.directory, profile_id + suffix))
+                    except FileNotFoundError:
+                        # Another worker pruned it first
+                        pass
@@ -0,0 +1,142 @@
+import torch
+
+# Segments cut when a prompt is over budget, first to last
+TRUNCATION_ORDER = ('profile', 'history', 'knowledge')
+
+# Every segment after the first starts on a new line. Segments are encoded
+# behind this anchor, whose ids are then dropped: sentencepiece tokenizers
+# start any text they encode with a word boundary ("▁"), which mid-prompt
+# would decode as a stray space.
+SEGMENT_ANCHOR = "\n"
+
+
+class PromptTooLongError(ValueError):
+    """The instructions and the question alone exceed the prompt budget"""
+
+
+def pad_batch(prompts, pad_token_id, device):
+    """Left-pad token id lists into input_ids / attention_mask tensors"""
+    width = max(len(ids) for ids in prompts)
+    input_ids = [[pad_token_id] * (width - len(ids)) + list(ids) for ids in prompts]
+    attention_mask = [[0] * (width - len(ids)) + [1] * len(ids) for ids in prompts]
+    return {
+        'input_ids': torch.tensor(input_ids, dtype=torch.long, device=device),
+        'attention_mask': torch.tensor(attention_mask, dtype=torch.long, device=device)
+    }
+
+
+class PromptBuilder:
+    def __init__(self, tokenizer, instructions, knowledge=None, max_prompt_tokens=1024, max_knowledge_tokens=256):
+        """Assemble advisor prompts as token ids within a fixed budget
+
+        The static instructions and knowledge base are tokenized once. Per
+        request only the profile, the conversation history and the
+        question are encoded. When the prompt is over `max_prompt_tokens`,
+        the profile is cut first (keeping its start), then the history
+        (keeping the most recent part), then the knowledge base. The
+        instructions and the question are never cut.
+
+        With `knowledge=None` the knowledge section is assembled per
+        request from the retrieved passages passed to build(): whole
+        passages in rank order, up to `max_knowledge_tokens`, and only the
+        instructions form the static prefix.
+        """
+        self.tokenizer = tokenizer
+        self.max_prompt_tokens = int(max_prompt_tokens)
+        self.max_knowledge_tokens = int(max_knowledge_tokens)
+
+        # Same ids as PrefixCache, so untruncated prompts reuse its key/value state
+        self.instruction_ids = tokenizer.encode(instructions)
+        self.anchor_ids = tokenizer.encode(SEGMENT_ANCHOR, add_special_tokens=False)
+        if knowledge is None:
+            self.prefix_ids = list(self.instruction_ids)
+            self.knowledge_ids = []
+        else:
+            self.prefix_ids = tokenizer.encode(f"{instructions}\n\n{knowledge}")
+            self.knowledge_ids = self._encode(f"\n\n{knowledge}")
+        self.knowledge_header_ids = self._encode("\n\nFinancial Knowledge Base:")
+
+    def _encode(self, text):
+        """Ids of a segment as they appear mid-prompt, without a leading word boundary"""
+        if not text:
+            return []
+        ids = self.tokenizer.encode(SEGMENT_ANCHOR + text, add_special_tokens=False)
+        if ids[:len(self.anchor_ids)] == self.anchor_ids:
+            return ids[len(self.anchor_ids):]
+        # The anchor merged into the segment's first token (byte-level BPE), which adds no boundary
+        return self.tokenizer.encode(text, add_special_tokens=False)
+
+    def build(self, user_query, profile_context='', history='', passages=None):
+        """Return (token ids, {segment: tokens cut}) for one prompt
+
+        `passages` are retrieved knowledge texts, best first; None uses the
+        static knowledge base.
+        """
+        question_ids = self._encode(f"\n\nUser Question: {user_query}\n\nLoopFund AI Response:")
+        segments = {
+            'profile': self._encode(f"\n\n{profile_context.strip()}") if profile_context else [],
+            'history': self._encode(f"\n\n{history.strip()}") if history else []
+        }
+
+        available = self.max_prompt_tokens - len(self.instruction_ids) - len(question_ids)
+        if available < 0:
+            raise PromptTooLongError(
+                f'Question needs {len(self.instruction_ids) + len(question_ids)} tokens, '
+                f'budget is {self.max_prompt_tokens}'
+            )
+
+        # Hand out the budget in reverse truncation order: knowledge, history, profile
+        if passages is None:
+            knowledge_length = len(self.prefix_ids) - len(self.instruction_ids)
+            keep = {'knowledge': min(knowledge_length, available)}
+            truncated_knowledge = knowledge_length - keep['knowledge']
+            if truncated_knowledge:
+                ids = self.instruction_ids + self.knowledge_ids[:max(0, keep['knowledge'])]
+            else:
+                ids = list(self.prefix_ids)
+        else:
+            knowledge_ids, truncated_knowledge = self._pack_passages(passages, available)
+            keep = {'knowledge': len(knowledge_ids)}
+            ids = self.instruction_ids + knowledge_ids
+        available -= keep['knowledge']
+        for segment in ('history', 'profile'):
+            keep[segment] = min(len(segments[segment]), available)
+            available -= keep[segment]
+
+        truncated = {
+            'profile': len(segments['profile']) - keep['profile'],
+            'history': len(segments['history']) - keep['history'],
+            'knowledge': truncated_knowledge
+        }
+
+        ids += segments['profile'][:keep['profile']]
+        # The most recent turns matter most, so history keeps its end
+        ids += segments['history'][len(segments['history']) - keep['history']:]
+        ids += question_ids
+
+        return ids, {segment: tokens for segment, tokens in truncated.items() if tokens > 0}
+
+    def _pack_passages(self, passages, available):
+        """Knowledge section ids for the passages that fit, and the tokens the prompt budget cut
+
+        Passages are taken whole, best first, skipping any that would
+        overflow the budget. Passages left out only by
+        `max_knowledge_tokens` are a selection choice, not truncation.
+        """
+        encoded = [self._encode(f"\n- {' '.join(text.split())}") for text in passages]
+
+        def pack(budget):
+            chosen = []
+            used = len(self.knowledge_header_ids)
+            for passage_ids in encoded:
+                if used + len(passage_ids) <= budget:
+                    chosen.append(passage_ids)
+                    used += len(passage_ids)
+            return chosen
+
+        chosen = pack(min(self.max_knowledge_tokens, available))
+        wanted = pack(self.max_knowledge_tokens) if available < self.max_knowledge_tokens else chosen
+        truncated = sum(map(len, wanted)) - sum(map(len, chosen))
+        if not chosen:
+            return [], truncated
+        return self.knowledge_header_ids + [token for passage_ids in chosen for token in passage_ids], truncated
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Profile fields that FinancialAdvisor._build_context_prompt renders into the prompt
+PROFILE_FIELDS = ('income', 'age', 'current_savings', 'goals', 'risk_tolerance')
+
+# The SQLite tier is counted and trimmed once per this share of db_max_entries inserts
+DB_TRIM_FRACTION = 0.01
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, ttl_seconds=3600, db_path=None, db_max_entries=100000, namespace=''):
+        """Two-tier cache for generated advice: in-memory LRU in front of an optional SQLite file
+
+        Entries older than `ttl_seconds` are treated as misses in both tiers.
+        `namespace` is mixed into every key so a model or generation-settings
+        change never serves answers produced under the old configuration.
+
+        The SQLite file is trimmed back to `db_max_entries` every 1% of that
+        many inserts, so it can overshoot by that much per process sharing it.
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.db_max_entries = int(db_max_entries)
+        self.namespace = namespace
+        self._db_trim_interval = max(1, int(self.db_max_entries * DB_TRIM_FRACTION))
+        self._db_inserts = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'disk_evictions': 0,
+            'expired': 0
+        }
+
+        self.db_path = db_path
+        self._db = None
+        if db_path:
+            self._open_db()
+
+    def _open_db(self):
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+        self._db.commit()
+
+    def after_fork(self):
+        """Open a fresh SQLite connection in a forked worker; connections must not cross fork"""
+        self._lock = threading.Lock()
+        if self.db_path:
+            self._open_db()
+
+    def make_key(self, user_query, user_profile=None, history=None):
+        """Key on the normalized query, the profile fields that reach the prompt and the conversation history"""
+        query = ' '.join(str(user_query).lower().split())
+        profile = None
+        if user_profile:
+            profile = {field: str(user_profile.get(field, 'Not specified')) for field in PROFILE_FIELDS}
+
+        payload = json.dumps([self.namespace, query, profile] + ([history] if history else []), sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached text for `key`, or None on a miss"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats['hits'] += 1
+                    self._stats['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+                self._stats['expired'] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at <= self.ttl:
+                        # Promote to the memory tier
+                        self._remember(key, value, created_at)
+                        self._stats['hits'] += 1
+                        self._stats['disk_hits'] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._stats['expired'] += 1
+
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        """Store `value` in both tiers"""
+        created_at = time.time()
+
+        with self._lock:
+            self._remember(key, value, created_at)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, created_at)
+                )
+                # Counting the table is a full scan, so it is only done every _db_trim_interval inserts
+                self._db_inserts += 1
+                if self._db_inserts >= self._db_trim_interval:
+                    self._db_inserts = 0
+                    self._trim_db()
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            if self._db is not None:
+                stats['disk_entries'] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0
+        return stats
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _trim_db(self):
+        count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        excess = count - self.db_max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY created_at LIMIT ?)",
+                (excess,)
+            )
+            self._stats['disk_evictions'] += excess
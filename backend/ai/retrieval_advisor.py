@@ -0,0 +1,150 @@
+import json
+import os
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ai.metrics import registry
+
+# Curated answers shipped with the backend; ADVICE_CORPUS_FILE points at another file
+DEFAULT_CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'advice_corpus.jsonl')
+
+# Paraphrased questions describe what an entry answers better than its answer text does
+QUESTION_WEIGHT = 2
+
+RETRIEVAL_SECONDS = registry.histogram(
+    'loopfund_retrieval_duration_seconds', 'Time to score a question against the advice corpus')
+
+
+def load_corpus(path=None):
+    """Read advice entries from JSONL: {"id", "category", "questions": [...], "answer"} per line"""
+    path = path or DEFAULT_CORPUS_PATH
+    entries = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if not entry.get('answer') or not entry.get('questions'):
+                raise ValueError(f"Advice corpus line {line_number}: answer and questions are required")
+            entry.setdefault('id', str(line_number))
+            entry.setdefault('category', 'general')
+            entries.append(entry)
+    if not entries:
+        raise ValueError(f"Advice corpus {path} is empty")
+    return entries
+
+
+class RetrievalAdvisor:
+    def __init__(self, corpus_path=None, min_score=0.15):
+        """Answer questions from a curated advice corpus by TF-IDF similarity, without a model
+
+        The TF-IDF index (scikit-learn's TfidfVectorizer over each entry's
+        questions and answer, word unigrams and bigrams, sublinear tf) is
+        built once at startup. A query is scored as the cosine similarity
+        of its TF-IDF vector with every entry, computed from the fitted
+        vocabulary and idf weights directly, which keeps a lookup well
+        under a millisecond.
+
+        Matches scoring below `min_score` are not considered relevant.
+        """
+        started = time.perf_counter()
+        self.corpus_path = corpus_path or DEFAULT_CORPUS_PATH
+        self.entries = load_corpus(self.corpus_path)
+        self.min_score = float(min_score)
+
+        self.vectorizer = TfidfVectorizer(sublinear_tf=True, ngram_range=(1, 2))
+        matrix = self.vectorizer.fit_transform([
+            ' '.join(entry['questions'] * QUESTION_WEIGHT) + ' ' + entry['answer'] for entry in self.entries
+        ])
+        # Term-major rows so a query only touches the rows of its own terms
+        self.term_matrix = matrix.T.tocsr()
+        self.vocabulary = self.vectorizer.vocabulary_
+        self.idf = self.vectorizer.idf_
+        self.analyzer = self.vectorizer.build_analyzer()
+        # The smoothed idf of a term that appears in no entry
+        self.unknown_idf = np.log((1 + len(self.entries)) / 1) + 1
+        self.categories = np.array([entry['category'] for entry in self.entries])
+
+        self.build_seconds = round(time.perf_counter() - started, 4)
+        print(f"✅ Retrieval advisor indexed {len(self.entries)} answers ({len(self.vocabulary)} terms)")
+
+    def scores(self, query):
+        """Cosine similarity of `query` with every corpus entry"""
+        with RETRIEVAL_SECONDS.time():
+            counts = {}
+            unknown = {}
+            for term in self.analyzer(query):
+                index = self.vocabulary.get(term)
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+                else:
+                    unknown[term] = unknown.get(term, 0) + 1
+            if not counts:
+                return np.zeros(len(self.entries))
+
+            terms = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            weights = (1 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))) * self.idf[terms]
+            # Terms the corpus never uses still count toward the query's length, so a
+            # question that only shares filler words ("what is the ...") scores low
+            unknown_weights = (1 + np.log(np.fromiter(unknown.values(), dtype=np.float64, count=len(unknown)))) * self.unknown_idf
+            norm = np.sqrt(np.dot(weights, weights) + np.dot(unknown_weights, unknown_weights))
+            return self.term_matrix[terms].T.dot(weights / norm)
+
+    def search(self, query, k=3, category=None):
+        """Best `k` matches above min_score as [{'id', 'category', 'question', 'answer', 'score'}], best first"""
+        scores = self.scores(query)
+        if category is not None:
+            scores = np.where(self.categories == category, scores, 0.0)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k else np.zeros(0, dtype=np.int64)
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [self._match(index, scores[index]) for index in top if scores[index] >= self.min_score]
+
+    def best_score(self, query):
+        return float(self.scores(query).max())
+
+    def answer(self, query, context_type='general', k=3):
+        """Advice for `query` in the small advisor's response format, with the matches and their scores
+
+        Without a relevant match, the first entry of the `context_type`
+        category (or 'general') is used, so the answer is stable for a
+        given question.
+        """
+        matches = self.search(query, k)
+        if matches:
+            best = matches[0]
+        else:
+            in_category = np.nonzero(self.categories == context_type)[0]
+            if not len(in_category):
+                in_category = np.nonzero(self.categories == 'general')[0]
+            best = self._match(in_category[0] if len(in_category) else 0, 0.0)
+
+        return {
+            'advice': best['answer'],
+            'confidence': best['score'],
+            'context_used': context_type,
+            'matches': matches,
+            'note': 'Retrieved from the advice library (AI model not used)'
+        }
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'terms': len(self.vocabulary),
+            'build_seconds': self.build_seconds,
+            'min_score': self.min_score,
+            'corpus': self.corpus_path
+        }
+
+    def _match(self, index, score):
+        entry = self.entries[index]
+        return {
+            'id': entry['id'],
+            'category': entry['category'],
+            'question': entry['questions'][0],
+            'answer': entry['answer'],
+            'score': round(float(score), 4)
+        }
@@ -2,6 +2,38 @@ import json
 import re
 from datetime import datetime, timedelta
 
+import numpy as np
+
+# Insight texts by code; predict_batch returns the codes, predictGoalCompletion the texts
+TIMELINE_INSIGHTS = [
+    ["🎯 Your goal is very achievable within a year!", "💡 Consider increasing monthly savings to reach it even faster"],
+    ["📅 Your goal is achievable within 2 years", "💪 Stay consistent with your savings plan"],
+    ["⏰ Your goal will take 2-3 years to achieve", "🔄 Consider if this timeline works for your needs"],
+    ["📊 This is a long-term goal", "💡 Consider breaking it into smaller, shorter-term goals"]
+]
+SAVINGS_RATE_INSIGHTS = [
+    "🌟 You're saving at an excellent rate!",
+    "👍 You're saving at a good rate",
+    "💡 Consider ways to increase your monthly savings"
+]
+
+# predict_batch status codes
+STATUS_OK = 0
+STATUS_NEGATIVE_CASHFLOW = 1
+STATUS_GOAL_REACHED = 2
+STATUS_ERROR = 3
+
+BATCH_FIELDS = ('goal_amount', 'current_savings', 'monthly_income', 'monthly_expenses', 'monthly_savings')
+
+NEGATIVE_CASHFLOW_MESSAGE = "Your monthly expenses exceed your income. Focus on reducing expenses first."
+GOAL_REACHED_MESSAGE = "Congratulations! You've already reached your goal!"
+SUCCESS_MESSAGE = "Savings prediction generated successfully"
+
+# Completion dates this close to midnight are recomputed with timedelta, whose rounding differs slightly
+_DAY_EDGE_US = 1000
+# Beyond this the scalar path overflows datetime; those rows are delegated to it
+_MAX_DAYS = 2900000
+
 class SavingsPredictor:
     def __init__(self):
         """Initialize the AI Savings Predictor"""
@@ -24,7 +56,7 @@ class SavingsPredictor:
             if monthly_savings <= 0:
                 return {
                     "success": False,
-                    "message": "Your monthly expenses exceed your income. Focus on reducing expenses first.",
+                    "message": NEGATIVE_CASHFLOW_MESSAGE,
                     "prediction": None
                 }
             
@@ -34,7 +66,7 @@ class SavingsPredictor:
             if remaining_amount <= 0:
                 return {
                     "success": True,
-                    "message": "Congratulations! You've already reached your goal!",
+                    "message": GOAL_REACHED_MESSAGE,
                     "prediction": {
                         "months_to_goal": 0,
                         "expected_completion_date": datetime.now().strftime("%Y-%m-%d"),
@@ -57,7 +89,7 @@ class SavingsPredictor:
             
             return {
                 "success": True,
-                "message": "Savings prediction generated successfully",
+                "message": SUCCESS_MESSAGE,
                 "prediction": {
                     "months_to_goal": round(months_to_goal, 1),
                     "expected_completion_date": completion_date.strftime("%Y-%m-%d"),
@@ -80,25 +112,177 @@ class SavingsPredictor:
         insights = []
         
         if months_to_goal <= 12:
-            insights.append("🎯 Your goal is very achievable within a year!")
-            insights.append("💡 Consider increasing monthly savings to reach it even faster")
+            insights.extend(TIMELINE_INSIGHTS[0])
         elif months_to_goal <= 24:
-            insights.append("📅 Your goal is achievable within 2 years")
-            insights.append("💪 Stay consistent with your savings plan")
+            insights.extend(TIMELINE_INSIGHTS[1])
         elif months_to_goal <= 36:
-            insights.append("⏰ Your goal will take 2-3 years to achieve")
-            insights.append("🔄 Consider if this timeline works for your needs")
+            insights.extend(TIMELINE_INSIGHTS[2])
         else:
-            insights.append("📊 This is a long-term goal")
-            insights.append("💡 Consider breaking it into smaller, shorter-term goals")
+            insights.extend(TIMELINE_INSIGHTS[3])
         
         # Add savings rate insights
         savings_rate = (monthly_savings / goal_amount) * 100
         if savings_rate >= 20:
-            insights.append("🌟 You're saving at an excellent rate!")
+            insights.append(SAVINGS_RATE_INSIGHTS[0])
         elif savings_rate >= 10:
-            insights.append("👍 You're saving at a good rate")
+            insights.append(SAVINGS_RATE_INSIGHTS[1])
         else:
-            insights.append("💡 Consider ways to increase your monthly savings")
+            insights.append(SAVINGS_RATE_INSIGHTS[2])
         
         return insights
+    
+    def predict_batch(self, data, now=None):
+        """Vectorized predictGoalCompletion over columnar input
+
+        `data` is a DataFrame or a dict of equal-length arrays with the
+        BATCH_FIELDS columns (missing columns count as 0). Returns a dict of
+        NumPy arrays: status codes, the prediction fields, completion dates
+        as datetime64[D] and insight codes indexing TIMELINE_INSIGHTS and
+        SAVINGS_RATE_INSIGHTS. batch_to_records turns it into the exact
+        per-row output of predictGoalCompletion. All rows share one `now`.
+        """
+        now = now or datetime.now()
+        length = self._batch_length(data)
+        columns = {
+            field: np.asarray(data[field], dtype=np.float64) if field in data else np.zeros(length)
+            for field in BATCH_FIELDS
+        }
+        
+        goal_amount = columns['goal_amount']
+        current_savings = columns['current_savings']
+        monthly_savings = np.where(
+            columns['monthly_savings'] <= 0,
+            columns['monthly_income'] - columns['monthly_expenses'],
+            columns['monthly_savings']
+        )
+        remaining_amount = goal_amount - current_savings
+        
+        negative_cashflow = monthly_savings <= 0
+        goal_reached = ~negative_cashflow & (remaining_amount <= 0)
+        predicted = ~negative_cashflow & ~goal_reached
+        
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            months_to_goal = np.where(predicted, remaining_amount / monthly_savings, 0.0)
+            days = months_to_goal * 30
+            savings_rate = (monthly_savings / goal_amount) * 100
+        
+        # Rows where the scalar path raises (NaN/inf, date overflow, zero goal) are delegated to it
+        irregular = predicted & (~np.isfinite(days) | (np.abs(days) > _MAX_DAYS) | (goal_amount == 0))
+        predicted &= ~irregular
+        
+        now_us = np.datetime64(now, 'us')
+        offsets = np.rint(np.where(predicted, days, 0.0) * 86400e6).astype(np.int64)
+        completion = now_us + offsets.astype('timedelta64[us]')
+        completion_date = completion.astype('datetime64[D]')
+        
+        time_of_day = (completion - completion_date).astype(np.int64)
+        near_midnight = predicted & ((time_of_day < _DAY_EDGE_US) | (time_of_day > 86400000000 - _DAY_EDGE_US))
+        for index in np.flatnonzero(near_midnight):
+            exact = now + timedelta(days=float(days[index]))
+            completion_date[index] = np.datetime64(exact.date(), 'D')
+        
+        status = np.full(length, STATUS_OK, dtype=np.int8)
+        status[negative_cashflow] = STATUS_NEGATIVE_CASHFLOW
+        status[goal_reached] = STATUS_GOAL_REACHED
+        
+        result = {
+            'status': status,
+            'success': predicted | goal_reached,
+            'months_to_goal': np.where(predicted, _round_exact(months_to_goal, 1), 0.0),
+            'expected_completion_date': np.where(
+                predicted | goal_reached,
+                np.where(goal_reached, np.datetime64(now.date(), 'D'), completion_date),
+                np.datetime64('NaT', 'D')
+            ),
+            'monthly_savings_needed': np.where(predicted, _round_exact(monthly_savings, 2), 0.0),
+            'total_savings_needed': np.where(predicted, _round_exact(remaining_amount, 2), np.nan),
+            'is_achievable': goal_reached | (predicted & (months_to_goal <= 60)),
+            'timeline_insight': np.where(
+                predicted,
+                np.select([months_to_goal <= 12, months_to_goal <= 24, months_to_goal <= 36], [0, 1, 2], 3),
+                -1
+            ).astype(np.int8),
+            'savings_rate_insight': np.where(
+                predicted,
+                np.select([savings_rate >= 20, savings_rate >= 10], [0, 1], 2),
+                -1
+            ).astype(np.int8),
+            'messages': {}
+        }
+        
+        for index in np.flatnonzero(irregular):
+            row = {field: float(columns[field][index]) for field in BATCH_FIELDS}
+            self._merge_scalar_row(result, index, self.predictGoalCompletion(row))
+        
+        return result
+    
+    def batch_to_records(self, result):
+        """Expand a predict_batch result into predictGoalCompletion-shaped dicts"""
+        records = []
+        
+        for index, status in enumerate(result['status'].tolist()):
+            if index in result['messages']:
+                records.append(result['messages'][index])
+            elif status == STATUS_NEGATIVE_CASHFLOW:
+                records.append({"success": False, "message": NEGATIVE_CASHFLOW_MESSAGE, "prediction": None})
+            elif status == STATUS_GOAL_REACHED:
+                records.append({
+                    "success": True,
+                    "message": GOAL_REACHED_MESSAGE,
+                    "prediction": {
+                        "months_to_goal": 0,
+                        "expected_completion_date": str(result['expected_completion_date'][index]),
+                        "monthly_savings_needed": 0,
+                        "is_achievable": True
+                    }
+                })
+            else:
+                records.append({
+                    "success": True,
+                    "message": SUCCESS_MESSAGE,
+                    "prediction": {
+                        "months_to_goal": float(result['months_to_goal'][index]),
+                        "expected_completion_date": str(result['expected_completion_date'][index]),
+                        "monthly_savings_needed": float(result['monthly_savings_needed'][index]),
+                        "total_savings_needed": float(result['total_savings_needed'][index]),
+                        "is_achievable": bool(result['is_achievable'][index]),
+                        "insights": TIMELINE_INSIGHTS[result['timeline_insight'][index]]
+                            + [SAVINGS_RATE_INSIGHTS[result['savings_rate_insight'][index]]]
+                    }
+                })
+        
+        return records
+    
+    def _batch_length(self, data):
+        for field in BATCH_FIELDS:
+            if field in data:
+                return len(data[field])
+        return 0
+    
+    def _merge_scalar_row(self, result, index, record):
+        """Store a row computed by the scalar path; its full output is kept in `messages`"""
+        result['status'][index] = STATUS_OK if record['success'] else STATUS_ERROR
+        result['success'][index] = record['success']
+        result['messages'][index] = record
+        
+        prediction = record.get('prediction')
+        if prediction:
+            result['months_to_goal'][index] = prediction['months_to_goal']
+            result['expected_completion_date'][index] = np.datetime64(prediction['expected_completion_date'], 'D')
+            result['monthly_savings_needed'][index] = prediction['monthly_savings_needed']
+            result['total_savings_needed'][index] = prediction.get('total_savings_needed', np.nan)
+            result['is_achievable'][index] = prediction['is_achievable']
+
+
+def _round_exact(values, digits):
+    """np.round, with values on a rounding tie recomputed by Python's correctly rounded round()"""
+    rounded = np.round(values, digits)
+    
+    # np.round scales by 10**digits first; that product can land on the wrong side of .5
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = values * 10.0 ** digits
+        ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for index in ties:
+        rounded[index] = round(float(values[index]), digits)
+    
+    return rounded
@@ -0,0 +1,235 @@
+from datetime import datetime
+
+import numpy as np
+
+# Goal inputs; same columns as SavingsPredictor.predict_batch plus the deadline
+PROJECTION_FIELDS = ('goal_amount', 'current_savings', 'monthly_income', 'monthly_expenses', 'monthly_savings', 'timeline_months')
+
+# Completion-month percentiles reported per goal
+PERCENTILES = (10, 50, 90)
+
+# Assumptions that requests may override, with their allowed ranges
+ASSUMPTION_LIMITS = {
+    'paths': (100, 20000),
+    'income_volatility': (0.0, 1.0),
+    'expense_volatility': (0.0, 1.0),
+    'shock_probability': (0.0, 1.0),
+    'shock_size': (0.0, 24.0),
+    'annual_return': (-0.5, 0.5),
+    'return_volatility': (0.0, 1.0),
+    'max_months': (12, 1200)
+}
+
+# Goal-path cells simulated at once; bounds memory to a few arrays of this many floats
+_CHUNK_CELLS = 1 << 20
+
+# A goal past its deadline stops being simulated once the chance that any
+# remaining path still reaches it within max_months is below this bound
+_UNREACHABLE_PROBABILITY = 1e-3
+
+
+class SavingsProjector:
+    def __init__(self, paths=2000, income_volatility=0.05, expense_volatility=0.08, shock_probability=0.03,
+                 shock_size=1.0, annual_return=0.03, return_volatility=0.02, max_months=600):
+        """Monte Carlo projection of savings goals under uncertain cash flow and returns
+
+        Every goal is simulated along `paths` monthly paths, as NumPy arrays
+        of goals x paths stepped one month at a time:
+
+        - income and expenses deviate from their stated values by normal
+          noise with relative sd `income_volatility` / `expense_volatility`;
+        - each month an expense shock (car repair, medical bill) occurs with
+          probability `shock_probability` and costs on average `shock_size`
+          months of expenses (exponentially distributed);
+        - the balance earns a normal monthly return with annual mean
+          `annual_return` and annual sd `return_volatility`.
+
+        The planned contribution is `monthly_savings`, or all free cash flow
+        (income - expenses) when that is 0, as in SavingsPredictor. Cash-flow
+        surprises are absorbed by the contribution, and the balance never
+        goes below 0. Paths stop at `max_months`.
+
+        A goal stops being simulated once its deadline has passed and every
+        path has reached it, or the remaining paths drift away from it so
+        surely that the chance any of them reaches it is below
+        _UNREACHABLE_PROBABILITY (see _unreachable).
+        """
+        self.paths = int(paths)
+        self.income_volatility = float(income_volatility)
+        self.expense_volatility = float(expense_volatility)
+        self.shock_probability = float(shock_probability)
+        self.shock_size = float(shock_size)
+        self.annual_return = float(annual_return)
+        self.return_volatility = float(return_volatility)
+        self.max_months = int(max_months)
+
+    def with_assumptions(self, overrides):
+        """Copy of this projector with `overrides` (validated against ASSUMPTION_LIMITS) applied"""
+        settings = {name: getattr(self, name) for name in ASSUMPTION_LIMITS}
+        for name, value in (overrides or {}).items():
+            if name not in ASSUMPTION_LIMITS:
+                raise ValueError(f"Unknown assumption '{name}'")
+            low, high = ASSUMPTION_LIMITS[name]
+            value = float(value)
+            if not low <= value <= high:
+                raise ValueError(f"{name} must be between {low} and {high}")
+            settings[name] = value
+        return SavingsProjector(**settings)
+
+    def simulate(self, data, seed=None):
+        """Vectorized projection of a batch of goals from columnar input
+
+        `data` is a dict of equal-length arrays with the PROJECTION_FIELDS
+        columns (missing columns count as 0; timeline_months defaults to 12).
+        Returns a dict of NumPy arrays: `probability_on_time` (share of
+        paths reaching the goal within timeline_months),
+        `probability_reached` (within max_months), `completion_months`
+        (goals x PERCENTILES, NaN where that share of paths never reaches the
+        goal) and `balance_at_deadline` (goals x PERCENTILES).
+        """
+        length = len(next(iter(data.values()))) if data else 0
+        columns = {
+            field: np.asarray(data[field], dtype=np.float64) if field in data else np.zeros(length)
+            for field in PROJECTION_FIELDS
+        }
+        if 'timeline_months' not in data:
+            columns['timeline_months'] = np.full(length, 12.0)
+
+        rng = np.random.default_rng(seed)
+        result = {
+            'probability_on_time': np.zeros(length),
+            'probability_reached': np.zeros(length),
+            'completion_months': np.full((length, len(PERCENTILES)), np.nan),
+            'balance_at_deadline': np.zeros((length, len(PERCENTILES)))
+        }
+
+        chunk = max(1, _CHUNK_CELLS // self.paths)
+        for start in range(0, length, chunk):
+            rows = slice(start, min(length, start + chunk))
+            self._simulate_chunk({field: values[rows] for field, values in columns.items()}, rng, result, rows)
+        return result
+
+    def project(self, goal, seed=None, now=None):
+        """Projection of one goal as a JSON-ready dict with percentile completion dates"""
+        now = now or datetime.now()
+        result = self.simulate({field: [goal.get(field, 0)] for field in PROJECTION_FIELDS if field in goal}, seed=seed)
+        dates = completion_dates(result['completion_months'], now)[0]
+        months = result['completion_months'][0]
+
+        return {
+            'probability_on_time': round(float(result['probability_on_time'][0]), 4),
+            'probability_reached': round(float(result['probability_reached'][0]), 4),
+            'completion_months': {
+                f'p{percentile}': None if np.isnan(value) else int(value)
+                for percentile, value in zip(PERCENTILES, months)
+            },
+            'completion_dates': {
+                f'p{percentile}': None if np.isnat(date) else str(date)
+                for percentile, date in zip(PERCENTILES, dates)
+            },
+            'balance_at_deadline': {
+                f'p{percentile}': round(float(value), 2)
+                for percentile, value in zip(PERCENTILES, result['balance_at_deadline'][0])
+            },
+            'assumptions': {name: getattr(self, name) for name in ASSUMPTION_LIMITS}
+        }
+
+    def _simulate_chunk(self, columns, rng, result, rows):
+        goals = len(columns['goal_amount'])
+        shape = (goals, self.paths)
+
+        planned = np.where(columns['monthly_savings'] > 0, columns['monthly_savings'], columns['monthly_income'] - columns['monthly_expenses'])
+        # Income and expense noise are independent normals, so their sum is one normal
+        noise_sd = np.hypot(columns['monthly_income'] * self.income_volatility, columns['monthly_expenses'] * self.expense_volatility)
+        goal_state = {
+            'index': np.arange(goals),
+            'planned': planned[:, None],
+            'noise_sd': noise_sd[:, None],
+            'shock_cost': (columns['monthly_expenses'] * self.shock_size)[:, None],
+            'goal': columns['goal_amount'][:, None],
+            'deadline': np.clip(np.rint(columns['timeline_months']), 0, self.max_months)[:, None]
+        }
+
+        balance = np.broadcast_to(columns['current_savings'][:, None], shape).copy()
+        # Month each path first reaches the goal; max_months + 1 means never
+        completed = np.where(balance >= goal_state['goal'], 0, self.max_months + 1).astype(np.int32)
+        at_deadline = np.where(goal_state['deadline'] == 0, balance, 0.0)
+
+        monthly_mean = self.annual_return / 12
+        monthly_sd = self.return_volatility / np.sqrt(12)
+        for month in range(1, self.max_months + 1):
+            shape = balance.shape
+            contribution = goal_state['noise_sd'] * rng.standard_normal(shape, dtype=np.float32)
+            contribution += goal_state['planned']
+            if self.shock_probability:
+                # Few cells see a shock, so only those draw a cost
+                rows_hit, paths_hit = np.nonzero(rng.random(shape, dtype=np.float32) < self.shock_probability)
+                contribution[rows_hit, paths_hit] -= goal_state['shock_cost'][rows_hit, 0] * rng.exponential(1.0, len(rows_hit))
+
+            if monthly_sd:
+                balance *= 1 + (monthly_mean + monthly_sd * rng.standard_normal(shape, dtype=np.float32))
+            elif monthly_mean:
+                balance *= 1 + monthly_mean
+            balance += contribution
+            np.maximum(balance, 0, out=balance)
+
+            newly_completed = (completed > month) & (balance >= goal_state['goal'])
+            completed[newly_completed] = month
+            on_deadline = (goal_state['deadline'] == month)[:, 0]
+            at_deadline[on_deadline] = balance[on_deadline]
+
+            # Past its deadline, a goal is settled once all its paths reached it or the rest can't; drop it from the arrays
+            settled = month >= goal_state['deadline'][:, 0]
+            if settled.any():
+                unfinished = completed > month
+                settled &= ~unfinished.any(axis=1) | self._unreachable(goal_state, balance, unfinished, month)
+            if settled.any():
+                self._store(result, rows, goal_state['index'][settled], completed[settled], at_deadline[settled], goal_state['deadline'][settled])
+                keep = ~settled
+                if not keep.any():
+                    return
+                goal_state = {name: values[keep] for name, values in goal_state.items()}
+                balance, completed, at_deadline = balance[keep], completed[keep], at_deadline[keep]
+
+        self._store(result, rows, goal_state['index'], completed, at_deadline, goal_state['deadline'])
+
+    def _unreachable(self, goal_state, balance, unfinished, month):
+        """Per goal, whether its unfinished paths reach the goal by max_months with probability below _UNREACHABLE_PROBABILITY
+
+        A path's monthly change is at most normal with mean mu (the planned
+        contribution plus the expected return on a balance at the goal) and
+        variance sigma^2 (contribution noise plus return noise at the goal);
+        shocks only lower it. With mu < 0, Lundberg's inequality bounds the
+        chance of climbing `gap` by exp(-2 |mu| gap / sigma^2). The floor
+        at 0 restarts a path at most once a month, hence the factor of
+        paths x remaining months.
+        """
+        goal = goal_state['goal'][:, 0]
+        mu = goal_state['planned'][:, 0] + goal * max(self.annual_return / 12, 0.0)
+        variance = goal_state['noise_sd'][:, 0] ** 2 + (goal * self.return_volatility / np.sqrt(12)) ** 2
+        gap = goal - np.where(unfinished, balance, 0.0).max(axis=1)
+        attempts = unfinished.sum(axis=1) * (self.max_months - month + 1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_bound = np.log(np.maximum(attempts, 1)) - 2 * -mu * gap / variance
+        # Without any noise a path with mu < 0 never climbs
+        log_bound = np.where(variance > 0, log_bound, -np.inf)
+        return (mu < 0) & (log_bound < np.log(_UNREACHABLE_PROBABILITY))
+
+    def _store(self, result, rows, index, completed, at_deadline, deadline):
+        """Write the summary of finished goals (chunk-relative `index`) into `result`"""
+        target = np.arange(rows.start, rows.stop)[index]
+        result['probability_on_time'][target] = (completed <= deadline).mean(axis=1)
+        result['probability_reached'][target] = (completed <= self.max_months).mean(axis=1)
+        # Unreached paths sort last, so a percentile that falls among them is unknown
+        months = np.percentile(completed, PERCENTILES, axis=1, method='higher').T.astype(np.float64)
+        months[months > self.max_months] = np.nan
+        result['completion_months'][target] = months
+        result['balance_at_deadline'][target] = np.percentile(at_deadline, PERCENTILES, axis=1).T
+
+
+def completion_dates(completion_months, now=None):
+    """Dates for completion months, with a month counted as 30 days like SavingsPredictor (NaT where unknown)"""
+    now = np.datetime64((now or datetime.now()).date(), 'D')
+    days = np.where(np.isnan(completion_months), 0, completion_months * 30).astype(np.int64)
+    return np.where(np.isnan(completion_months), np.datetime64('NaT', 'D'), now + days.astype('timedelta64[D]'))
@@ -0,0 +1,143 @@
+import threading
+from concurrent.futures import CancelledError, Future, TimeoutError
+
+from ai.metrics import registry
+
+COALESCED_REQUESTS = registry.counter(
+    'loopfund_coalesced_requests_total', 'Advice requests that joined an identical in-flight generation')
+COALESCE_CANCELLATIONS = registry.counter(
+    'loopfund_coalesce_cancellations_total',
+    'Cancellations: a waiter that left (waiter) or a shared generation dropped before it ran (call)', ('scope',))
+
+
+class _Call:
+    """One in-flight generation and the futures waiting for it"""
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = set()
+
+
+class SingleFlight:
+    def __init__(self):
+        """Share one in-flight generation between concurrent requests with the same key
+
+        submit() starts the work for a key only when nothing with that key
+        is in flight; later callers join the running call and get the same
+        result or exception. Every caller gets its own future, so one
+        caller cancelling (e.g. its client disconnected) doesn't affect the
+        others. When the last waiter of a call cancels, the shared work is
+        cancelled too if it hasn't started running.
+        """
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {
+            'requests': 0,
+            'calls': 0,
+            'coalesced': 0,
+            'cancelled_waiters': 0,
+            'cancelled_calls': 0,
+            'errors': 0
+        }
+
+    def submit(self, key, start):
+        """Return (future, joined) for `key`
+
+        `start()` must return a concurrent.futures.Future for the work; it
+        is only called when no call for `key` is in flight. `joined` is True
+        when the future shares an existing call.
+        """
+        waiter = Future()
+        with self._lock:
+            self._stats['requests'] += 1
+            call = self._calls.get(key)
+            joined = call is not None
+            if joined:
+                self._stats['coalesced'] += 1
+            else:
+                call = _Call(start())
+                self._calls[key] = call
+                self._stats['calls'] += 1
+            call.waiters.add(waiter)
+
+        if joined:
+            COALESCED_REQUESTS.inc()
+        else:
+            call.future.add_done_callback(lambda future: self._finish(key, call))
+        waiter.add_done_callback(lambda future: self._leave(key, call, future))
+        return waiter, joined
+
+    def stats(self):
+        """Request, call and cancellation counters, with the share of requests that were coalesced"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        stats['coalesced_rate'] = round(stats['coalesced'] / stats['requests'], 4) if stats['requests'] else 0
+        return stats
+
+    def _finish(self, key, call):
+        """Hand the shared outcome to every waiter that is still waiting"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            waiters = list(call.waiters)
+            call.waiters.clear()
+            if not call.future.cancelled() and call.future.exception() is not None:
+                self._stats['errors'] += 1
+
+        for waiter in waiters:
+            if not waiter.set_running_or_notify_cancel():
+                continue
+            if call.future.cancelled():
+                waiter.set_exception(CancelledError())
+            elif call.future.exception() is not None:
+                waiter.set_exception(call.future.exception())
+            else:
+                waiter.set_result(call.future.result())
+
+    def _leave(self, key, call, waiter):
+        if not waiter.cancelled():
+            return
+
+        COALESCE_CANCELLATIONS.inc(scope='waiter')
+        with self._lock:
+            self._stats['cancelled_waiters'] += 1
+            call.waiters.discard(waiter)
+            abandoned = not call.waiters and self._calls.get(key) is call
+            if abandoned:
+                # Nobody is waiting any more: later requests start fresh instead of joining
+                del self._calls[key]
+
+        # Only succeeds while the work is still queued; a running batch finishes
+        if abandoned and call.future.cancel():
+            COALESCE_CANCELLATIONS.inc(scope='call')
+            with self._lock:
+                self._stats['cancelled_calls'] += 1
+
+
+def wait_for(future, cancelled=None, timeout=None, poll_seconds=0.25):
+    """Block for `future`'s result, cancelling it as soon as `cancelled()` returns True
+
+    Raises CancelledError after cancelling, and TimeoutError (also
+    cancelling) when `timeout` seconds pass first.
+    """
+    if cancelled is None:
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    waited = 0.0
+    while True:
+        step = poll_seconds if timeout is None else min(poll_seconds, max(0.0, timeout - waited))
+        try:
+            return future.result(step)
+        except TimeoutError:
+            waited += step
+            if cancelled():
+                future.cancel()
+                raise CancelledError()
+            if timeout is not None and waited >= timeout:
+                future.cancel()
+                raise
@@ -0,0 +1,111 @@
+import torch
+from transformers import LogitsProcessor, StoppingCriteria
+
+# Text after any of these is never part of the answer: the start of a new
+# prompt turn, or an end-of-turn marker the tokenizer doesn't treat as special
+DEFAULT_STOP_SEQUENCES = (
+    'User Question:',
+    'LoopFund AI Response:',
+    '[INST]',
+    '</s>',
+    '<|endoftext|>',
+    '<|im_end|>',
+    '<|end|>'
+)
+
+# Extra tokens decoded before the unchecked tail, in case a token decodes to no text
+_WINDOW_MARGIN = 4
+
+
+def truncate_at_stop(text, stop_sequences):
+    """`text` up to the first stop sequence in it"""
+    cut = len(text)
+    for stop in stop_sequences:
+        index = text.find(stop)
+        if index != -1:
+            cut = min(cut, index)
+    return text[:cut]
+
+
+class StopSequences:
+    def __init__(self, tokenizer, stop_sequences, prompt_length, batch_size, eos_token_id=None):
+        """Per-row stop sequence detection for one generate call
+
+        transformers 4.35 stopping criteria stop the whole batch, so rows
+        are stopped in two parts. `stopping_criteria` checks the tokens
+        generated since its last call (decoding a window that overlaps
+        the previous check by the longest stop sequence) and ends
+        generation once every row has hit a stop sequence or EOS.
+        `logits_processor` forces EOS as the next token of a row that
+        stopped while others continue. generate then pads that row like
+        one that ended naturally. Stop sequences are decoded text, so they
+        match however the tokenizer splits them.
+
+        Only the criteria inspect tokens. The processor also sees
+        assisted-generation candidates that may be rejected, so it only
+        reads the criteria's state.
+
+        `cancel()` ends the whole generate call at the next step, e.g. when
+        the client of a streamed answer is gone.
+        """
+        self.tokenizer = tokenizer
+        self.stop_sequences = tuple(stop for stop in stop_sequences if stop)
+        self.prompt_length = prompt_length
+        self.eos_token_id = tokenizer.eos_token_id if eos_token_id is None else eos_token_id
+        # A token decodes to at least one character, so this many tokens cover any stop sequence
+        self.window = max((len(stop) for stop in self.stop_sequences), default=0) + _WINDOW_MARGIN
+        self.stopped = [False] * batch_size
+        self.finished = [False] * batch_size
+        self.cancelled = False
+        self._checked_length = prompt_length
+
+        self.stopping_criteria = _StopCriteria(self)
+        self.logits_processor = _ForceEos(self)
+
+    def check(self, input_ids):
+        """Mark rows whose new tokens contain a stop sequence or EOS; True once every row is done"""
+        if self.cancelled:
+            return True
+        length = input_ids.shape[1]
+        if length <= self._checked_length or not self.stop_sequences:
+            return all(self.stopped[row] or self.finished[row] for row in range(len(self.stopped)))
+
+        start = max(self.prompt_length, self._checked_length - self.window)
+        tail = input_ids[:, start:].tolist()
+        for row, tokens in enumerate(tail):
+            if self.stopped[row] or self.finished[row]:
+                continue
+            if self.eos_token_id in tokens[self._checked_length - start:]:
+                self.finished[row] = True
+                continue
+            text = self.tokenizer.decode(tokens, skip_special_tokens=True)
+            if any(stop in text for stop in self.stop_sequences):
+                self.stopped[row] = True
+        self._checked_length = length
+
+        return all(self.stopped[row] or self.finished[row] for row in range(len(self.stopped)))
+
+    def cancel(self):
+        """Stop generating every row at the next step"""
+        self.cancelled = True
+
+
+class _StopCriteria(StoppingCriteria):
+    def __init__(self, stops):
+        self.stops = stops
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.stops.check(input_ids)
+
+
+class _ForceEos(LogitsProcessor):
+    def __init__(self, stops):
+        self.stops = stops
+
+    def __call__(self, input_ids, scores):
+        rows = [row for row, stopped in enumerate(self.stops.stopped) if stopped]
+        if rows:
+            rows = torch.tensor(rows, device=scores.device)
+            scores[rows] = float('-inf')
+            scores[rows, self.stops.eos_token_id] = 0.0
+        return scores
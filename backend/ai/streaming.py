@@ -0,0 +1,147 @@
+import json
+import re
+
+_TRAILING = re.compile(r'[.\s]*$')
+
+
+class _ArtifactFilter:
+    def __init__(self, opener, closer):
+        """Incremental equivalent of re.sub(opener + '.*?' + closer, '', text)"""
+        self.opener = opener
+        self.closer = closer
+        self._pending = ''
+
+    def feed(self, text, final=False):
+        """Return the filtered text that can no longer change"""
+        out = []
+        text = self._pending + text
+
+        while text:
+            start = text.find(self.opener)
+            if start == -1:
+                # The tail might be the first half of a multi-character opener
+                keep = 0 if final else self._partial_opener(text)
+                out.append(text[:len(text) - keep])
+                text = text[len(text) - keep:]
+                break
+
+            out.append(text[:start])
+            rest = text[start + len(self.opener):]
+            end = rest.find(self.closer)
+            newline = rest.find('\n')
+
+            if end != -1 and (newline == -1 or end < newline):
+                # Complete artifact on one line: drop it
+                text = rest[end + len(self.closer):]
+            elif newline != -1 or final:
+                # The pattern doesn't span lines, so this opener is literal text
+                out.append(self.opener)
+                text = rest
+            else:
+                # Wait for the closer
+                text = text[start:]
+                break
+
+        self._pending = text
+        return ''.join(out)
+
+    def _partial_opener(self, text):
+        for size in range(len(self.opener) - 1, 0, -1):
+            if text.endswith(self.opener[:size]):
+                return size
+        return 0
+
+
+class _StopFilter:
+    def __init__(self, stop_sequences):
+        """Incremental equivalent of ai.stopping.truncate_at_stop"""
+        self.stop_sequences = tuple(stop for stop in stop_sequences if stop)
+        self.stopped = False
+        self._pending = ''
+
+    def feed(self, text, final=False):
+        """Return the text before the first stop sequence that can no longer change"""
+        if self.stopped:
+            return ''
+        text = self._pending + text
+
+        cut = min((index for index in (text.find(stop) for stop in self.stop_sequences) if index != -1), default=-1)
+        if cut != -1:
+            self.stopped = True
+            self._pending = ''
+            return text[:cut]
+
+        # The tail might be the start of a stop sequence
+        keep = 0 if final else max((self._partial(text, stop) for stop in self.stop_sequences), default=0)
+        self._pending = text[len(text) - keep:]
+        return text[:len(text) - keep]
+
+    @staticmethod
+    def _partial(text, stop):
+        for size in range(len(stop) - 1, 0, -1):
+            if text.endswith(stop[:size]):
+                return size
+        return 0
+
+
+class StreamingCleaner:
+    def __init__(self, stop_sequences=()):
+        """Apply FinancialAdvisor._clean_response rules incrementally to streamed text
+
+        Text is released as soon as it can no longer change: an artifact
+        opener is held until its closer (or a newline) arrives, and trailing
+        dots/whitespace are held until more text follows them.
+
+        Text from the first of `stop_sequences` on is dropped, as the
+        advisor does for batched answers; a possible start of one is held
+        until it can be ruled out.
+        """
+        # Cut at stop sequences first, then the same order as the re.sub calls in _clean_response
+        self._filters = [_StopFilter(stop_sequences), _ArtifactFilter('<|', '|>'), _ArtifactFilter('[', ']')]
+        self._held = ''
+        self._started = False
+
+    def feed(self, text):
+        """Add newly generated text and return the part that is safe to send"""
+        for artifact_filter in self._filters:
+            text = artifact_filter.feed(text)
+        return self._release(text)
+
+    def finish(self):
+        """Flush everything once generation has ended"""
+        text = ''
+        for artifact_filter in self._filters:
+            text = artifact_filter.feed(text, final=True)
+        cleaned = self._held + text
+        self._held = ''
+
+        # Same ending rule as _clean_response
+        if cleaned.endswith('...') or cleaned.endswith('..'):
+            cleaned = cleaned[:-2]
+        cleaned = cleaned.rstrip()
+
+        if not self._started:
+            cleaned = cleaned.lstrip()
+        return cleaned
+
+    def _release(self, settled):
+        text = self._held + settled
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ''
+
+        # Hold trailing dots/whitespace so the ending rule can still apply
+        tail = _TRAILING.search(text).start()
+        self._held = text[tail:]
+        text = text[:tail]
+
+        if text:
+            self._started = True
+        return text
+
+
+def sse_event(data, event=None):
+    """Format a Server-Sent Events message with a JSON payload"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
@@ -0,0 +1,74 @@
+import os
+
+# smaps_rollup fields reported per process, in kB
+SMAPS_FIELDS = {
+    'Rss': 'rss_mb',
+    'Pss': 'pss_mb',
+    'Shared_Clean': 'shared_clean_mb',
+    'Shared_Dirty': 'shared_dirty_mb',
+    'Private_Clean': 'private_clean_mb',
+    'Private_Dirty': 'private_dirty_mb',
+    'Swap': 'swap_mb'
+}
+
+
+def process_memory(pid='self'):
+    """Resident memory of one process split into shared and private pages (Linux only)
+
+    PSS divides every shared page between the processes mapping it, so
+    summing PSS over a master and its workers gives their real footprint,
+    whereas summing RSS counts shared model weights once per worker.
+    """
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            field = parts[0].rstrip(':')
+            if field in SMAPS_FIELDS:
+                values[SMAPS_FIELDS[field]] = round(int(parts[1]) / 1024, 1)
+
+    values['shared_mb'] = round(values.get('shared_clean_mb', 0) + values.get('shared_dirty_mb', 0), 1)
+    values['private_mb'] = round(values.get('private_clean_mb', 0) + values.get('private_dirty_mb', 0), 1)
+    return values
+
+
+def child_pids(pid):
+    """Direct children of `pid`, from /proc/<pid>/task/*/children"""
+    children = []
+    task_dir = f'/proc/{pid}/task'
+    for task in os.listdir(task_dir):
+        try:
+            with open(os.path.join(task_dir, task, 'children')) as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return sorted(set(children))
+
+
+def memory_report(master_pid=None):
+    """Per-process memory of a pre-fork server: the master and each worker, plus totals
+
+    Without `master_pid` only the calling process is reported.
+    """
+    processes = []
+    for role, pid in [('master', master_pid)] + [('worker', child) for child in (child_pids(master_pid) if master_pid else [])]:
+        if pid is None:
+            continue
+        try:
+            processes.append({'role': role, 'pid': pid, **process_memory(pid)})
+        except OSError:
+            # The worker exited (or was recycled) while the report was taken
+            continue
+    if not processes:
+        processes.append({'role': 'standalone', 'pid': os.getpid(), **process_memory()})
+
+    rss = sum(process.get('rss_mb', 0) for process in processes)
+    pss = sum(process.get('pss_mb', 0) for process in processes)
+    return {
+        'processes': processes,
+        'workers': sum(1 for process in processes if process['role'] == 'worker'),
+        'total_rss_mb': round(rss, 1),
+        'total_pss_mb': round(pss, 1),
+        # Memory that would be duplicated if every process loaded its own copy
+        'shared_savings_mb': round(rss - pss, 1)
+    }
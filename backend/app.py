@@ -1,34 +1,371 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g, send_file
 from flask_cors import CORS
+import json
 import os
+import select
+import socket
 import sys
+import tempfile
+import time
 from datetime import datetime
 
 # Add the AI module to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'ai'))
 
+from ai.chat_sessions import ChatSessionStore
 from ai.financial_advisor import FinancialAdvisor
+from ai.metrics import registry, CONTENT_TYPE, HTTP_REQUESTS, HTTP_REQUEST_SECONDS, MODEL_AVAILABLE, MODEL_LOAD_SECONDS, MODEL_LOAD_PEAK_RSS_BYTES
+from ai.model_loader import ModelLoader
+from ai.model_router import ModelRouter, LARGE
+from ai.profiling import RequestProfiler, span
+from ai.retrieval_advisor import RetrievalAdvisor
+from ai.savings_predictor import SavingsPredictor, BATCH_FIELDS, TIMELINE_INSIGHTS, SAVINGS_RATE_INSIGHTS
+from ai.savings_projection import SavingsProjector, PERCENTILES, completion_dates
+from ai.stopping import DEFAULT_STOP_SEQUENCES
+from ai.streaming import sse_event
+from ai.worker_memory import memory_report
+from src.ai.financial_advisor import FinancialAdvisor as SmallFinancialAdvisor
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize the AI Financial Advisor
+# Curated answers served without a model: the degraded mode and the FAQ tier
+retrieval_advisor = RetrievalAdvisor(
+    os.environ.get('ADVICE_CORPUS_FILE') or None,
+    min_score=float(os.environ.get('RETRIEVAL_MIN_SCORE', 0.15))
+)
+
+# Initialize the AI Financial Advisor; the model itself loads in the background
 try:
-    advisor = FinancialAdvisor()
-    print("🚀 AI Financial Advisor loaded successfully!")
+    advisor = FinancialAdvisor(
+        batch_max_size=int(os.environ.get('ADVISOR_BATCH_MAX_SIZE', 8)),
+        batch_wait_ms=float(os.environ.get('ADVISOR_BATCH_WAIT_MS', 10)),
+        deterministic=os.environ.get('ADVISOR_DETERMINISTIC', '').lower() in ('1', 'true'),
+        cache_size=int(os.environ.get('ADVISOR_CACHE_SIZE', 1024)),
+        cache_ttl=float(os.environ.get('ADVISOR_CACHE_TTL', 3600)),
+        cache_db=os.environ.get('ADVISOR_CACHE_DB') or None,
+        prefix_cache=os.environ.get('ADVISOR_PREFIX_CACHE', 'true').lower() in ('1', 'true'),
+        load_model=False,
+        backend=os.environ.get('ADVISOR_BACKEND', 'torch-fp16'),
+        onnx_dir=os.environ.get('ADVISOR_ONNX_DIR') or None,
+        max_new_tokens=int(os.environ.get('ADVISOR_MAX_NEW_TOKENS', 200)),
+        max_prompt_tokens=int(os.environ.get('ADVISOR_MAX_PROMPT_TOKENS', 1024)),
+        draft_model=os.environ.get('ADVISOR_DRAFT_MODEL') or None,
+        draft_tokens=int(os.environ.get('ADVISOR_DRAFT_TOKENS', 5)),
+        model_dir=os.environ.get('ADVISOR_MODEL_DIR') or None,
+        persist_artifacts=os.environ.get('ADVISOR_PERSIST_ARTIFACTS', 'true').lower() in ('1', 'true'),
+        goal_rules=os.environ.get('GOAL_RULES_FILE') or None,
+        coalesce=os.environ.get('ADVISOR_COALESCE', 'true').lower() in ('1', 'true'),
+        retrieval_advisor=retrieval_advisor,
+        knowledge_index=os.environ.get('ADVISOR_KNOWLEDGE_INDEX') or None,
+        knowledge_top_k=int(os.environ.get('ADVISOR_KNOWLEDGE_TOP_K', 4)),
+        knowledge_tokens=int(os.environ.get('ADVISOR_KNOWLEDGE_TOKENS', 256)),
+        stop_sequences=json.loads(os.environ['ADVISOR_STOP_SEQUENCES']) if os.environ.get('ADVISOR_STOP_SEQUENCES') else DEFAULT_STOP_SEQUENCES
+    )
+    print("🚀 AI Financial Advisor created, loading model in the background...")
 except Exception as e:
     print(f"❌ Error loading AI: {e}")
     advisor = None
 
+model_loader = ModelLoader(
+    advisor,
+    max_attempts=int(os.environ.get('ADVISOR_LOAD_ATTEMPTS', 5)),
+    backoff_seconds=float(os.environ.get('ADVISOR_LOAD_BACKOFF', 2)),
+    max_backoff_seconds=float(os.environ.get('ADVISOR_LOAD_MAX_BACKOFF', 60)),
+    warmup_query=os.environ.get('ADVISOR_WARMUP_QUERY', 'How can I start saving money each month?') or None
+)
+if advisor:
+    model_loader.start()
+
+# DistilGPT-2 advisor and retrieval fallback for questions that don't need the large model
+small_advisor = SmallFinancialAdvisor(load_model=False, retrieval_advisor=retrieval_advisor)
+small_loader = ModelLoader(
+    small_advisor,
+    max_attempts=int(os.environ.get('ADVISOR_LOAD_ATTEMPTS', 5)),
+    backoff_seconds=float(os.environ.get('ADVISOR_LOAD_BACKOFF', 2)),
+    max_backoff_seconds=float(os.environ.get('ADVISOR_LOAD_MAX_BACKOFF', 60))
+)
+
+router = ModelRouter(
+    advisor,
+    model_loader,
+    small_advisor,
+    small_loader,
+    large_threshold=float(os.environ.get('ROUTER_LARGE_THRESHOLD', 0.45)),
+    faq_threshold=float(os.environ.get('ROUTER_FAQ_THRESHOLD', 0.15)),
+    faq_match_threshold=float(os.environ.get('ROUTER_FAQ_MATCH_THRESHOLD', 0.3)),
+    latency_slo_ms=float(os.environ.get('ROUTER_LATENCY_SLO_MS', 15000)),
+    enabled=os.environ.get('ADVISOR_ROUTING', 'true').lower() in ('1', 'true')
+)
+if router.enabled:
+    small_loader.start()
+
+predictor = SavingsPredictor()
+projector = SavingsProjector(paths=int(os.environ.get('PROJECTION_PATHS', 2000)))
+
+# Server-side chat sessions; turn length is measured with the model's tokenizer once it is loaded
+chat_sessions = ChatSessionStore(
+    max_sessions=int(os.environ.get('CHAT_MAX_SESSIONS', 1000)),
+    idle_timeout=float(os.environ.get('CHAT_SESSION_TTL', 1800)),
+    max_context_tokens=int(os.environ.get('CHAT_CONTEXT_TOKENS', 384)),
+    max_memory_bytes=int(float(os.environ.get('CHAT_MEMORY_MB', 64)) * 1024 * 1024),
+    count_tokens=advisor.count_tokens if advisor else None
+)
+
+# Opt-in request profiles (X-Profile-Token header or sampling), kept in a bounded on-disk ring buffer
+profiler = RequestProfiler(
+    os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'loopfund-profiles'),
+    max_profiles=int(os.environ.get('PROFILE_MAX_PROFILES', 50)),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    token=os.environ.get('PROFILE_TOKEN') or None,
+    excluded_prefixes=('/api/admin/',)
+)
+
+# Upper bound on rows accepted by /api/ai/savings-predictions/batch
+MAX_PREDICTION_ROWS = int(os.environ.get('MAX_PREDICTION_ROWS', 100000))
+# Upper bound on rows simulated per request when the batch asks for Monte Carlo projections
+MAX_PROJECTION_ROWS = int(os.environ.get('MAX_PROJECTION_ROWS', 1000))
+
+def after_fork():
+    """Re-create per-process state in a worker forked from a preloaded master (see gunicorn.conf.py)
+
+    Model weights stay in pages shared with the master. Threads,
+    SQLite connections and locks are not inherited safely across fork, so
+    they are rebuilt here.
+    """
+    if advisor and advisor.batcher:
+        advisor.batcher.after_fork()
+    if advisor and advisor.response_cache:
+        advisor.response_cache.after_fork()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if profiler.enabled:
+        g.profile = profiler.start(request.url_rule.rule if request.url_rule else None, request.method, request.path, request.headers)
+
+@app.after_request
+def record_request_metrics(response):
+    """Count every request and time it by route template (streamed bodies are timed until the first byte)"""
+    started = g.pop('request_started', None)
+    # Route templates keep label cardinality bounded; unmatched paths share one label
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method)
+    
+    profile = g.pop('profile', None)
+    if profile:
+        response.headers['X-Profile-Id'] = profile.id
+        # After the body is sent, so streamed answers are profiled to the end
+        response.call_on_close(lambda: profiler.finish(profile, response.status_code))
+    return response
+
+def model_unavailable():
+    """503 for model-backed endpoints until the model is ready"""
+    state = model_loader.state if advisor else 'failed'
+    response = jsonify({'error': 'AI service unavailable', 'model_state': state})
+    if state != 'failed':
+        response.headers['Retry-After'] = '5'
+    return response, 503
+
+def wants_stream(data):
+    """Streaming is opt-in via ?stream=1, {"stream": true} or an SSE Accept header"""
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    if data.get('stream') is True:
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+def client_disconnected_check():
+    """Return a callable that reports whether this request's client has closed the connection
+
+    Uses the connection socket that gunicorn and the Werkzeug server put in
+    the WSGI environ; under other servers it always reports False.
+    """
+    sock = request.environ.get('gunicorn.socket') or request.environ.get('werkzeug.socket')
+    if sock is None:
+        return lambda: False
+
+    def disconnected():
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            # The body has been read, so a readable socket with no data means the peer closed it
+            return bool(readable) and not sock.recv(1, socket.MSG_PEEK)
+        except (OSError, ValueError):
+            return True
+    return disconnected
+
+def stream_advice(decision, user_query, user_profile, result_key, history=None, extra=None, on_complete=None):
+    """Send advice as Server-Sent Events: one `delta` per chunk, then `done` with the full text
+
+    The answer comes from the tier in the router's `decision`.
+
+    `extra` fields are added to the `done` event; `on_complete` receives
+    the full text once streaming has finished.
+    """
+    def generate():
+        chunks = []
+        try:
+            for chunk in router.stream(decision, user_query, user_profile, history):
+                chunks.append(chunk)
+                yield sse_event({'delta': chunk})
+            if on_complete:
+                on_complete(''.join(chunks))
+            yield sse_event({
+                'success': True,
+                result_key: ''.join(chunks),
+                'model_tier': decision['tier'],
+                **(extra or {}),
+                'timestamp': str(datetime.now())
+            }, event='done')
+        except Exception as e:
+            print(f"Error streaming advice: {e}")
+            yield sse_event({'error': 'Internal server error'}, event='error')
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'ai_service': 'available' if advisor else 'unavailable',
+        'liveness': 'alive',
+        'readiness': 'ready' if model_loader.ready else 'not_ready',
+        'model': model_loader.status(),
+        'model_load': advisor.load_stats if advisor else None,
+        'ai_service': 'available' if model_loader.ready else 'unavailable',
         'service': 'LoopFund AI Backend'
     })
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 once the model is loaded and warmed up"""
+    status = model_loader.status()
+    return jsonify(status), 200 if status['state'] == 'ready' else 503
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request, advice-stage, token and model metrics in Prometheus text format"""
+    status = model_loader.status()
+    MODEL_AVAILABLE.set(1 if status['state'] == 'ready' else 0)
+    if status['load_seconds'] is not None:
+        MODEL_LOAD_SECONDS.set(status['load_seconds'])
+    if advisor and advisor.load_stats:
+        MODEL_LOAD_PEAK_RSS_BYTES.set(int(advisor.load_stats['peak_rss_mb'] * 1024 * 1024))
+    
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+@app.route('/api/memory', methods=['GET'])
+def get_memory_report():
+    """Resident memory per server process, split into pages shared with other workers and private pages"""
+    master_pid = os.environ.get('SERVER_MASTER_PID')
+    try:
+        report = memory_report(int(master_pid) if master_pid else None)
+    except OSError as e:
+        return jsonify({'error': f'Memory report needs /proc: {e}'}), 501
+    return jsonify({'success': True, 'current_pid': os.getpid(), 'report': report})
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Stored request profiles, newest first (needs X-Profile-Token)"""
+    if not profiler.authorized(request.headers):
+        return jsonify({'error': 'Profiling token required'}), 403
+    
+    return jsonify({
+        'success': True,
+        'enabled': profiler.enabled,
+        'sample_rate': profiler.sample_rate,
+        'max_profiles': profiler.max_profiles,
+        'profiles': profiler.list()
+    })
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """One profile's spans and slowest functions; ?format=pstats downloads the cProfile stats file"""
+    if not profiler.authorized(request.headers):
+        return jsonify({'error': 'Profiling token required'}), 403
+    
+    if request.args.get('format') == 'pstats':
+        path = profiler.stats_path(profile_id)
+        if not path:
+            return jsonify({'error': 'Profile not found'}), 404
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=f'{profile_id}.prof')
+    
+    profile = profiler.get(profile_id)
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify({'success': True, 'profile': profile})
+
+@app.route('/api/ai/routing-stats', methods=['GET'])
+def get_routing_stats():
+    """How often each model tier is used and why"""
+    return jsonify({
+        'success': True,
+        'stats': router.stats(),
+        'tiers': {'large': model_loader.state, 'small': small_loader.state if router.enabled else 'disabled'}
+    })
+
+@app.route('/api/ai/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Response cache hit/miss/eviction counters"""
+    if not advisor or not advisor.response_cache:
+        return jsonify({'success': True, 'enabled': False})
+    
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        'stats': advisor.response_cache.stats()
+    })
+
+@app.route('/api/ai/coalesce-stats', methods=['GET'])
+def get_coalesce_stats():
+    """How many advice requests shared an identical in-flight generation"""
+    if not advisor or not advisor.single_flight:
+        return jsonify({'success': True, 'enabled': False})
+    
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        'stats': advisor.single_flight.stats()
+    })
+
+@app.route('/api/ai/knowledge-stats', methods=['GET'])
+def get_knowledge_stats():
+    """Size and build details of the memory-mapped knowledge index used for prompts"""
+    if not advisor or not advisor.knowledge_base:
+        return jsonify({'success': True, 'enabled': False})
+    
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        'top_k': advisor.knowledge_top_k,
+        'max_tokens': advisor.knowledge_tokens,
+        'stats': advisor.knowledge_base.stats()
+    })
+
+@app.route('/api/ai/assisted-stats', methods=['GET'])
+def get_assisted_stats():
+    """Draft acceptance rate and tokens/sec of assisted generation"""
+    if not advisor or not advisor.assisted_generator:
+        return jsonify({'success': True, 'enabled': False})
+    
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        'draft_model': advisor.draft_model_name,
+        'stats': advisor.assisted_generator.stats()
+    })
+
 @app.route('/api/ai/advice', methods=['POST'])
 def get_ai_advice():
     """Get AI-powered financial advice"""
@@ -40,16 +377,24 @@ def get_ai_advice():
         if not user_query:
             return jsonify({'error': 'Query is required'}), 400
         
-        if not advisor:
-            return jsonify({'error': 'AI service unavailable'}), 503
+        # Pick the model tier from the question's complexity, load and the latency SLO
+        with span('routing'):
+            decision = router.route(user_query, user_profile, latency_slo_ms=data.get('latency_slo_ms'))
+        if decision['tier'] == LARGE and not model_loader.ready:
+            return model_unavailable()
+        
+        if wants_stream(data):
+            return stream_advice(decision, user_query, user_profile, 'advice')
         
-        # Get AI advice
-        advice = advisor.get_financial_advice(user_query, user_profile)
+        # Get AI advice; identical concurrent questions share one generation
+        advice = router.generate(decision, user_query, user_profile, cancelled=client_disconnected_check())
         
         return jsonify({
             'success': True,
             'advice': advice,
             'query': user_query,
+            'model_tier': decision['tier'],
+            'routing': decision,
             'timestamp': str(datetime.now())
         })
         
@@ -57,6 +402,26 @@ def get_ai_advice():
         print(f"Error in advice endpoint: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/ai/quick-answer', methods=['POST'])
+def get_quick_answer():
+    """Best-matching curated answers for a question with their similarity scores (no model involved)"""
+    data = request.json or {}
+    query = data.get('query', '')
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+    
+    try:
+        k = max(1, min(10, int(data.get('k', 3))))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'k must be an integer'}), 400
+    
+    return jsonify({
+        'success': True,
+        'query': query,
+        'matches': retrieval_advisor.search(query, k, category=data.get('category')),
+        'timestamp': str(datetime.now())
+    })
+
 @app.route('/api/ai/savings-plan', methods=['POST'])
 def get_savings_plan():
     """Get AI-generated savings plan"""
@@ -81,7 +446,7 @@ def get_savings_plan():
             monthly_expenses
         )
         
-        return jsonify({
+        response = {
             'success': True,
             'plan': plan,
             'parameters': {
@@ -91,12 +456,117 @@ def get_savings_plan():
                 'monthly_expenses': monthly_expenses
             },
             'timestamp': str(datetime.now())
-        })
+        }
+        
+        # Opt-in Monte Carlo projection of the plan: percentile dates and the chance of making the deadline
+        if data.get('simulate'):
+            current_savings = float(data.get('current_savings', 0))
+            # The plan saves what the deadline needs, capped by what the budget allows
+            monthly_savings = float(data.get('monthly_savings') or min(
+                (goal_amount - current_savings) / timeline_months,
+                monthly_income - monthly_expenses
+            ))
+            response['projection'] = projector.with_assumptions(data.get('assumptions')).project({
+                'goal_amount': goal_amount,
+                'current_savings': current_savings,
+                'monthly_income': monthly_income,
+                'monthly_expenses': monthly_expenses,
+                'monthly_savings': max(monthly_savings, 0),
+                'timeline_months': timeline_months
+            }, seed=data.get('seed'))
         
+        return jsonify(response)
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid input: {e}'}), 400
     except Exception as e:
         print(f"Error in savings plan endpoint: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/ai/savings-predictions/batch', methods=['POST'])
+def get_savings_predictions_batch():
+    """Predict goal completion for many goals at once from columnar input"""
+    try:
+        data = request.json or {}
+        columns = {field: data[field] for field in BATCH_FIELDS if field in data}
+        
+        if 'goal_amount' not in columns:
+            return jsonify({'error': 'goal_amount column is required'}), 400
+        
+        # timeline_months only feeds the simulation, but it must line up with the other columns
+        simulated_columns = dict(columns)
+        if data.get('simulate') and 'timeline_months' in data:
+            simulated_columns['timeline_months'] = data['timeline_months']
+        
+        if not all(isinstance(values, list) for values in simulated_columns.values()):
+            return jsonify({'error': 'Every column must be an array'}), 400
+        lengths = {len(values) for values in simulated_columns.values()}
+        if len(lengths) != 1:
+            return jsonify({'error': 'All columns must have the same length'}), 400
+        
+        rows = lengths.pop()
+        if rows > MAX_PREDICTION_ROWS:
+            return jsonify({'error': f'At most {MAX_PREDICTION_ROWS} rows per request'}), 413
+        
+        result = predictor.predict_batch(columns)
+        
+        projection = None
+        if data.get('simulate'):
+            if rows > MAX_PROJECTION_ROWS:
+                return jsonify({'error': f'At most {MAX_PROJECTION_ROWS} rows per request with simulate'}), 413
+            simulated = projector.with_assumptions(data.get('assumptions')).simulate(simulated_columns, seed=data.get('seed'))
+            months = simulated['completion_months']
+            dates = completion_dates(months).astype(str)
+            projection = {
+                'probability_on_time': simulated['probability_on_time'].round(4).tolist(),
+                'probability_reached': simulated['probability_reached'].round(4).tolist(),
+                'percentiles': list(PERCENTILES),
+                'completion_months': [[None if value != value else int(value) for value in row] for row in months.tolist()],
+                'completion_dates': [[None if date == 'NaT' else date for date in row] for row in dates.tolist()],
+                'balance_at_deadline': simulated['balance_at_deadline'].round(2).tolist()
+            }
+        
+        if data.get('format') == 'records':
+            return jsonify({
+                'success': True,
+                'count': rows,
+                'predictions': predictor.batch_to_records(result),
+                **({'projection': projection} if projection else {}),
+                'timestamp': str(datetime.now())
+            })
+        
+        dates = result['expected_completion_date'].astype(str)
+        return jsonify({
+            'success': True,
+            'count': rows,
+            'predictions': {
+                'status': result['status'].tolist(),
+                'success': result['success'].tolist(),
+                'months_to_goal': result['months_to_goal'].tolist(),
+                'expected_completion_date': [None if date == 'NaT' else date for date in dates.tolist()],
+                'monthly_savings_needed': result['monthly_savings_needed'].tolist(),
+                'total_savings_needed': [
+                    None if value != value else value for value in result['total_savings_needed'].tolist()
+                ],
+                'is_achievable': result['is_achievable'].tolist(),
+                'timeline_insight': result['timeline_insight'].tolist(),
+                'savings_rate_insight': result['savings_rate_insight'].tolist()
+            },
+            'errors': {str(index): record['message'] for index, record in result['messages'].items()},
+            'insight_codes': {
+                'timeline': TIMELINE_INSIGHTS,
+                'savings_rate': SAVINGS_RATE_INSIGHTS
+            },
+            **({'projection': projection} if projection else {}),
+            'timestamp': str(datetime.now())
+        })
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid input: {e}'}), 400
+    except Exception as e:
+        print(f"Error in savings predictions batch endpoint: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/api/ai/budget-analysis', methods=['POST'])
 def get_budget_analysis():
     """Get AI-powered budget analysis"""
@@ -113,7 +583,8 @@ def get_budget_analysis():
             return jsonify({'error': 'AI service unavailable'}), 503
         
         # Get budget advice
-        advice = advisor.get_budget_advice(income, expenses, goals)
+        with span('budget_analysis'):
+            advice = advisor.get_budget_advice(income, expenses, goals)
         
         return jsonify({
             'success': True,
@@ -186,41 +657,63 @@ def get_quick_tips():
 
 @app.route('/api/ai/chat', methods=['POST'])
 def ai_chat():
-    """General AI chat endpoint for financial questions"""
+    """General AI chat endpoint for financial questions
+
+    The conversation is kept server-side: send back the returned
+    `session_id` with each message instead of the history. A `history`
+    list is still accepted to seed a new session.
+    """
     try:
         data = request.json
         message = data.get('message', '')
-        conversation_history = data.get('history', [])
         user_context = data.get('user_context', {})
         
         if not message:
             return jsonify({'error': 'Message is required'}), 400
         
-        if not advisor:
-            return jsonify({'error': 'AI service unavailable'}), 503
+        session, created = chat_sessions.get(data.get('session_id'))
+        # An expired or unknown session_id is replaced by a new session
+        restarted = created and bool(data.get('session_id'))
+        if created:
+            for msg in data.get('history', []):
+                chat_sessions.add_turn(session, msg['user'], msg['ai'])
         
-        # Build context from conversation history
-        context = ""
-        if conversation_history:
-            context = "Previous conversation:\n" + "\n".join([
-                f"User: {msg['user']}\nAI: {msg['ai']}" 
-                for msg in conversation_history[-3:]  # Last 3 messages
-            ]) + "\n\n"
+        # Summary of older turns plus recent turns, bounded by the session's token budget;
+        # the user context reaches the prompt as the profile
+        with span('chat_history'):
+            history = session.context()
         
-        # Add user context
-        if user_context:
-            context += f"User Context: {user_context}\n\n"
+        with span('routing'):
+            decision = router.route(message, user_context, history, latency_slo_ms=data.get('latency_slo_ms'))
+        if decision['tier'] == LARGE and not model_loader.ready:
+            return model_unavailable()
         
-        # Combine with current message
-        full_query = context + f"Current question: {message}"
+        if wants_stream(data):
+            return stream_advice(
+                decision,
+                message,
+                user_context,
+                'response',
+                history=history,
+                extra={'session_id': session.session_id, 'session_restarted': restarted},
+                on_complete=lambda text: chat_sessions.add_turn(session, message, text)
+            )
         
         # Get AI response
-        response = advisor.get_financial_advice(full_query, user_context)
+        disconnected = client_disconnected_check()
+        response = router.generate(decision, message, user_context, history, cancelled=disconnected)
+        # A client that left never sees the answer, so it doesn't become part of the conversation
+        if not disconnected():
+            chat_sessions.add_turn(session, message, response)
         
         return jsonify({
             'success': True,
             'response': response,
             'message': message,
+            'session_id': session.session_id,
+            'session_restarted': restarted,
+            'model_tier': decision['tier'],
+            'session': session.stats(),
             'timestamp': str(datetime.now())
         })
         
@@ -228,6 +721,18 @@ def ai_chat():
         print(f"Error in chat endpoint: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/ai/chat/sessions', methods=['GET'])
+def get_chat_session_stats():
+    """Chat session store counters"""
+    return jsonify({'success': True, 'stats': chat_sessions.stats()})
+
+@app.route('/api/ai/chat/sessions/<session_id>', methods=['DELETE'])
+def end_chat_session(session_id):
+    """Forget a conversation"""
+    if not chat_sessions.delete(session_id):
+        return jsonify({'error': 'Session not found'}), 404
+    return jsonify({'success': True, 'session_id': session_id})
+
 if __name__ == '__main__':
     print("🚀 Starting LoopFund AI Backend...")
     print("📱 AI Financial Advisor: Ready to help with your finances!")
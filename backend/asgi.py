@@ -0,0 +1,92 @@
+"""ASGI serving mode for the LoopFund AI backend
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+Serves the same Flask routes as app.py. Model-backed routes run on a
+dedicated thread pool sized to ASGI_MAX_IN_FLIGHT, with at most
+ASGI_QUEUE_DEPTH more requests waiting; beyond that they get an
+immediate 503 with Retry-After. Every other route runs on its own pool,
+so health checks and rule-based endpoints stay responsive while the
+model is saturated.
+"""
+import json
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+from flask import jsonify
+
+from app import app as flask_app
+from ai.concurrency import AdmissionController
+
+# Routes that run LLM generation
+GENERATION_ROUTES = {'/api/ai/advice', '/api/ai/chat'}
+
+admission = AdmissionController(
+    max_in_flight=int(os.environ.get('ASGI_MAX_IN_FLIGHT', 4)),
+    queue_depth=int(os.environ.get('ASGI_QUEUE_DEPTH', 16))
+)
+
+
+class GenerationGate:
+    def __init__(self, wsgi_app, admission, cheap_workers=16):
+        """Route generation requests through admission control and a bounded pool"""
+        self.admission = admission
+        # A queued request holds no worker thread: a2wsgi queues work in front of the pool
+        self.generation_app = WSGIMiddleware(wsgi_app, workers=admission.max_in_flight)
+        self.cheap_app = WSGIMiddleware(wsgi_app, workers=cheap_workers)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in GENERATION_ROUTES or scope['method'] != 'POST':
+            if scope['type'] == 'lifespan':
+                return await self._lifespan(receive, send)
+            return await self.cheap_app(scope, receive, send)
+
+        if not self.admission.try_acquire():
+            return await self._reject(send)
+
+        started = time.perf_counter()
+        try:
+            await self.generation_app(scope, receive, send)
+        finally:
+            self.admission.release(time.perf_counter() - started)
+
+    async def _reject(self, send):
+        retry_after = self.admission.retry_after()
+        body = json.dumps({
+            'error': 'AI service is busy, please retry shortly',
+            'retry_after': retry_after
+        }).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('ascii')),
+                (b'retry-after', str(retry_after).encode('ascii'))
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        # Nothing to set up: the model loads on app.py's background thread
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+@flask_app.route('/api/admission-stats', methods=['GET'])
+def admission_stats():
+    """Generation admission counters for the ASGI serving mode"""
+    return jsonify({'success': True, 'stats': admission.stats()})
+
+
+application = GenerationGate(
+    flask_app,
+    admission,
+    cheap_workers=int(os.environ.get('ASGI_CHEAP_WORKERS', 16))
+)
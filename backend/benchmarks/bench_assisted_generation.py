@@ -0,0 +1,128 @@
+"""Benchmark assisted generation against plain decoding: tokens/sec, speedup and draft acceptance rate
+
+With greedy decoding (the default) both modes must produce identical
+answers; any difference is reported and makes the script exit 1.
+
+    python benchmarks/bench_assisted_generation.py --model mistralai/Mistral-7B-Instruct \
+        --draft-model <small model with the same tokenizer> --backend torch-fp32 --output assisted-bench.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), 'sample_queries.txt')
+
+
+def decode_all(generate, model, tokenizer, prompts, generation_kwargs):
+    """Run every prompt through `generate`; returns (new token id lists, seconds excluding warmup)"""
+    import torch
+
+    outputs = []
+    total = 0.0
+    for index, prompt in enumerate(prompts):
+        inputs = tokenizer(prompt, return_tensors="pt", return_token_type_ids=False).to(model.device)
+        started = time.perf_counter()
+        with torch.no_grad():
+            output = generate(**inputs, pad_token_id=tokenizer.eos_token_id, **generation_kwargs)
+        elapsed = time.perf_counter() - started
+
+        outputs.append(output[0, inputs['input_ids'].shape[1]:].tolist())
+        # The first prompt warms up kernels and allocators
+        if index > 0 or len(prompts) == 1:
+            total += elapsed
+    return outputs, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='mistralai/Mistral-7B-Instruct')
+    parser.add_argument('--draft-model', required=True, help='Draft model sharing the main model tokenizer')
+    parser.add_argument('--backend', default='torch-fp32')
+    parser.add_argument('--draft-tokens', type=int, default=5)
+    parser.add_argument('--prompts', default=DEFAULT_QUERIES)
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--new-tokens', type=int, default=64)
+    parser.add_argument('--sample', action='store_true', help='Sample (temperature 0.7) instead of greedy decoding')
+    parser.add_argument('--threads', type=int, default=0, help='torch threads (0 = library default)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    import torch
+    from ai.assisted_generation import AssistedGenerator, load_draft_model
+    from ai.financial_advisor import FinancialAdvisor
+    from ai.inference_backends import load_backend
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    with open(args.prompts) as f:
+        queries = [line.strip() for line in f if line.strip()][:args.limit]
+    builder = FinancialAdvisor(load_model=False)
+    prompts = [builder._build_context_prompt(query, None) for query in queries]
+
+    model, tokenizer = load_backend(args.backend, args.model)
+    draft = load_draft_model(args.backend, args.draft_model, model)
+    assisted = AssistedGenerator(model, draft, args.draft_tokens)
+
+    generation_kwargs = {'max_new_tokens': args.new_tokens, 'do_sample': args.sample}
+    if args.sample:
+        generation_kwargs['temperature'] = 0.7
+
+    torch.manual_seed(0)
+    plain_outputs, plain_seconds = decode_all(model.generate, model, tokenizer, prompts, generation_kwargs)
+    torch.manual_seed(0)
+    assisted_outputs, assisted_seconds = decode_all(assisted.generate, model, tokenizer, prompts, generation_kwargs)
+
+    # Timed tokens leave out the warmup prompt, like the timings
+    timed = slice(1, None) if len(prompts) > 1 else slice(None)
+    plain_tokens = sum(len(ids) for ids in plain_outputs[timed])
+    assisted_tokens = sum(len(ids) for ids in assisted_outputs[timed])
+    plain_rate = plain_tokens / plain_seconds if plain_seconds else 0
+    assisted_rate = assisted_tokens / assisted_seconds if assisted_seconds else 0
+    stats = assisted.stats()
+
+    mismatches = [] if args.sample else [
+        queries[index] for index, (plain, fast) in enumerate(zip(plain_outputs, assisted_outputs)) if plain != fast
+    ]
+
+    result = {
+        'model': args.model,
+        'draft_model': args.draft_model,
+        'backend': args.backend,
+        'sampling': args.sample,
+        'prompts': len(prompts),
+        'plain_tokens_per_second': round(plain_rate, 2),
+        'assisted_tokens_per_second': round(assisted_rate, 2),
+        'speedup': round(assisted_rate / plain_rate, 2) if plain_rate else 0,
+        'acceptance_rate': stats['acceptance_rate'],
+        'tokens_per_round': stats['tokens_per_round'],
+        'draft_tokens': stats['draft_tokens'],
+        'accepted_tokens': stats['accepted_tokens'],
+        'greedy_mismatches': mismatches
+    }
+
+    print(f"{'mode':<10} {'tok/s':>8}")
+    print(f"{'plain':<10} {result['plain_tokens_per_second']:>8}")
+    print(f"{'assisted':<10} {result['assisted_tokens_per_second']:>8}")
+    print(
+        f"speedup {result['speedup']}x, acceptance rate {result['acceptance_rate']:.1%}, "
+        f"{result['tokens_per_round']} tokens per verification pass"
+    )
+    if mismatches:
+        print(f"❌ {len(mismatches)} greedy answer(s) differ between plain and assisted decoding")
+    elif not args.sample:
+        print("✅ Greedy answers identical in both modes")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
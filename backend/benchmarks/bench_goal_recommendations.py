@@ -0,0 +1,119 @@
+"""Benchmark GoalRecommender.recommend_batch against the per-profile recommendGoals loop
+
+    python benchmarks/bench_goal_recommendations.py --rows 1000000 --scalar-rows 50000
+
+The per-profile loop is timed on --scalar-rows and extrapolated to --rows.
+The batch is timed in one pass and streamed in --chunk-rows chunks. For the
+sampled rows the batch output is checked against recommendGoals and, with
+the shipped rules table, against the age if/elif chain it replaced.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.financial_advisor import FinancialAdvisor
+
+
+def make_profiles(rows, seed=42):
+    """Synthetic profiles across every age bracket, with integer ages and incomes"""
+    rng = np.random.default_rng(seed)
+    return {
+        'age': rng.integers(18, 80, rows),
+        'income': rng.integers(15000, 250000, rows)
+    }
+
+
+def legacy_recommendations(age, income):
+    """recommendGoals before the rules table, reduced to the fields that vary"""
+    if age < 30:
+        return [('emergency_fund', income * 0.1, 6), ('debt_payoff', 0, 12)]
+    if age < 40:
+        return [('retirement', income * 0.15, 240), ('investment', income * 0.2, 120)]
+    return [('retirement', income * 0.25, 180), ('estate', 0, 60)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--scalar-rows', type=int, default=50000)
+    parser.add_argument('--chunk-rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--rules', help='Goal rules CSV (default: ai/data/goal_rules.csv)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        advisor = FinancialAdvisor(load_model=False, goal_rules=args.rules)
+    recommender = advisor.goal_recommender
+
+    profiles = make_profiles(args.rows)
+
+    batch_times = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = recommender.recommend_batch(profiles)
+        batch_times.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    streamed_rows = sum(len(chunk['rule']) for chunk in recommender.recommend_chunks(profiles, chunk_rows=args.chunk_rows))
+    stream_seconds = time.perf_counter() - started
+
+    sample = min(args.scalar_rows, args.rows)
+    records = [{'age': int(age), 'income': int(income)} for age, income in zip(profiles['age'][:sample], profiles['income'][:sample])]
+    started = time.perf_counter()
+    scalar = [advisor.recommendGoals(record)['recommendations'] for record in records]
+    scalar_seconds = time.perf_counter() - started
+
+    sample_result = recommender.recommend_batch({field: values[:sample] for field, values in profiles.items()})
+    batch_records = recommender.to_records(sample_result, sample)
+    mismatches = sum(1 for a, b in zip(scalar, batch_records) if a != b)
+
+    legacy_mismatches = None
+    if not args.rules:
+        legacy_mismatches = sum(
+            1 for record, recommendations in zip(records, batch_records)
+            if legacy_recommendations(record['age'], record['income']) != [
+                (item['type'], item['target_amount'], item['timeline_months']) for item in recommendations
+            ]
+        )
+
+    batch_seconds = min(batch_times)
+    scalar_estimate = scalar_seconds * args.rows / sample
+    report = {
+        'rows': args.rows,
+        'recommendations': len(result['rule']),
+        'batch_seconds': round(batch_seconds, 3),
+        'batch_rows_per_second': round(args.rows / batch_seconds),
+        'stream_seconds': round(stream_seconds, 3),
+        'stream_chunk_rows': args.chunk_rows,
+        'scalar_seconds_estimated': round(scalar_estimate, 3),
+        'scalar_rows_per_second': round(sample / scalar_seconds),
+        'speedup': round(scalar_estimate / batch_seconds, 1),
+        'verified_rows': sample,
+        'mismatches': mismatches,
+        'legacy_mismatches': legacy_mismatches,
+        'rule_counts': {
+            recommender.rules.rules[rule]['name']: int(count)
+            for rule, count in zip(*np.unique(result['rule'], return_counts=True))
+        }
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if mismatches or legacy_mismatches or streamed_rows != len(result['rule']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
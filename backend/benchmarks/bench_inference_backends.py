@@ -0,0 +1,127 @@
+"""Benchmark advisor inference backends: load time, tokens/sec and peak RSS
+
+Each backend runs in its own subprocess so peak RSS is measured per backend.
+
+    python benchmarks/bench_inference_backends.py --backends torch-fp32 torch-int8 onnx \
+        --onnx-dir models/mistral-onnx-int8 --output backend-bench.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), 'sample_queries.txt')
+
+
+def run_worker(args):
+    """Measure one backend in this process and print the result as JSON"""
+    import torch
+    from ai.financial_advisor import FinancialAdvisor
+    from ai.inference_backends import load_backend
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    with open(args.prompts) as f:
+        queries = [line.strip() for line in f if line.strip()][:args.limit]
+    builder = FinancialAdvisor(load_model=False)
+    prompts = [builder._build_context_prompt(query, None) for query in queries]
+
+    started = time.perf_counter()
+    model, tokenizer = load_backend(args.backend, args.model, onnx_dir=args.onnx_dir)
+    load_seconds = time.perf_counter() - started
+
+    latencies = []
+    generated_tokens = 0
+    for index, prompt in enumerate(prompts):
+        inputs = tokenizer(prompt, return_tensors="pt", return_token_type_ids=False)
+        started = time.perf_counter()
+        with torch.no_grad():
+            output = model.generate(
+                **inputs,
+                max_new_tokens=args.new_tokens,
+                min_new_tokens=args.new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id
+            )
+        elapsed = time.perf_counter() - started
+
+        # The first prompt warms up kernels and allocators
+        if index == 0 and len(prompts) > 1:
+            continue
+        latencies.append(elapsed)
+        generated_tokens += output.shape[1] - inputs['input_ids'].shape[1]
+
+    total = sum(latencies)
+    print(json.dumps({
+        'backend': args.backend,
+        'load_seconds': round(load_seconds, 2),
+        'prompts': len(latencies),
+        'generated_tokens': generated_tokens,
+        'tokens_per_second': round(generated_tokens / total, 2) if total else 0,
+        'mean_latency_seconds': round(total / len(latencies), 3) if latencies else 0,
+        # ru_maxrss is reported in KiB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', default=['torch-fp32', 'torch-int8'])
+    parser.add_argument('--model', default='mistralai/Mistral-7B-Instruct')
+    parser.add_argument('--onnx-dir', help='Exported ONNX directory for the onnx backend')
+    parser.add_argument('--prompts', default=DEFAULT_QUERIES)
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--new-tokens', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=0, help='torch threads (0 = library default)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.backend = args.worker
+        run_worker(args)
+        return
+
+    results = []
+    for backend in args.backends:
+        command = [
+            sys.executable, __file__, '--worker', backend,
+            '--model', args.model,
+            '--prompts', args.prompts,
+            '--limit', str(args.limit),
+            '--new-tokens', str(args.new_tokens),
+            '--threads', str(args.threads)
+        ]
+        if args.onnx_dir:
+            command += ['--onnx-dir', args.onnx_dir]
+
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"❌ {backend} failed:\n{completed.stderr.strip().splitlines()[-1] if completed.stderr else ''}")
+            results.append({'backend': backend, 'error': completed.stderr.strip()[-2000:]})
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"{'backend':<12} {'load s':>8} {'tok/s':>8} {'latency s':>10} {'peak RSS MB':>12}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['backend']:<12} {'failed':>8}")
+            continue
+        print(
+            f"{result['backend']:<12} {result['load_seconds']:>8} {result['tokens_per_second']:>8} "
+            f"{result['mean_latency_seconds']:>10} {result['peak_rss_mb']:>12}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'model': args.model, 'new_tokens': args.new_tokens, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
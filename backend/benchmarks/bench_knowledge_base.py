@@ -0,0 +1,173 @@
+"""Benchmark building and querying the BM25 knowledge index on a large synthetic corpus
+
+    python benchmarks/bench_knowledge_base.py --passages 100000 --queries 2000
+
+Passages are drawn from a Zipf-distributed synthetic vocabulary mixed with
+the shipped passages, so term frequencies look like natural text. The index
+is built into a temporary directory (or --index-dir), opened memory-mapped
+as the advisor does, and queried with short questions sampled from the
+passages. For --verify-queries questions the top-k scores are checked
+against a brute-force BM25 over the raw passages.
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.knowledge_base import BM25_B, BM25_K1, DEFAULT_PASSAGES_PATH, KnowledgeBase, build_index, read_passages, tokenize
+
+SYLLABLES = ['sa', 've', 'fund', 'ra', 'te', 'in', 'co', 'me', 'bud', 'get', 'lo', 'an', 'tax', 'de', 'bt', 'ri', 'sk', 'ca', 'sh', 'mo']
+
+
+def make_passages(count, vocabulary_size=50000, seed=42):
+    """Synthetic passages of 20-80 words: Zipf-sampled made-up terms mixed with real passage text"""
+    rng = np.random.default_rng(seed)
+    words = sorted({''.join(rng.choice(SYLLABLES, rng.integers(2, 5))) for _ in range(vocabulary_size)})
+    real = [passage['text'].split() for passage in read_passages(DEFAULT_PASSAGES_PATH)]
+
+    passages = []
+    for index in range(count):
+        length = int(rng.integers(20, 80))
+        ranks = np.minimum(rng.zipf(1.3, length), len(words)) - 1
+        text = [words[rank] for rank in ranks]
+        # Every third word comes from a real passage, so questions share everyday terms too
+        source = real[index % len(real)]
+        start = int(rng.integers(0, max(1, len(source) - 10)))
+        shared = source[start:start + length // 3]
+        text[:3 * len(shared):3] = shared
+        passages.append({'id': f'p{index}', 'title': '', 'text': ' '.join(text)})
+    return passages
+
+
+def make_queries(passages, count, seed=7):
+    """Questions of 3-8 words taken from random passages"""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for index in rng.integers(0, len(passages), count):
+        words = passages[index]['text'].split()
+        start = int(rng.integers(0, max(1, len(words) - 8)))
+        queries.append(' '.join(words[start:start + int(rng.integers(3, 9))]))
+    return queries
+
+
+class BruteForceBM25:
+    """Reference BM25 scoring every passage from its raw term counts"""
+
+    def __init__(self, passages):
+        self.documents = [Counter(tokenize(f"{passage['title']} {passage['text']}")) for passage in passages]
+        self.lengths = [sum(document.values()) for document in self.documents]
+        self.average_length = sum(self.lengths) / len(self.lengths)
+        self.frequency = Counter(term for document in self.documents for term in document)
+
+    def top_scores(self, query, k):
+        terms = set(tokenize(query))
+        count = len(self.documents)
+        scores = []
+        for document, length in zip(self.documents, self.lengths):
+            score = 0.0
+            for term in terms & document.keys():
+                idf = math.log(1 + (count - self.frequency[term] + 0.5) / (self.frequency[term] + 0.5))
+                tf = document[term]
+                score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / self.average_length))
+            if score > 0:
+                scores.append(score)
+        return sorted(scores, reverse=True)[:k]
+
+
+def rss_mb():
+    """Current resident set size (pages of the mapped index count once touched)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+
+
+def directory_mb(directory):
+    return round(sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--passages', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--top-k', type=int, default=4)
+    parser.add_argument('--verify-queries', type=int, default=20)
+    parser.add_argument('--index-dir', help='Keep the index here instead of a temporary directory')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    passages = make_passages(args.passages)
+    queries = make_queries(passages, args.queries)
+
+    workdir = None if args.index_dir else tempfile.mkdtemp(prefix='loopfund-knowledge-')
+    directory = args.index_dir or os.path.join(workdir, 'index')
+    try:
+        started = time.perf_counter()
+        manifest = build_index(passages, directory, source='synthetic')
+        build_seconds = time.perf_counter() - started
+
+        rss_before = rss_mb()
+        knowledge_base = KnowledgeBase(directory)
+        rss_opened = rss_mb()
+
+        latencies = []
+        empty = 0
+        for query in queries:
+            started = time.perf_counter()
+            results = knowledge_base.search(query, args.top_k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            empty += not results
+        latencies.sort()
+        rss_queried = rss_mb()
+
+        reference = BruteForceBM25(passages)
+        mismatches = 0
+        for query in queries[:args.verify_queries]:
+            expected = reference.top_scores(query, args.top_k)
+            actual = [passage['score'] for passage in knowledge_base.search(query, args.top_k)]
+            if len(expected) != len(actual) or not np.allclose(expected, actual, rtol=1e-3, atol=1e-3):
+                mismatches += 1
+
+        report = {
+            'passages': args.passages,
+            'terms': manifest['terms'],
+            'postings': manifest['postings'],
+            'index_mb': directory_mb(directory),
+            'build_seconds': round(build_seconds, 2),
+            'build_passages_per_second': round(args.passages / build_seconds),
+            'open_seconds': knowledge_base.open_seconds,
+            'open_rss_growth_mb': round(rss_opened - rss_before, 1),
+            'query_rss_growth_mb': round(rss_queried - rss_opened, 1),
+            'queries': len(queries),
+            'top_k': args.top_k,
+            'query_ms_p50': round(statistics.median(latencies), 3),
+            'query_ms_p95': round(latencies[int(len(latencies) * 0.95) - 1], 3),
+            'query_ms_max': round(latencies[-1], 3),
+            'queries_per_second': round(1000 * len(latencies) / sum(latencies)),
+            'queries_without_match': empty,
+            'verified_queries': min(args.verify_queries, len(queries)),
+            'mismatches': mismatches
+        }
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark SavingsPredictor.predict_batch against the scalar predictGoalCompletion loop
+
+    python benchmarks/bench_savings_predictor.py --rows 1000000 --scalar-rows 50000
+
+The scalar loop is timed on --scalar-rows and extrapolated to --rows. The
+batch output for those rows is also checked against the scalar output.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import ai.savings_predictor as savings_predictor
+from ai.savings_predictor import SavingsPredictor
+
+
+def make_goals(rows, seed=42):
+    """Synthetic goals covering every branch: negative cashflow, reached goals and all insight buckets"""
+    rng = np.random.default_rng(seed)
+    income = rng.uniform(500, 12000, rows).round(2)
+    return {
+        'goal_amount': rng.uniform(100, 100000, rows).round(2),
+        'current_savings': rng.uniform(0, 30000, rows).round(2),
+        'monthly_income': income,
+        'monthly_expenses': (income * rng.uniform(0.4, 1.1, rows)).round(2),
+        'monthly_savings': np.where(rng.random(rows) < 0.5, 0.0, rng.uniform(10, 3000, rows).round(2))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--scalar-rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = SavingsPredictor()
+
+    goals = make_goals(args.rows)
+    now = datetime.now()
+
+    batch_times = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = predictor.predict_batch(goals, now=now)
+        batch_times.append(time.perf_counter() - started)
+
+    # The scalar path reads datetime.now(); pin it to the batch's clock so dates are comparable
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+
+    sample = min(args.scalar_rows, args.rows)
+    with mock.patch.object(savings_predictor, 'datetime', FrozenDatetime):
+        started = time.perf_counter()
+        scalar = [
+            predictor.predictGoalCompletion({field: float(values[index]) for field, values in goals.items()})
+            for index in range(sample)
+        ]
+        scalar_seconds = time.perf_counter() - started
+
+    sample_result = predictor.predict_batch({field: values[:sample] for field, values in goals.items()}, now=now)
+    mismatches = sum(1 for a, b in zip(scalar, predictor.batch_to_records(sample_result)) if a != b)
+
+    batch_seconds = min(batch_times)
+    scalar_estimate = scalar_seconds * args.rows / sample
+    report = {
+        'rows': args.rows,
+        'batch_seconds': round(batch_seconds, 3),
+        'batch_rows_per_second': round(args.rows / batch_seconds),
+        'scalar_seconds_estimated': round(scalar_estimate, 3),
+        'scalar_rows_per_second': round(sample / scalar_seconds),
+        'speedup': round(scalar_estimate / batch_seconds, 1),
+        'verified_rows': sample,
+        'mismatches': mismatches,
+        'status_counts': {int(code): int(count) for code, count in zip(*np.unique(result['status'], return_counts=True))}
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
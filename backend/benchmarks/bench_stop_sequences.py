@@ -0,0 +1,151 @@
+"""Benchmark stop-sequence early termination: tokens generated per request and latency with and without it
+
+    python benchmarks/bench_stop_sequences.py --requests 64 --concurrency 8 --token-latency 0.002
+
+Runs the advisor's batched serving path on the stub model (see
+stub_model.py), whose answers run on into a made-up next "User Question:"
+turn after 40-80 words, as an instruction model without a matching EOS
+does. The same requests are served once with stop sequences disabled and
+once with the defaults. Every stopped answer must equal the unstopped raw
+generation cut at its first stop sequence and cleaned; any difference is
+reported and makes the script exit 1.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.financial_advisor import FinancialAdvisor
+from ai.stopping import DEFAULT_STOP_SEQUENCES, truncate_at_stop
+from stub_model import load_stub_model
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), 'sample_queries.txt')
+
+PROFILE = {
+    'income': 4200,
+    'age': 31,
+    'current_savings': 2500,
+    'goals': ['emergency fund', 'vacation'],
+    'risk_tolerance': 'moderate'
+}
+
+
+def make_requests(path, count):
+    """(query, profile) pairs; the income varies so every request is a distinct prompt"""
+    with open(path) as f:
+        queries = [line.strip() for line in f if line.strip()]
+    return [(queries[index % len(queries)], dict(PROFILE, income=3000 + 25 * index)) for index in range(count)]
+
+
+def make_advisor(args, stop_sequences):
+    advisor = FinancialAdvisor(
+        batch_max_size=args.batch_size, deterministic=True, cache_size=0, prefix_cache=False,
+        load_model=False, max_new_tokens=args.max_new_tokens, coalesce=False, stop_sequences=stop_sequences
+    )
+    load_stub_model(advisor, args.token_latency, args.max_new_tokens, args.turn_tokens)
+
+    # Count the tokens and decode steps of every generate call
+    model = advisor.conversation_model.model
+    tokenizer = advisor.conversation_model.tokenizer
+    generate = model.generate
+    advisor.generated_tokens = 0
+    advisor.decode_steps = 0
+
+    def counting_generate(input_ids, **kwargs):
+        outputs = generate(input_ids, **kwargs)
+        new_tokens = outputs[:, input_ids.shape[1]:]
+        advisor.generated_tokens += int(((new_tokens != tokenizer.pad_token_id) & (new_tokens != tokenizer.eos_token_id)).sum())
+        advisor.decode_steps += new_tokens.shape[1]
+        return outputs
+
+    model.generate = counting_generate
+    return advisor
+
+
+def serve(advisor, requests, concurrency):
+    """Answer every request concurrently; returns (answers, per-request seconds, wall seconds)"""
+    def answer(request):
+        started = time.perf_counter()
+        advice = advisor.getAdvice(*request)
+        return advice, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(answer, requests))
+    return [advice for advice, _ in results], [seconds for _, seconds in results], time.perf_counter() - started
+
+
+def summarize(advisor, requests, latencies, wall_seconds):
+    latencies = sorted(latencies)
+    return {
+        'generated_tokens': advisor.generated_tokens,
+        'tokens_per_request': round(advisor.generated_tokens / len(requests), 1),
+        'decode_steps': advisor.decode_steps,
+        'wall_seconds': round(wall_seconds, 3),
+        'latency_ms_p50': round(statistics.median(latencies) * 1000, 1),
+        'latency_ms_p95': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', default=DEFAULT_QUERIES)
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--max-new-tokens', type=int, default=200)
+    parser.add_argument('--turn-tokens', type=int, default=80, help='Longest answer before the stub starts a new turn')
+    parser.add_argument('--token-latency', type=float, default=0.002, help='Stub seconds per decode step')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    requests = make_requests(args.queries, args.requests)
+
+    unstopped = make_advisor(args, ())
+    unstopped_answers, unstopped_latencies, unstopped_seconds = serve(unstopped, requests, args.concurrency)
+    stopped = make_advisor(args, DEFAULT_STOP_SEQUENCES)
+    stopped_answers, stopped_latencies, stopped_seconds = serve(stopped, requests, args.concurrency)
+    without_stops = summarize(unstopped, requests, unstopped_latencies, unstopped_seconds)
+    with_stops = summarize(stopped, requests, stopped_latencies, stopped_seconds)
+
+    # The raw unstopped generation, cut and cleaned, is what the stopped advisor must return
+    mismatches = 0
+    for (query, profile), answer in zip(requests, stopped_answers):
+        raw = unstopped._generate_batch([unstopped._build_prompt_ids(query, profile)])[0]
+        if answer != stopped._clean_response(truncate_at_stop(raw, DEFAULT_STOP_SEQUENCES)):
+            mismatches += 1
+    changed = sum(before != after for before, after in zip(unstopped_answers, stopped_answers))
+
+    report = {
+        'requests': len(requests),
+        'concurrency': args.concurrency,
+        'max_new_tokens': args.max_new_tokens,
+        'turn_tokens': args.turn_tokens,
+        'token_latency': args.token_latency,
+        'without_stop_sequences': without_stops,
+        'with_stop_sequences': with_stops,
+        'generated_tokens_reduction_pct': round(
+            100 * (1 - with_stops['generated_tokens'] / max(1, without_stops['generated_tokens'])), 1),
+        'decode_steps_reduction_pct': round(
+            100 * (1 - with_stops['decode_steps'] / max(1, without_stops['decode_steps'])), 1),
+        'wall_speedup': round(unstopped_seconds / stopped_seconds, 2),
+        'answers_changed': changed,
+        'mismatches': mismatches
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,364 @@
+"""Benchmark suite for the Python AI backend
+
+    python benchmarks/run_benchmarks.py run --output bench-results.json
+    python benchmarks/run_benchmarks.py compare bench-baseline.json bench-results.json
+
+`run` times the AI modules and every Flask route in app.py. The advisor
+loads its model through its real load_model, with the backend replaced by
+the deterministic StubModel from benchmarks/stub_model.py, with
+--token-latency-ms per decode step. Nothing
+is downloaded and no network is needed, so runs can be compared on the
+same machine. Results are written as JSON with median, mean, min and p95
+per call.
+
+`compare` checks each benchmark's median against a stored baseline. Any
+benchmark that got slower by more than --threshold is reported as a
+regression, and the command exits 1.
+"""
+import argparse
+import contextlib
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stub_model import load_stub_model, stub_backend
+
+PROFILE = {
+    'income': 4200,
+    'age': 31,
+    'current_savings': 2500,
+    'goals': ['emergency fund', 'vacation'],
+    'risk_tolerance': 'moderate'
+}
+
+QUERY = 'How much should I save each month for an emergency fund?'
+
+# Sent as X-Profile-Token by the profiled route benchmarks
+PROFILE_TOKEN = 'benchmark'
+
+USER_TEXT = (
+    "I spent too much on shopping and restaurants this month, I feel stressed about money. "
+    "I want to save more and stick to a budget, maybe track my expenses and cut impulse buys."
+)
+
+USER_HISTORY = [{'amount': amount, 'type': 'deposit'} for amount in (120, 80, 150, 60, 200, 90)]
+
+RAW_RESPONSE = (
+    "<s>[INST] ignored [/INST] Start with a budget. Save 20% of your income every month "
+    "and keep three months of expenses aside.\n\nUser Question: another question"
+)
+
+GOAL = {
+    'goal_amount': 5000,
+    'current_savings': 1200,
+    'monthly_income': 4200,
+    'monthly_expenses': 3100,
+    'monthly_savings': 400
+}
+
+
+def measure(fn, min_time, min_rounds):
+    """Call `fn` until both `min_time` seconds and `min_rounds` calls have passed; return per-call stats in ms"""
+    fn()
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_rounds or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        'rounds': len(timings),
+        'median_ms': round(statistics.median(timings), 4),
+        'mean_ms': round(statistics.fmean(timings), 4),
+        'min_ms': round(timings[0], 4),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4)
+    }
+
+
+def load_app(token_latency, response_tokens):
+    """Import app.py with the stub model and wait until it reports ready"""
+    # Fixed serving settings so runs stay comparable whatever the shell exports
+    os.environ['ADVISOR_DETERMINISTIC'] = 'false'
+    # Every advice request reaches the (stub) large model; routing is timed on its own
+    os.environ['ADVISOR_ROUTING'] = 'false'
+    os.environ.pop('ADVISOR_CACHE_DB', None)
+    # Profiling only for requests that ask for it, so the other routes measure the disabled path
+    os.environ['PROFILE_TOKEN'] = PROFILE_TOKEN
+    os.environ['PROFILE_SAMPLE_RATE'] = '0'
+    os.environ['PROFILE_DIR'] = tempfile.mkdtemp(prefix='loopfund-bench-profiles-')
+
+    # The model loads in the background, so the stub backend stays installed until it is ready
+    with stub_backend(token_latency, response_tokens):
+        import app
+        if not app.model_loader.wait(timeout=60):
+            raise RuntimeError(f'stub model did not become ready: {app.model_loader.status()}')
+    return app
+
+
+def build_suite(app, token_latency, response_tokens):
+    """Return {name: zero-argument callable}, including one entry per Flask route"""
+    from ai.behavioral_analyzer import BehavioralAnalyzer
+    from ai.financial_advisor import FinancialAdvisor
+    from ai.keyword_matcher import KeywordMatcher
+    from ai.knowledge_base import DEFAULT_PASSAGES_PATH, build_index, read_passages
+    from ai.profiling import span
+    from ai.response_cache import ResponseCache
+    from ai.stopping import DEFAULT_STOP_SEQUENCES
+    from ai.streaming import StreamingCleaner
+    from bench_goal_recommendations import make_profiles
+    from bench_savings_predictor import make_goals
+
+    advisor = app.advisor
+    predictor = app.predictor
+    analyzer = BehavioralAnalyzer()
+
+    cached_advisor = FinancialAdvisor(deterministic=True, load_model=False, prefix_cache=False)
+    load_stub_model(cached_advisor, token_latency, response_tokens)
+    cached_advisor.getAdvice(QUERY, PROFILE)
+
+    # Prompts carrying retrieved passages instead of the fixed knowledge block
+    knowledge_dir = os.path.join(tempfile.mkdtemp(prefix='loopfund-bench-'), 'knowledge')
+    build_index(read_passages(DEFAULT_PASSAGES_PATH), knowledge_dir)
+    knowledge_advisor = FinancialAdvisor(load_model=False, prefix_cache=False, knowledge_index=knowledge_dir)
+    load_stub_model(knowledge_advisor, token_latency, response_tokens)
+
+    cache = ResponseCache(max_entries=1024)
+    cache_key = cache.make_key(QUERY, PROFILE)
+    cache.set(cache_key, RAW_RESPONSE)
+
+    matcher = KeywordMatcher({
+        'spending': [('spend', 'spent', 'spending'), 'shopping', 'restaurants'],
+        'saving': [('save', 'saving'), 'budget', ('track', 'tracking')]
+    })
+
+    goals = make_goals(10000)
+    profiles = make_profiles(10000)
+    projection_goals = {field: values[:100] for field, values in goals.items()}
+    projection_goals['timeline_months'] = [24] * 100
+    texts = [USER_TEXT] * 1000
+    chunks = [RAW_RESPONSE[i:i + 4] for i in range(0, len(RAW_RESPONSE), 4)]
+
+    def stream_clean():
+        cleaner = StreamingCleaner(DEFAULT_STOP_SEQUENCES)
+        for chunk in chunks:
+            cleaner.feed(chunk)
+        cleaner.finish()
+
+    pool = ThreadPoolExecutor(max_workers=8)
+
+    def concurrent_advice():
+        list(pool.map(lambda index: advisor.getAdvice(f'{QUERY} ({index})', PROFILE), range(8)))
+
+    herd = ThreadPoolExecutor(max_workers=32)
+
+    def coalesced_advice():
+        # A notification burst: the same question from many clients at once
+        list(herd.map(lambda index: advisor.getAdvice(QUERY, PROFILE), range(32)))
+
+    suite = {
+        'advisor.build_context_prompt': lambda: advisor._build_context_prompt(QUERY, PROFILE),
+        'advisor.build_prompt_ids': lambda: advisor._build_prompt_ids(QUERY, PROFILE, USER_TEXT),
+        'advisor.build_prompt_ids_retrieved': lambda: knowledge_advisor._build_prompt_ids(QUERY, PROFILE, USER_TEXT),
+        'advisor.clean_response': lambda: advisor._clean_response(RAW_RESPONSE),
+        'advisor.get_advice': lambda: advisor.getAdvice(QUERY, PROFILE),
+        'advisor.get_advice_concurrent_8': concurrent_advice,
+        'advisor.get_advice_identical_32': coalesced_advice,
+        'advisor.get_advice_cached': lambda: cached_advisor.getAdvice(QUERY, PROFILE),
+        'advisor.stream_advice': lambda: list(advisor.streamAdvice(QUERY, PROFILE)),
+        'advisor.get_savings_plan': lambda: advisor.get_savings_plan(5000, 12, 4200, 3100),
+        'advisor.get_budget_advice': lambda: advisor.get_budget_advice(4200, {'rent': 1400, 'food': 600, 'fun': 400}, ['house']),
+        'router.route': lambda: app.router.route(QUERY, PROFILE),
+        'retrieval.search': lambda: app.retrieval_advisor.search(QUERY),
+        'knowledge.search': lambda: knowledge_advisor.knowledge_base.search(QUERY),
+        'advisor.get_investment_advice': lambda: advisor.get_investment_advice(31, 'moderate', 5000),
+        'advisor.recommend_goals': lambda: advisor.recommendGoals(PROFILE),
+        'goals.recommend_batch_10000': lambda: advisor.goal_recommender.recommend_batch(profiles),
+        'behavioral.analyze': lambda: analyzer.analyze(USER_TEXT, USER_HISTORY),
+        'behavioral.analyze_batch_1000': lambda: analyzer.analyze_batch(texts),
+        'savings.predict_goal_completion': lambda: predictor.predictGoalCompletion(GOAL),
+        'savings.predict_batch_10000': lambda: predictor.predict_batch(goals),
+        'projection.project': lambda: app.projector.project({**GOAL, 'timeline_months': 24}, seed=0),
+        'projection.simulate_100': lambda: app.projector.simulate(projection_goals, seed=0),
+        'keyword_matcher.count': lambda: matcher.count(USER_TEXT),
+        'response_cache.get': lambda: cache.get(cache.make_key(QUERY, PROFILE)),
+        'streaming.cleaner': stream_clean,
+        'profiling.span_disabled': lambda: span('prompt_build').__enter__()
+    }
+
+    client = app.app.test_client()
+    batch = {field: values[:1000].tolist() for field, values in goals.items()}
+    routes = {
+        ('GET', '/api/health'): None,
+        ('GET', '/api/health/live'): None,
+        ('GET', '/api/health/ready'): None,
+        ('GET', '/api/metrics'): None,
+        ('GET', '/api/memory'): None,
+        ('GET', '/api/ai/cache-stats'): None,
+        ('GET', '/api/ai/routing-stats'): None,
+        ('GET', '/api/ai/assisted-stats'): None,
+        ('GET', '/api/ai/coalesce-stats'): None,
+        ('GET', '/api/ai/knowledge-stats'): None,
+        ('POST', '/api/ai/advice'): {'query': QUERY, 'user_profile': PROFILE},
+        ('POST', '/api/ai/quick-answer'): {'query': QUERY},
+        ('POST', '/api/ai/savings-plan'): {'goal_amount': 5000, 'timeline_months': 12, 'monthly_income': 4200, 'monthly_expenses': 3100},
+        ('POST', '/api/ai/savings-predictions/batch'): batch,
+        ('POST', '/api/ai/budget-analysis'): {'income': 4200, 'expenses': {'rent': 1400, 'food': 600}, 'goals': ['house']},
+        ('POST', '/api/ai/investment-advice'): {'age': 31, 'risk_tolerance': 'moderate', 'investment_amount': 5000},
+        ('GET', '/api/ai/quick-tips'): None,
+        ('POST', '/api/ai/chat'): {'message': QUERY, 'history': [{'user': 'Hi', 'ai': 'Hello!'}], 'user_context': PROFILE},
+        ('GET', '/api/ai/chat/sessions'): None
+    }
+
+    requested = set()
+
+    def route_call(method, path, payload, expected=200, headers=None):
+        requested.add((method, path))
+
+        def call():
+            response = client.open(path, method=method, json=payload, headers=headers)
+            # Read the whole body so streamed responses are timed to the end; closing runs
+            # the server's close callbacks (e.g. writing a request profile)
+            response.get_data()
+            response.close()
+            if response.status_code != expected:
+                raise RuntimeError(f'{method} {path} returned {response.status_code}')
+        return call
+
+    for (method, path), payload in routes.items():
+        suite[f'route.{method} {path}'] = route_call(method, path, payload)
+    suite['route.POST /api/ai/savings-plan (simulate)'] = route_call('POST', '/api/ai/savings-plan', {
+        'goal_amount': 5000, 'timeline_months': 12, 'monthly_income': 4200, 'monthly_expenses': 3100, 'simulate': True, 'seed': 0
+    })
+    suite['route.POST /api/ai/advice (stream)'] = route_call('POST', '/api/ai/advice', {'query': QUERY, 'user_profile': PROFILE, 'stream': True})
+
+    # A long-running conversation: the prompt stays bounded by the session's token budget
+    session_id = client.post('/api/ai/chat', json={'message': QUERY}).get_json()['session_id']
+    suite['route.POST /api/ai/chat (session)'] = route_call('POST', '/api/ai/chat', {'message': QUERY, 'session_id': session_id})
+    profiled = {'X-Profile-Token': PROFILE_TOKEN}
+    suite['route.POST /api/ai/advice (profiled)'] = route_call('POST', '/api/ai/advice', {'query': QUERY, 'user_profile': PROFILE}, headers=profiled)
+    suite['route.GET /api/admin/profiles'] = route_call('GET', '/api/admin/profiles', None, headers=profiled)
+    with client.post('/api/ai/advice', json={'query': QUERY}, headers=profiled) as response:
+        profile_id = response.headers['X-Profile-Id']
+    suite['route.GET /api/admin/profiles/<profile_id>'] = route_call('GET', f'/api/admin/profiles/{profile_id}', None, headers=profiled)
+    suite['route.DELETE /api/ai/chat/sessions/<session_id>'] = route_call('DELETE', '/api/ai/chat/sessions/unknown', None, expected=404)
+
+    adapter = app.app.url_map.bind('localhost')
+    covered = {adapter.match(path, method=method)[0] for method, path in requested}
+    uncovered = sorted(rule.rule for rule in app.app.url_map.iter_rules() if rule.endpoint != 'static' and rule.endpoint not in covered)
+    return suite, uncovered
+
+
+def run(args):
+    token_latency = args.token_latency_ms / 1000
+
+    # The AI modules announce themselves on stdout; keep the report readable
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        app = load_app(token_latency, args.response_tokens)
+        suite, uncovered = build_suite(app, token_latency, args.response_tokens)
+
+    for path in uncovered:
+        print(f"⚠️ No benchmark for route {path}", file=sys.stderr)
+
+    selected = [name for name in suite if not args.filter or any(fnmatch.fnmatch(name, pattern) for pattern in args.filter)]
+    results = {}
+    for name in selected:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results[name] = measure(suite[name], args.min_time, args.min_rounds)
+        print(f"{name:<50} {results[name]['median_ms']:>10.3f} ms  ({results[name]['rounds']} rounds)", file=sys.stderr)
+
+    report = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'token_latency_ms': args.token_latency_ms,
+            'response_tokens': args.response_tokens,
+            'min_time': args.min_time
+        },
+        'benchmarks': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.results) as f:
+        results = json.load(f)
+
+    for setting in ('token_latency_ms', 'response_tokens'):
+        if baseline['metadata'].get(setting) != results['metadata'].get(setting):
+            print(f"⚠️ {setting} differs: baseline {baseline['metadata'].get(setting)}, "
+                  f"results {results['metadata'].get(setting)}")
+
+    regressions = []
+    print(f"{'benchmark':<50} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(set(baseline['benchmarks']) | set(results['benchmarks'])):
+        before = baseline['benchmarks'].get(name)
+        after = results['benchmarks'].get(name)
+        if before is None or after is None:
+            print(f"{name:<50} {'new' if before is None else 'missing':>12}")
+            continue
+
+        old, new = before['median_ms'], after['median_ms']
+        change = (new - old) / old if old else 0.0
+        status = ''
+        # Differences of a few microseconds are timer noise, whatever the ratio
+        if change > args.threshold and new - old > args.min_delta_ms:
+            status = '❌ regression'
+            regressions.append(name)
+        elif change < -args.threshold and old - new > args.min_delta_ms:
+            status = '✅ faster'
+        print(f"{name:<50} {old:>10.3f}ms {new:>10.3f}ms {change:>+8.1%} {status}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✅ No regressions over {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the suite and write results as JSON')
+    run_parser.add_argument('--output', help='Write results to this file instead of stdout')
+    run_parser.add_argument('--filter', nargs='*', help='Only run benchmarks matching these glob patterns')
+    run_parser.add_argument('--token-latency-ms', type=float, default=1.0, help='Stub model latency per decode step')
+    run_parser.add_argument('--response-tokens', type=int, default=32, help='Tokens the stub model generates per prompt')
+    run_parser.add_argument('--min-time', type=float, default=0.5, help='Seconds to spend on each benchmark')
+    run_parser.add_argument('--min-rounds', type=int, default=5)
+
+    compare_parser = commands.add_parser('compare', help='Compare results against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=0.15, help='Relative slowdown that counts as a regression')
+    compare_parser.add_argument('--min-delta-ms', type=float, default=0.01, help='Ignore absolute differences below this (ms)')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Deterministic stand-in for the advisor's text-generation model
+
+Benchmarks use it to time the serving path (prompt building, batching,
+decoding, cleaning, streaming, Flask routes) without downloading a model.
+The tokenizer works on whitespace-separated words. The model answers each
+prompt with `response_tokens` words chosen from a seed taken from the
+prompt, so the same prompt always gets the same answer. It sleeps
+`token_latency` seconds per decode step. A step covers the whole batch,
+as on a real memory-bound decoder.
+
+With `turn_tokens` set, each answer is followed by the kind of text a
+real model keeps generating: a made-up next "User Question:" turn and a
+new "LoopFund AI Response:", until `response_tokens`. Logits processors
+and stopping criteria passed to generate are applied every step, and rows
+that emit EOS are padded, as transformers does.
+"""
+import contextlib
+import random
+import threading
+import time
+import zlib
+from unittest import mock
+
+import torch
+from transformers import BatchEncoding
+from transformers.modeling_outputs import CausalLMOutputWithPast
+
+RESPONSE_WORDS = (
+    'Start', 'by', 'saving', 'a', 'fixed', 'share', 'of', 'your', 'income', 'every', 'month.',
+    'Build', 'an', 'emergency', 'fund', 'first,', 'then', 'pay', 'down', 'high-interest', 'debt.',
+    'Track', 'spending', 'for', 'thirty', 'days', 'and', 'cut', 'what', 'you', 'do', 'not', 'value.',
+    'Automate', 'transfers', 'to', 'a', 'LoopFund', 'group', 'goal', 'so', 'progress', 'is', 'visible.',
+    'Review', 'the', 'budget', 'each', 'quarter', 'as', 'income', 'changes.'
+)
+
+
+class StubTokenizer:
+    def __init__(self):
+        """Word-level tokenizer with the attributes the advisor relies on"""
+        self.pad_token = '<pad>'
+        self.eos_token = '</s>'
+        self.pad_token_id = 0
+        self.eos_token_id = 1
+        self.padding_side = 'left'
+        self._lock = threading.Lock()
+        self._words = [self.pad_token, self.eos_token]
+        self._ids = {self.pad_token: 0, self.eos_token: 1}
+
+    def encode_word(self, word):
+        with self._lock:
+            if word not in self._ids:
+                self._ids[word] = len(self._words)
+                self._words.append(word)
+            return self._ids[word]
+
+    def encode(self, text, **kwargs):
+        return [self.encode_word(word) for word in text.split()]
+
+    def __call__(self, texts, padding=True, return_tensors='pt', **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        rows = [self.encode(text) for text in texts]
+        width = max(len(row) for row in rows)
+
+        input_ids, attention_mask = [], []
+        for row in rows:
+            pad = [self.pad_token_id] * (width - len(row))
+            if self.padding_side == 'left':
+                input_ids.append(pad + row)
+                attention_mask.append([0] * len(pad) + [1] * len(row))
+            else:
+                input_ids.append(row + pad)
+                attention_mask.append([1] * len(row) + [0] * len(pad))
+
+        return BatchEncoding({
+            'input_ids': torch.tensor(input_ids, dtype=torch.long),
+            'attention_mask': torch.tensor(attention_mask, dtype=torch.long)
+        })
+
+    def decode(self, ids, skip_special_tokens=False, **kwargs):
+        if isinstance(ids, torch.Tensor):
+            ids = ids.tolist()
+        with self._lock:
+            words = [self._words[token] for token in ids]
+        if skip_special_tokens:
+            words = [word for word in words if word not in (self.pad_token, self.eos_token)]
+        return ' '.join(words)
+
+    def batch_decode(self, sequences, skip_special_tokens=False, **kwargs):
+        return [self.decode(sequence, skip_special_tokens=skip_special_tokens) for sequence in sequences]
+
+
+class StubModel:
+    def __init__(self, tokenizer, token_latency=0.0, response_tokens=32, turn_tokens=None):
+        """Answer every prompt with `response_tokens` deterministic words, sleeping `token_latency` per step
+
+        With `turn_tokens`, the answer proper is `turn_tokens` / 2 to
+        `turn_tokens` words (varying by prompt) and the rest is a made-up
+        next turn.
+        """
+        self.tokenizer = tokenizer
+        self.token_latency = token_latency
+        self.response_tokens = response_tokens
+        self.turn_tokens = turn_tokens
+        self.device = torch.device('cpu')
+        self.response_ids = [tokenizer.encode_word(word) for word in RESPONSE_WORDS]
+        self.next_turn_ids = [tokenizer.encode_word(word) for word in ('User', 'Question:', 'And', 'what', 'about', 'retirement?')]
+        self.response_marker_ids = [tokenizer.encode_word(word) for word in ('LoopFund', 'AI', 'Response:')]
+
+    def __call__(self, input_ids, use_cache=False, **kwargs):
+        """Prefill: a one-layer legacy key/value tuple, enough for PrefixCache to expand and pass on"""
+        state = torch.zeros(input_ids.shape[0], 1, input_ids.shape[1], 1)
+        return CausalLMOutputWithPast(past_key_values=((state, state),) if use_cache else None)
+
+    def _answer(self, prompt_ids, length):
+        # Seed from the prompt itself so padding and batch position don't change the answer
+        rng = random.Random(zlib.crc32(str([token for token in prompt_ids if token]).encode()))
+        if not self.turn_tokens:
+            return [rng.choice(self.response_ids) for _ in range(length)]
+
+        answer = [rng.choice(self.response_ids) for _ in range(rng.randint(self.turn_tokens // 2, self.turn_tokens))]
+        while len(answer) < length:
+            answer += self.next_turn_ids + self.response_marker_ids
+            answer += [rng.choice(self.response_ids) for _ in range(rng.randint(8, 24))]
+        return answer[:length]
+
+    def generate(self, input_ids, attention_mask=None, streamer=None, max_new_tokens=None,
+                 logits_processor=None, stopping_criteria=None, pad_token_id=None, **kwargs):
+        # input_ids always hold the whole prompt (PrefixCache passes the prefix too), so past_key_values is ignored
+        # Answer length is fixed by response_tokens so runs stay comparable; max_new_tokens only caps it
+        length = self.response_tokens if max_new_tokens is None else min(self.response_tokens, max_new_tokens)
+        answers = torch.tensor([self._answer(row, length) for row in input_ids.tolist()], dtype=torch.long)
+        eos_token_id = self.tokenizer.eos_token_id
+        pad_token_id = eos_token_id if pad_token_id is None else pad_token_id
+
+        if streamer is not None:
+            streamer.put(input_ids)
+
+        sequences = input_ids
+        finished = torch.zeros(len(input_ids), dtype=torch.bool)
+        scores = None
+        for step in range(length):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            next_tokens = answers[:, step]
+            if logits_processor:
+                # The planned token is the most likely one unless a processor overrides it
+                scores = torch.zeros(len(input_ids), len(self.tokenizer._words))
+                scores[torch.arange(len(input_ids)), next_tokens] = 1.0
+                next_tokens = logits_processor(sequences, scores).argmax(dim=-1)
+            next_tokens = torch.where(finished, torch.full_like(next_tokens, pad_token_id), next_tokens)
+            sequences = torch.cat([sequences, next_tokens[:, None]], dim=1)
+            if streamer is not None:
+                streamer.put(next_tokens)
+
+            finished |= next_tokens == eos_token_id
+            if finished.all() or (stopping_criteria and stopping_criteria(sequences, scores)):
+                break
+
+        if streamer is not None:
+            streamer.end()
+        return sequences
+
+
+class StubPipeline:
+    def __init__(self, model, tokenizer):
+        """Same `model` / `tokenizer` attributes as a transformers text-generation pipeline"""
+        self.model = model
+        self.tokenizer = tokenizer
+
+    def __call__(self, text_inputs, **kwargs):
+        prompts = [text_inputs] if isinstance(text_inputs, str) else list(text_inputs)
+        inputs = self.tokenizer(prompts)
+        outputs = self.model.generate(**inputs)
+        texts = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        return [[{'generated_text': text}] for text in texts]
+
+
+@contextlib.contextmanager
+def stub_backend(token_latency=0.0, response_tokens=32, turn_tokens=None):
+    """Make FinancialAdvisor.load_model load a StubModel instead of downloading a model
+
+    Only the backend is replaced: load_backend returns a StubModel and its
+    tokenizer, and the text-generation pipeline wraps them, so the real
+    load_model builds the prompt builder, prefix cache and batcher. The
+    stub's prefill is free, so the prefix cache's overhead is timed but
+    not its saving. Snapshots (model_dir) are not stubbed, and draft
+    models are rejected, so assisted generation stays off.
+    """
+    def load_backend(backend, model_name, onnx_dir=None):
+        tokenizer = StubTokenizer()
+        model = StubModel(tokenizer, token_latency=token_latency, response_tokens=response_tokens,
+                          turn_tokens=turn_tokens)
+        return model, tokenizer
+
+    def text_generation_pipeline(task, model, tokenizer, **kwargs):
+        return StubPipeline(model, tokenizer)
+
+    with mock.patch('ai.financial_advisor.load_backend', load_backend), \
+            mock.patch('ai.inference_backends.load_backend', load_backend), \
+            mock.patch('ai.financial_advisor.pipeline', text_generation_pipeline):
+        yield
+
+
+def load_stub_model(advisor, token_latency=0.0, response_tokens=32, turn_tokens=None):
+    """Run `advisor`'s real load_model with the stub backend"""
+    with stub_backend(token_latency, response_tokens, turn_tokens):
+        advisor.load_model()
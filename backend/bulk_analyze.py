@@ -0,0 +1,241 @@
+"""Offline bulk runner for the AI modules over exported user data
+
+    python bulk_analyze.py analyze   --input messages.jsonl --output analysis.jsonl
+    python bulk_analyze.py predict   --input goals.csv      --output predictions.jsonl --workers 8
+    python bulk_analyze.py recommend --input profiles.jsonl --output goals.jsonl --resume
+
+Input is JSONL or CSV, read as a stream. Records are grouped into chunks
+and fanned out to a process pool, and results are written in input order
+as one JSON line per record. Memory stays bounded by workers * chunk size
+whatever the file size.
+
+After every written chunk, a checkpoint (<output>.checkpoint) records how
+far the input and output have got. --resume continues from there.
+
+Record fields per task:
+    analyze    {"text": ..., "history": [...]}          -> BehavioralAnalyzer.analyze
+    predict    {"goal_amount": ..., "current_savings": ...} -> SavingsPredictor.predictGoalCompletion
+    recommend  {"age": ..., "income": ...}               -> FinancialAdvisor.recommendGoals
+An optional "id" field is copied to the output.
+"""
+import argparse
+import collections
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'ai'))
+
+TASKS = ('analyze', 'predict', 'recommend')
+
+# Per-process module instances, created once by _init_worker
+_worker = {}
+
+
+def _init_worker(task):
+    # The AI classes announce themselves on stdout; keep worker output quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        if task == 'analyze':
+            from ai.behavioral_analyzer import BehavioralAnalyzer
+            _worker['analyzer'] = BehavioralAnalyzer()
+        elif task == 'predict':
+            from ai.savings_predictor import SavingsPredictor, BATCH_FIELDS
+            _worker['predictor'] = SavingsPredictor()
+            _worker['fields'] = BATCH_FIELDS
+        else:
+            from ai.financial_advisor import FinancialAdvisor
+            _worker['advisor'] = FinancialAdvisor(load_model=False)
+
+
+def _history(value):
+    """A record's history; CSV exports carry it as a JSON string (or an empty cell)"""
+    if not isinstance(value, str):
+        return value
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        # Left as is, so the analyzer fails only this record
+        return value
+
+
+def _process_chunk(task, records):
+    """Run one chunk through the selected module and return one result per record"""
+    if task == 'analyze':
+        histories = [_history(record.get('history')) for record in records]
+        return _worker['analyzer'].analyze_batch([str(record.get('text', '')) for record in records], histories)
+
+    if task == 'predict':
+        # Same output as predictGoalCompletion per record, computed column-wise
+        import numpy as np
+        predictor = _worker['predictor']
+        try:
+            columns = {
+                field: np.array([float(record.get(field, 0)) for record in records])
+                for field in _worker['fields']
+            }
+        except (TypeError, ValueError):
+            return [predictor.predictGoalCompletion(record) for record in records]
+        return predictor.batch_to_records(predictor.predict_batch(columns))
+
+    # Same output as recommendGoals per record, with the rules applied column-wise
+    import numpy as np
+    advisor = _worker['advisor']
+    try:
+        columns = {
+            'age': np.array([float(record.get('age', 25)) for record in records]),
+            'income': np.array([float(record.get('income', 50000)) for record in records])
+        }
+    except (TypeError, ValueError):
+        return [advisor.recommendGoals(record) for record in records]
+    recommendations = advisor.goal_recommender.to_records(advisor.goal_recommender.recommend_batch(columns), len(records))
+    return [
+        {'success': True, 'recommendations': items, 'user_profile': record}
+        for record, items in zip(records, recommendations)
+    ]
+
+
+def _coerce(value):
+    """CSV cells arrive as strings; turn numeric ones back into numbers"""
+    if value is None or value == '':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def read_jsonl(path, offset):
+    """Yield (record, end_offset) from byte `offset` onwards"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            offset += len(line)
+            if line.strip():
+                yield json.loads(line), offset
+
+
+def read_csv(path, skip):
+    """Yield (record, record_number) after skipping `skip` records"""
+    with open(path, newline='') as f:
+        for number, row in enumerate(csv.DictReader(f), start=1):
+            if number > skip:
+                yield {key: _coerce(value) for key, value in row.items()}, number
+
+
+def chunked(records, size):
+    """Group (record, position) pairs into (records, last_position) chunks"""
+    chunk = []
+    position = None
+    for record, position in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk, position
+            chunk = []
+    if chunk:
+        yield chunk, position
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    # Write-then-rename so a crash never leaves a torn checkpoint
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(state, f)
+    os.replace(temporary, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('task', choices=TASKS)
+    parser.add_argument('--input', required=True, help='JSONL or CSV file')
+    parser.add_argument('--output', required=True, help='JSONL file for results')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help='Input format (default: from the file extension)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint)')
+    parser.add_argument('--resume', action='store_true', help='Continue from the checkpoint instead of starting over')
+    args = parser.parse_args()
+
+    input_format = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    checkpoint_path = args.checkpoint or args.output + '.checkpoint'
+
+    state = {'task': args.task, 'input': os.path.abspath(args.input), 'position': 0, 'records': 0, 'output_bytes': 0}
+    if args.resume:
+        saved = load_checkpoint(checkpoint_path)
+        if saved:
+            if saved['task'] != args.task or saved['input'] != state['input']:
+                parser.error(f'{checkpoint_path} belongs to a different task or input')
+            state = saved
+            print(f"↩️ Resuming after {state['records']} records", file=sys.stderr)
+
+    # Drop anything written after the last checkpoint (a partially written chunk)
+    output = open(args.output, 'ab' if args.resume else 'wb')
+    output.truncate(state['output_bytes'])
+    output.seek(state['output_bytes'])
+
+    if input_format == 'jsonl':
+        records = read_jsonl(args.input, state['position'])
+    else:
+        records = read_csv(args.input, state['position'])
+
+    started = time.perf_counter()
+    processed = 0
+    max_pending = max(1, args.workers) * 2
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.task,)) as pool:
+        pending = collections.deque()
+
+        def write_next():
+            nonlocal processed
+            future, chunk, position = pending.popleft()
+            for record, result in zip(chunk, future.result()):
+                line = {'index': state['records'], 'result': result}
+                if 'id' in record:
+                    line = {'id': record['id'], **line}
+                output.write(json.dumps(line).encode('utf-8') + b'\n')
+                state['records'] += 1
+            output.flush()
+
+            processed += len(chunk)
+            state['position'] = position
+            state['output_bytes'] = output.tell()
+            save_checkpoint(checkpoint_path, state)
+
+            elapsed = time.perf_counter() - started
+            print(f"… {state['records']} records ({processed / elapsed:,.0f}/s)", file=sys.stderr)
+
+        for chunk, position in chunked(records, args.chunk_size):
+            pending.append((pool.submit(_process_chunk, args.task, chunk), chunk, position))
+            # Bound in-flight chunks so memory stays constant
+            if len(pending) >= max_pending:
+                write_next()
+
+        while pending:
+            write_next()
+
+    output.close()
+    elapsed = time.perf_counter() - started
+    print(f"✅ {args.task}: {processed} records in {elapsed:.1f}s → {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
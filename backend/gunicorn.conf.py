@@ -0,0 +1,68 @@
+"""Multi-worker serving mode for the LoopFund AI backend
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Runs SERVER_WORKERS processes with SERVER_THREADS request threads each.
+The model is loaded once in the master before forking (SERVER_PRELOAD),
+so every worker maps the same read-only weight pages instead of holding
+its own copy. Only CPU torch backends (torch-fp32, torch-int8) can be
+shared this way; other backends load the model in each worker. Each
+worker uses WORKER_TORCH_THREADS torch threads (default: cores divided
+by workers), so replicas don't oversubscribe the CPU.
+
+Chat sessions, the in-memory response cache and metrics are per worker.
+/api/memory reports RSS and shared/private memory for the master and
+every worker.
+"""
+import gc
+import os
+
+from ai.inference_backends import supports_fork_sharing
+
+bind = os.environ.get('SERVER_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('SERVER_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('SERVER_THREADS', 8))
+# Streaming answers from a loaded CPU model can take minutes
+timeout = int(os.environ.get('SERVER_TIMEOUT', 300))
+
+# Tokenizers used before fork would otherwise disable their thread pool in each worker with a warning
+os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+
+backend = os.environ.get('ADVISOR_BACKEND', 'torch-fp16')
+preload_requested = os.environ.get('SERVER_PRELOAD', 'true').lower() in ('1', 'true')
+preload_app = preload_requested and supports_fork_sharing(backend)
+if preload_requested and not preload_app:
+    print(f"⚠️ Backend {backend} can't share weights across fork, every worker loads its own model")
+
+torch_threads = int(os.environ.get('WORKER_TORCH_THREADS') or 0) or max(1, (os.cpu_count() or 1) // workers)
+
+
+def on_starting(server):
+    # Inherited by every worker so /api/memory can find its siblings
+    os.environ['SERVER_MASTER_PID'] = str(os.getpid())
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    import app
+    print("⏳ Loading the model in the master before starting workers...")
+    app.model_loader.wait()
+    if app.router.enabled:
+        app.small_loader.wait()
+
+    # Objects that exist now are never collected, so the collector doesn't
+    # write to their pages and un-share them in the workers
+    gc.freeze()
+    print(f"✅ Model {app.model_loader.state}, forking {workers} worker(s)")
+
+
+def post_fork(server, worker):
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    if preload_app:
+        import app
+        app.after_fork()
@@ -0,0 +1,45 @@
+"""Build the BM25 knowledge index for ADVISOR_KNOWLEDGE_INDEX
+
+Run when the passages change and ship the output directory with the image;
+the advisor memory-maps it at startup and retrieves the passages relevant
+to each question instead of sending the fixed knowledge block.
+
+    # Index the curated passages in ai/data/knowledge_passages.jsonl
+    python scripts/build_knowledge_index.py --output models/knowledge
+
+    # Index another JSONL file ({"id", "title", "text"} per line)
+    python scripts/build_knowledge_index.py --input /data/passages.jsonl --output models/knowledge
+
+    # Show the passages a question retrieves from an existing index
+    python scripts/build_knowledge_index.py --output models/knowledge --query "How big should my emergency fund be?"
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.knowledge_base import DEFAULT_PASSAGES_PATH, KnowledgeBase, build_index, read_passages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--input', default=DEFAULT_PASSAGES_PATH, help='Passages JSONL (default: ai/data/knowledge_passages.jsonl)')
+    parser.add_argument('--output', required=True, help='Index directory (replaced if it exists)')
+    parser.add_argument('--query', help='Search the existing index at --output instead of building it')
+    parser.add_argument('--top-k', type=int, default=4)
+    args = parser.parse_args()
+
+    if args.query:
+        for passage in KnowledgeBase(args.output).search(args.query, args.top_k):
+            print(f"{passage['score']:>8.3f}  {passage['id']}: {passage['text']}")
+        return
+
+    manifest = build_index(read_passages(args.input), args.output, source=os.path.abspath(args.input))
+    print(json.dumps(manifest, indent=2))
+    print(f"✅ Knowledge index written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
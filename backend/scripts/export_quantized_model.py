@@ -0,0 +1,144 @@
+"""Export a quantized advisor model and validate it against the fp32 baseline
+
+Examples (run from backend/):
+
+    # ONNX Runtime export with int8 dynamic quantization, then validate
+    python scripts/export_quantized_model.py --backend onnx --quantize int8 --output models/mistral-onnx-int8
+
+    # Validate CPU int8 PyTorch quantization (applied at load time, nothing to export)
+    python scripts/export_quantized_model.py --backend torch-int8
+
+Validation generates a greedy continuation for each prompt with the fp32
+model, then teacher-forces the quantized model on the same tokens and
+reports how often its top-1 prediction agrees. The script exits non-zero
+when agreement is below --min-agreement.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.financial_advisor import FinancialAdvisor, MODEL_NAME
+from ai.inference_backends import BACKENDS, load_backend
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'sample_queries.txt')
+
+
+def export_onnx(model_name, output_dir, quantize):
+    """Export `model_name` to ONNX (with past key/values) and optionally int8-quantize it"""
+    from optimum.onnxruntime import ORTModelForCausalLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    started = time.perf_counter()
+    model = ORTModelForCausalLM.from_pretrained(model_name, export=True, use_cache=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    print(f"✅ Exported ONNX model to {output_dir} in {time.perf_counter() - started:.1f}s")
+
+    if quantize == 'int8':
+        started = time.perf_counter()
+        quantizer = ORTQuantizer.from_pretrained(output_dir, file_name=model.model_path.name)
+        config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+        # Writes model_quantized.onnx next to the fp32 graph; load_backend prefers it
+        quantizer.quantize(save_dir=output_dir, quantization_config=config)
+        print(f"✅ Quantized ONNX weights to int8 in {time.perf_counter() - started:.1f}s")
+
+
+def load_prompts(path, limit):
+    with open(path) as f:
+        queries = [line.strip() for line in f if line.strip()]
+    advisor = FinancialAdvisor(load_model=False)
+    return [advisor._build_context_prompt(query, None) for query in queries[:limit]]
+
+
+def validate(baseline, candidate, tokenizer, prompts, new_tokens):
+    """Compare the candidate's next-token predictions with the fp32 baseline's greedy output"""
+    results = []
+
+    for prompt in prompts:
+        inputs = tokenizer(prompt, return_tensors="pt", return_token_type_ids=False)
+        prompt_length = inputs['input_ids'].shape[1]
+
+        with torch.no_grad():
+            reference = baseline.generate(
+                **inputs,
+                max_new_tokens=new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id
+            )
+            attention_mask = torch.ones_like(reference)
+            baseline_logits = baseline(input_ids=reference, attention_mask=attention_mask).logits
+            candidate_logits = candidate(input_ids=reference, attention_mask=attention_mask).logits
+            own = candidate.generate(
+                **inputs,
+                max_new_tokens=new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id
+            )
+
+        # Logits at position i predict token i + 1; score only the generated span
+        span = slice(prompt_length - 1, reference.shape[1] - 1)
+        baseline_top = baseline_logits[0, span].argmax(-1)
+        candidate_top = candidate_logits[0, span].float().argmax(-1)
+
+        results.append({
+            'top1_agreement': (baseline_top == candidate_top).float().mean().item(),
+            'max_logit_diff': (baseline_logits[0, span] - candidate_logits[0, span].float()).abs().max().item(),
+            'exact_match': torch.equal(own[0, prompt_length:], reference[0, prompt_length:])
+        })
+
+    return {
+        'prompts': len(results),
+        'top1_agreement': round(sum(r['top1_agreement'] for r in results) / len(results), 4),
+        'max_logit_diff': round(max(r['max_logit_diff'] for r in results), 4),
+        'exact_match_rate': round(sum(r['exact_match'] for r in results) / len(results), 4),
+        'per_prompt': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=MODEL_NAME, help='Hub id or local path of the fp32/fp16 model')
+    parser.add_argument('--backend', choices=BACKENDS, default='onnx', help='Quantized backend to export and validate')
+    parser.add_argument('--output', help='Export directory (onnx backend)')
+    parser.add_argument('--quantize', choices=('int8', 'none'), default='int8', help='ONNX weight quantization')
+    parser.add_argument('--skip-export', action='store_true', help='Validate an existing --output directory')
+    parser.add_argument('--prompts', default=DEFAULT_QUERIES, help='File with one user question per line')
+    parser.add_argument('--limit', type=int, default=10, help='Number of prompts to validate')
+    parser.add_argument('--new-tokens', type=int, default=32, help='Tokens generated per prompt')
+    parser.add_argument('--min-agreement', type=float, default=0.9, help='Minimum top-1 agreement to pass')
+    parser.add_argument('--report', help='Write the validation report as JSON to this file')
+    args = parser.parse_args()
+
+    if args.backend == 'onnx':
+        if not args.output:
+            parser.error('--output is required for the onnx backend')
+        if not args.skip_export:
+            export_onnx(args.model, args.output, args.quantize)
+
+    prompts = load_prompts(args.prompts, args.limit)
+    baseline, tokenizer = load_backend('torch-fp32', args.model)
+    candidate, _ = load_backend(args.backend, args.model, onnx_dir=args.output)
+
+    report = validate(baseline, candidate, tokenizer, prompts, args.new_tokens)
+    report.update({'model': args.model, 'backend': args.backend, 'output': args.output})
+
+    print(json.dumps({k: v for k, v in report.items() if k != 'per_prompt'}, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if report['top1_agreement'] < args.min_agreement:
+        print(f"❌ Top-1 agreement {report['top1_agreement']:.2%} is below {args.min_agreement:.2%}")
+        sys.exit(1)
+    print(f"✅ {args.backend} matches the fp32 baseline on {report['top1_agreement']:.2%} of next-token predictions")
+
+
+if __name__ == '__main__':
+    main()
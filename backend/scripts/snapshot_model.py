@@ -0,0 +1,121 @@
+"""Create or verify a pinned local model snapshot for ADVISOR_MODEL_DIR
+
+Run on a machine with hub access (or from an existing local copy), then
+ship the directory with the image; serving nodes never contact the hub.
+
+    # Download a pinned revision into models/mistralai--Mistral-7B-Instruct
+    python scripts/snapshot_model.py --model mistralai/Mistral-7B-Instruct --revision <commit sha> --output models
+
+    # Snapshot a model directory that is already on disk
+    python scripts/snapshot_model.py --model mistralai/Mistral-7B-Instruct --source /data/mistral --output models
+
+    # Check every file against the manifest's SHA-256 hashes
+    python scripts/snapshot_model.py --model mistralai/Mistral-7B-Instruct --output models --verify
+
+    # Also write the converted/quantized artifact so the first start skips conversion
+    python scripts/snapshot_model.py --model mistralai/Mistral-7B-Instruct --output models --verify --prepare torch-int8
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.model_store import MANIFEST, ModelStore
+
+# Everything from_pretrained needs for the tokenizer and safetensors weights
+SNAPSHOT_PATTERNS = ['*.json', '*.safetensors', 'tokenizer.model', '*.txt']
+
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_files(directory):
+    return sorted(
+        name for name in os.listdir(directory)
+        if os.path.isfile(os.path.join(directory, name)) and name != MANIFEST
+    )
+
+
+def create(args, store):
+    target = store.snapshot_dir(args.model)
+    os.makedirs(target, exist_ok=True)
+
+    revision = args.revision
+    if args.source:
+        for name in os.listdir(args.source):
+            if name.endswith(('.json', '.safetensors', '.txt', '.model')):
+                shutil.copy2(os.path.join(args.source, name), target)
+        revision = revision or 'local'
+    else:
+        if not args.revision:
+            sys.exit("--revision is required when downloading, so the snapshot is pinned")
+        from huggingface_hub import snapshot_download
+        snapshot_download(args.model, revision=args.revision, local_dir=target, allow_patterns=SNAPSHOT_PATTERNS)
+        shutil.rmtree(os.path.join(target, '.cache'), ignore_errors=True)
+
+    if not any(name.endswith('.safetensors') for name in os.listdir(target)):
+        sys.exit(f"❌ {args.model} has no .safetensors weights; convert it before snapshotting")
+
+    manifest = {
+        'model': args.model,
+        'revision': revision,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'files': {
+            name: {'size': os.path.getsize(os.path.join(target, name)), 'sha256': sha256(os.path.join(target, name))}
+            for name in snapshot_files(target)
+        }
+    }
+    with open(os.path.join(target, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ Snapshot of {args.model}@{revision} written to {target} ({len(manifest['files'])} files)")
+
+
+def verify(store, model_name):
+    path, manifest = store.resolve(model_name)
+    mismatched = [
+        name for name, entry in manifest['files'].items()
+        if sha256(os.path.join(path, name)) != entry['sha256']
+    ]
+    unpinned = [name for name in snapshot_files(path) if name not in manifest['files']]
+    for name in mismatched:
+        print(f"❌ {name} does not match its pinned hash")
+    for name in unpinned:
+        print(f"⚠️ {name} is not in the manifest")
+    if mismatched:
+        sys.exit(1)
+    print(f"✅ {len(manifest['files'])} files match {model_name}@{manifest['revision']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', required=True, help='Model name, e.g. mistralai/Mistral-7B-Instruct')
+    parser.add_argument('--output', required=True, help='Model store root (ADVISOR_MODEL_DIR)')
+    parser.add_argument('--revision', help='Hub commit to pin when downloading')
+    parser.add_argument('--source', help='Snapshot an existing local model directory instead of downloading')
+    parser.add_argument('--verify', action='store_true', help='Check the existing snapshot instead of creating one')
+    parser.add_argument('--prepare', nargs='*', default=[], help='Backends to write load-time artifacts for')
+    args = parser.parse_args()
+
+    store = ModelStore(args.output)
+    if args.verify:
+        verify(store, args.model)
+    else:
+        create(args, store)
+
+    for backend in args.prepare:
+        _, _, stats = store.load(args.model, backend)
+        print(f"✅ {backend}: {stats['source']} in {stats['load_seconds']}s (peak RSS {stats['peak_rss_mb']} MB)")
+
+
+if __name__ == '__main__':
+    main()
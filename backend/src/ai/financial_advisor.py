@@ -1,16 +1,41 @@
 from transformers import pipeline
 import json
 
+# Imported as src.ai.financial_advisor from backend/, where the main AI modules are the ai package
+from ai.keyword_matcher import KeywordMatcher
+from ai.retrieval_advisor import RetrievalAdvisor
+
+# Tuples group the forms of one keyword
+MINDSET_KEYWORDS = KeywordMatcher({
+    'positive': [
+        'confident', 'excited', 'motivated', ('achieved', 'achieve'), 'progress',
+        ('success', 'successful'), 'happy', 'proud'
+    ],
+    'negative': [
+        ('worried', 'worry', 'worrying'), 'anxious', ('struggling', 'struggle'), 'difficult',
+        'overwhelmed', ('stress', 'stressed', 'stressful'), 'frustrated', 'scared'
+    ]
+})
+
 class FinancialAdvisor:
-    def __init__(self):
+    def __init__(self, load_model=True, retrieval_advisor=None):
+        """Small-model advisor (DistilGPT-2) with retrieval-based fallback advice
+
+        Pass `load_model=False` to construct it immediately and call
+        load_model() later (e.g. from a ModelLoader thread); until then
+        every answer is retrieved from the advice corpus by
+        `retrieval_advisor` (a RetrievalAdvisor over the default corpus
+        when not given).
+        """
+        self.model = None
+        self.retrieval_advisor = retrieval_advisor or RetrievalAdvisor()
+        
         # Use a smaller, faster model for testing
-        try:
-            # Try to use a smaller model first
-            self.model = pipeline("text-generation", model="distilgpt2", max_length=100)
-            print("✅ Using DistilGPT-2 (faster, smaller model)")
-        except Exception as e:
-            print(f"⚠️ Could not load AI model: {e}")
-            self.model = None
+        if load_model:
+            try:
+                self.load_model()
+            except Exception as e:
+                print(f"⚠️ Could not load AI model: {e}")
         
         # Financial context templates
         self.financial_contexts = {
@@ -19,6 +44,15 @@ class FinancialAdvisor:
             "budget_advice": "Provide budgeting advice for:"
         }
     
+    def load_model(self):
+        """Load DistilGPT-2; raises if it cannot be loaded"""
+        self.model = pipeline("text-generation", model="distilgpt2", max_length=100)
+        print("✅ Using DistilGPT-2 (faster, smaller model)")
+    
+    def warmup(self, user_query):
+        """Run one generation so the first real request doesn't pay for lazy initialization"""
+        return self.get_financial_advice(user_query, {})
+    
     def get_financial_advice(self, user_query, user_profile, context_type="general"):
         try:
             if not self.model:
@@ -29,10 +63,12 @@ class FinancialAdvisor:
             
             prompt = f"{context} {user_query}. User has income ${user_profile.get('income', 'variable')} and wants to save for {user_profile.get('goals', 'financial goals')}."
             
-            # Generate response
-            response = self.model(prompt, max_length=150, num_return_sequences=1, temperature=0.7)
+            # Generate response; the pipeline would otherwise echo the prompt (and the user's profile) back
+            response = self.model(prompt, max_length=150, num_return_sequences=1, temperature=0.7, return_full_text=False)
             
-            advice = response[0]['generated_text']
+            advice = response[0]['generated_text'].strip()
+            if not advice:
+                return self._get_fallback_advice(user_query, context_type)
             
             return {
                 "advice": advice,
@@ -44,50 +80,16 @@ class FinancialAdvisor:
             return self._get_fallback_advice(user_query, context_type)
     
     def _get_fallback_advice(self, query, context_type):
-        """Fallback advice when AI model is not available"""
-        fallback_responses = {
-            "savings_plan": [
-                "Start by saving 20% of your income each month. Create an emergency fund first, then focus on specific goals.",
-                "Use the 50/30/20 rule: 50% needs, 30% wants, 20% savings. Automate your savings to make it easier.",
-                "Set SMART goals: Specific, Measurable, Achievable, Relevant, and Time-bound savings targets."
-            ],
-            "goal_setting": [
-                "Break down large goals into smaller, achievable milestones. Celebrate each milestone to stay motivated.",
-                "Prioritize your goals: emergency fund first, then short-term goals, then long-term investments.",
-                "Review and adjust your goals monthly. Life changes, so your financial goals should adapt too."
-            ],
-            "budget_advice": [
-                "Track every expense for a month to understand your spending patterns. Use apps or spreadsheets.",
-                "Create a zero-based budget where every dollar has a purpose. Include savings as a fixed expense.",
-                "Use the envelope method for variable expenses like groceries and entertainment."
-            ],
-            "general": [
-                "Start small and build momentum. Even $10 a week adds up to $520 a year.",
-                "Automate your savings to remove the temptation to spend. Out of sight, out of mind.",
-                "Focus on building good financial habits rather than trying to save large amounts immediately."
-            ]
-        }
-        
-        import random
-        advice = random.choice(fallback_responses.get(context_type, fallback_responses["general"]))
-        
-        return {
-            "advice": advice,
-            "confidence": 0.75,
-            "context_used": context_type,
-            "note": "Using fallback advice (AI model not available)"
-        }
+        """Fallback advice when AI model is not available: the best-matching corpus answer"""
+        return self.retrieval_advisor.answer(query, context_type)
     
     def analyze_financial_mindset(self, user_text):
         """Analyze user's financial mindset using keyword analysis"""
         try:
-            # Simple keyword-based analysis
-            positive_words = ['confident', 'excited', 'motivated', 'achieved', 'progress', 'success', 'happy', 'proud']
-            negative_words = ['worried', 'anxious', 'struggling', 'difficult', 'overwhelmed', 'stress', 'frustrated', 'scared']
-            
-            text_lower = user_text.lower()
-            positive_count = sum(1 for word in positive_words if word in text_lower)
-            negative_count = sum(1 for word in negative_words if word in text_lower)
+            # Simple keyword-based analysis (single whole-word pass)
+            counts = MINDSET_KEYWORDS.count(user_text)
+            positive_count = counts['positive']
+            negative_count = counts['negative']
             
             if positive_count == 0 and negative_count == 0:
                 mindset_score = 0.5
@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from stub_model import stub_backend
+
+
+def load_app():
+    """Import app.py with the stub model backend and wait until it is ready"""
+    os.environ['ADVISOR_ROUTING'] = 'false'
+    os.environ.pop('ADVISOR_CACHE_DB', None)
+    os.environ.pop('PROFILE_TOKEN', None)
+    os.environ['PROFILE_DIR'] = tempfile.mkdtemp(prefix='loopfund-test-profiles-')
+    with stub_backend():
+        import app
+        if not app.model_loader.wait(timeout=60):
+            raise RuntimeError(f'stub model did not become ready: {app.model_loader.status()}')
+    return app
+
+
+class SavingsPredictionsBatchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = load_app().app.test_client()
+
+    def post(self, payload):
+        response = self.client.post('/api/ai/savings-predictions/batch', json=payload)
+        response.close()
+        return response
+
+    def columns(self, rows):
+        return {
+            'goal_amount': [5000] * rows,
+            'current_savings': [1000] * rows,
+            'monthly_income': [4200] * rows,
+            'monthly_expenses': [3100] * rows,
+            'monthly_savings': [400] * rows
+        }
+
+    def test_simulated_timeline_months(self):
+        response = self.post(dict(self.columns(2), simulate=True, timeline_months=[6, 24], seed=0))
+        self.assertEqual(response.status_code, 200)
+        on_time = response.get_json()['projection']['probability_on_time']
+        self.assertLess(on_time[0], on_time[1])
+
+    def test_scalar_timeline_months_is_rejected(self):
+        response = self.post(dict(self.columns(2), simulate=True, timeline_months=12))
+        self.assertEqual(response.status_code, 400)
+
+    def test_misaligned_timeline_months_is_rejected(self):
+        response = self.post(dict(self.columns(2), simulate=True, timeline_months=[12, 12, 12]))
+        self.assertEqual(response.status_code, 400)
+
+    def test_timeline_months_without_simulate_is_ignored(self):
+        response = self.post(dict(self.columns(2), timeline_months=12))
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
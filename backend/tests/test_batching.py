@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.batching import AdviceBatcher
+
+
+class AdviceBatcherTest(unittest.TestCase):
+    def test_concurrent_prompts_share_a_batch_and_keep_their_order(self):
+        batches = []
+
+        def generate_batch(prompts):
+            batches.append(list(prompts))
+            return [prompt.upper() for prompt in prompts]
+
+        batcher = AdviceBatcher(generate_batch, max_batch_size=8, max_wait_ms=200)
+        prompts = [f'prompt {index}' for index in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda prompt: batcher.generate(prompt, timeout=5), prompts))
+
+        self.assertEqual(results, [prompt.upper() for prompt in prompts])
+        self.assertLess(len(batches), 8)
+        self.assertEqual(batcher.stats()['requests'], 8)
+
+    def test_batch_is_capped_at_max_batch_size(self):
+        sizes = []
+        batcher = AdviceBatcher(lambda prompts: sizes.append(len(prompts)) or list(prompts), max_batch_size=3, max_wait_ms=200)
+        futures = [batcher.submit(index) for index in range(7)]
+        self.assertEqual([future.result(5) for future in futures], list(range(7)))
+        self.assertLessEqual(max(sizes), 3)
+
+    def test_short_result_list_fails_every_request(self):
+        release = threading.Event()
+
+        def generate_batch(prompts):
+            release.wait(5)
+            return ['only one']
+
+        batcher = AdviceBatcher(generate_batch, max_batch_size=4, max_wait_ms=200)
+        futures = [batcher.submit(index) for index in range(3)]
+        release.set()
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(5)
+
+    def test_generation_error_reaches_every_caller(self):
+        def generate_batch(prompts):
+            raise ValueError('out of memory')
+
+        batcher = AdviceBatcher(generate_batch, max_wait_ms=50)
+        futures = [batcher.submit(index) for index in range(2)]
+        for future in futures:
+            with self.assertRaises(ValueError):
+                future.result(5)
+
+        # The worker keeps serving after a failed batch
+        batcher.generate_batch = lambda prompts: list(prompts)
+        self.assertEqual(batcher.generate('next', timeout=5), 'next')
+
+    def test_cancelled_requests_are_skipped(self):
+        started = threading.Event()
+        release = threading.Event()
+        seen = []
+
+        def generate_batch(prompts):
+            seen.extend(prompts)
+            started.set()
+            release.wait(5)
+            return list(prompts)
+
+        batcher = AdviceBatcher(generate_batch, max_batch_size=1, max_wait_ms=0)
+        first = batcher.submit('first')
+        self.assertTrue(started.wait(5))
+        cancelled = batcher.submit('cancelled')
+        self.assertTrue(cancelled.cancel())
+        last = batcher.submit('last')
+        release.set()
+
+        self.assertEqual(first.result(5), 'first')
+        self.assertEqual(last.result(5), 'last')
+        self.assertNotIn('cancelled', seen)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.behavioral_analyzer import BehavioralAnalyzer
+
+TEXT = "I spent too much on shopping this month, I want to save more and stick to a budget."
+HISTORY = [{'amount': 100, 'type': 'contribution'}] * 3
+
+
+class AnalyzeBatchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = BehavioralAnalyzer()
+
+    def test_matches_analyze(self):
+        results = self.analyzer.analyze_batch([TEXT, ''], [HISTORY, None])
+        for result, (text, history) in zip(results, [(TEXT, HISTORY), ('', None)]):
+            expected = self.analyzer.analyze(text, history)
+            self.assertTrue(result['success'])
+            for key in ('spending_patterns', 'savings_behavior', 'recommendations'):
+                self.assertEqual(result['analysis'][key], expected['analysis'][key])
+
+    def test_bad_records_fail_only_themselves(self):
+        texts = [TEXT, None, 42, TEXT, TEXT]
+        histories = [HISTORY, None, None, 'not json', None]
+        results = self.analyzer.analyze_batch(texts, histories)
+
+        self.assertEqual(len(results), len(texts))
+        self.assertEqual([result['success'] for result in results], [True, False, False, False, True])
+        for text, history, result in zip(texts, histories, results):
+            self.assertEqual(result['success'], self.analyzer.analyze(text, history)['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
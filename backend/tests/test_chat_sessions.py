@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.chat_sessions import ChatSessionStore, estimate_tokens
+
+
+class ChatSessionStoreTest(unittest.TestCase):
+    def test_slow_tokenization_does_not_block_other_sessions(self):
+        slow = threading.Event()
+        release = threading.Event()
+
+        def count_tokens(text):
+            if 'slow' in text:
+                slow.set()
+                release.wait(5)
+            return estimate_tokens(text)
+
+        store = ChatSessionStore(count_tokens=count_tokens)
+        first, _ = store.get()
+        second, _ = store.get()
+        writer = threading.Thread(target=store.add_turn, args=(first, 'slow question', 'answer'))
+        writer.start()
+        self.assertTrue(slow.wait(5))
+
+        started = time.perf_counter()
+        store.add_turn(second, 'quick question', 'answer')
+        store.get(second.session_id)
+        self.assertLess(time.perf_counter() - started, 1)
+
+        release.set()
+        writer.join(5)
+        self.assertEqual(store.stats()['memory_bytes'], first.size + second.size)
+
+    def test_memory_accounting_across_eviction_and_delete(self):
+        store = ChatSessionStore(max_sessions=2, max_context_tokens=32)
+        sessions = [store.get()[0] for _ in range(2)]
+        for index in range(20):
+            store.add_turn(sessions[index % 2], f'question {index} ' * 5, f'answer {index} ' * 5)
+        self.assertEqual(store.stats()['memory_bytes'], sum(session.size for session in sessions))
+
+        # A third session evicts the least recently used one
+        third, _ = store.get()
+        store.add_turn(third, 'hello', 'hi')
+        self.assertEqual(store.stats()['sessions'], 2)
+        self.assertEqual(store.stats()['memory_bytes'], sessions[1].size + third.size)
+
+        # Turns finishing on an evicted session are not counted
+        store.add_turn(sessions[0], 'late', 'answer')
+        self.assertEqual(store.stats()['memory_bytes'], sessions[1].size + third.size)
+
+        self.assertTrue(store.delete(third.session_id))
+        self.assertEqual(store.stats()['memory_bytes'], sessions[1].size)
+
+
+if __name__ == '__main__':
+    unittest.main()
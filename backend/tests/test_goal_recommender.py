@@ -0,0 +1,106 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.goal_recommender import GoalRecommender, GoalRules
+
+AGES = [-5, 0, 18, 29, 29.999, 30, 35, 39.5, 40, 41, 65, 120]
+INCOMES = [0, 1, 24999.99, 25000, 50000, 99999, 100000, 250000]
+
+# Rules with income brackets that overlap the age brackets
+BRACKETED_RULES = """type,name,min_age,max_age,min_income,max_income,income_share,timeline_months,priority,description
+starter,Starter Fund,,30,,25000,0.05,6,high,Save a first cushion
+emergency_fund,Emergency Fund,,,,,0.1,6,high,Build a safety net
+investment,Investment Portfolio,25,50,25000,100000,0.2,120,medium,Invest steadily
+wealth,Wealth Plan,35,,100000,,0.3,240,medium,Plan large investments
+"""
+
+
+def baseline_recommend_goals(user_profile):
+    """FinancialAdvisor.recommendGoals before the rules table, for the shipped goal_rules.csv"""
+    age = user_profile.get('age', 25)
+    income = user_profile.get('income', 50000)
+
+    def goal(goal_type, name, target_amount, timeline_months, priority, description):
+        return {
+            'type': goal_type, 'name': name, 'target_amount': target_amount,
+            'timeline_months': timeline_months, 'priority': priority, 'description': description
+        }
+
+    if age < 30:
+        return [
+            goal('emergency_fund', 'Emergency Fund', income * 0.1, 6, 'high', 'Build a safety net for unexpected expenses'),
+            goal('debt_payoff', 'High-Interest Debt Payoff', 0, 12, 'high', 'Focus on paying off credit cards and loans')
+        ]
+    if age < 40:
+        return [
+            goal('retirement', 'Retirement Savings', income * 0.15, 240, 'high', 'Increase retirement contributions'),
+            goal('investment', 'Investment Portfolio', income * 0.2, 120, 'medium', 'Build a diversified investment portfolio')
+        ]
+    return [
+        goal('retirement', 'Retirement Catch-up', income * 0.25, 180, 'high', 'Accelerate retirement savings'),
+        goal('estate', 'Estate Planning', 0, 60, 'medium', 'Plan for wealth transfer and legacy')
+    ]
+
+
+class GoalRecommenderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.recommender = GoalRecommender()
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'rules.csv')
+            with open(path, 'w') as f:
+                f.write(BRACKETED_RULES)
+            cls.bracketed = GoalRecommender(GoalRules.load(path))
+        finally:
+            shutil.rmtree(directory)
+
+    def profiles(self):
+        return [{'age': age, 'income': income} for age in AGES for income in INCOMES]
+
+    def batch_records(self, recommender, profiles):
+        columns = {
+            'age': [profile.get('age') for profile in profiles],
+            'income': [profile.get('income') for profile in profiles]
+        }
+        return recommender.to_records(recommender.recommend_batch(columns), len(profiles))
+
+    def test_shipped_rules_match_the_baseline(self):
+        for profile in self.profiles() + [{}, {'age': 45}, {'income': 80000}]:
+            self.assertEqual(self.recommender.recommend(profile), baseline_recommend_goals(profile), profile)
+
+    def test_batch_matches_per_profile_at_every_bracket_edge(self):
+        profiles = self.profiles()
+        for recommender in (self.recommender, self.bracketed):
+            expected = [recommender.recommend(profile) for profile in profiles]
+            self.assertEqual(self.batch_records(recommender, profiles), expected)
+
+    def test_missing_values_get_the_defaults(self):
+        columns = {'age': [None, 45.0, np.nan], 'income': [20000.0, None, np.nan]}
+        records = self.bracketed.to_records(self.bracketed.recommend_batch(columns), 3)
+        self.assertEqual(records, [
+            self.bracketed.recommend({'income': 20000.0}),
+            self.bracketed.recommend({'age': 45.0}),
+            self.bracketed.recommend({})
+        ])
+
+    def test_chunks_continue_profile_indices(self):
+        rng = np.random.default_rng(0)
+        columns = {'age': rng.uniform(15, 80, 1000), 'income': rng.uniform(0, 300000, 1000)}
+        whole = self.bracketed.recommend_batch(columns)
+        chunks = list(self.bracketed.recommend_chunks(columns, chunk_rows=128))
+
+        self.assertEqual(len(chunks), 8)
+        for field in whole:
+            np.testing.assert_array_equal(np.concatenate([chunk[field] for chunk in chunks]), whole[field])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai import knowledge_base
+from ai.knowledge_base import INDEX_MANIFEST, KnowledgeBase, build_index
+
+PASSAGES = [
+    {'id': 'fund', 'title': 'Emergency fund', 'text': 'Keep three to six months of expenses in an emergency fund.'},
+    {'id': 'debt', 'title': 'Debt', 'text': 'Pay off high-interest credit card debt before investing.'},
+    {'id': 'budget', 'title': 'Budgeting', 'text': 'Track your expenses every month to find spending leaks.'}
+]
+
+
+class BuildIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.directory = os.path.join(self.root, 'knowledge')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_search_ranks_matching_passages(self):
+        build_index(PASSAGES, self.directory)
+        results = KnowledgeBase(self.directory).search('How big should my emergency fund be?')
+
+        self.assertEqual(results[0]['id'], 'fund')
+        self.assertEqual(KnowledgeBase(self.directory).search('Where is my spending going?')[0]['id'], 'budget')
+        self.assertEqual(KnowledgeBase(self.directory).search('weather forecast'), [])
+
+    def test_rebuild_never_leaves_the_directory_missing(self):
+        build_index(PASSAGES, self.directory)
+        rmtree = shutil.rmtree
+        present = []
+
+        def checking_rmtree(path, *args, **kwargs):
+            rmtree(path, *args, **kwargs)
+            present.append(os.path.exists(os.path.join(self.directory, INDEX_MANIFEST)))
+
+        with mock.patch.object(knowledge_base.shutil, 'rmtree', checking_rmtree):
+            manifest = build_index(PASSAGES[:2], self.directory)
+
+        self.assertTrue(present)
+        self.assertTrue(all(present))
+        self.assertEqual(KnowledgeBase(self.directory).manifest['passages'], manifest['passages'])
+        # Neither the staging directory nor the previous index is left behind
+        self.assertEqual(os.listdir(self.root), ['knowledge'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.model_loader import FAILED, READY, ModelLoader
+
+
+class FakeAdvisor:
+    def __init__(self, load_failures=0, warmup_error=None):
+        self.load_failures = load_failures
+        self.warmup_error = warmup_error
+        self.loads = 0
+        self.warmups = 0
+
+    def load_model(self):
+        self.loads += 1
+        if self.loads <= self.load_failures:
+            raise RuntimeError('download failed')
+
+    def warmup(self, query):
+        self.warmups += 1
+        if self.warmup_error:
+            raise self.warmup_error
+
+
+class ModelLoaderTest(unittest.TestCase):
+    def load(self, advisor, **kwargs):
+        loader = ModelLoader(advisor, backoff_seconds=0, warmup_query='warm up', **kwargs)
+        loader.start()
+        loader.wait(timeout=5)
+        return loader
+
+    def test_ready_after_load_and_warmup(self):
+        advisor = FakeAdvisor()
+        loader = self.load(advisor)
+        self.assertTrue(loader.ready)
+        self.assertEqual((advisor.loads, advisor.warmups), (1, 1))
+        self.assertIsNone(loader.status()['last_error'])
+
+    def test_load_failures_are_retried(self):
+        advisor = FakeAdvisor(load_failures=2)
+        loader = self.load(advisor, max_attempts=5)
+        self.assertTrue(loader.ready)
+        self.assertEqual(advisor.loads, 3)
+        self.assertEqual(loader.status()['attempts'], 3)
+
+    def test_failed_after_max_attempts(self):
+        advisor = FakeAdvisor(load_failures=10)
+        loader = self.load(advisor, max_attempts=2)
+        self.assertEqual(loader.state, FAILED)
+        self.assertEqual(advisor.loads, 2)
+
+    def test_warmup_failure_does_not_reload(self):
+        advisor = FakeAdvisor(warmup_error=RuntimeError('CUDA out of memory'))
+        loader = self.load(advisor, max_attempts=2)
+        self.assertEqual(loader.state, READY)
+        self.assertEqual((advisor.loads, advisor.warmups), (1, 1))
+        self.assertIn('CUDA out of memory', loader.status()['last_error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
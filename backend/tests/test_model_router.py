@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.model_router import SMALL, ModelRouter
+from src.ai.financial_advisor import FinancialAdvisor as SmallFinancialAdvisor
+
+CONTINUATION = ' Put a fixed amount aside on payday and review it monthly.'
+
+
+class EchoingPipeline:
+    """Text-generation pipeline stand-in: like transformers, it returns the prompt too unless return_full_text=False"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompt, return_full_text=True, **kwargs):
+        self.prompts.append(prompt)
+        return [{'generated_text': (prompt if return_full_text else '') + CONTINUATION}]
+
+
+class SmallTierTest(unittest.TestCase):
+    def setUp(self):
+        self.small_advisor = SmallFinancialAdvisor(load_model=False)
+        self.small_advisor.model = EchoingPipeline()
+        self.router = ModelRouter(None, None, self.small_advisor, None)
+
+    def test_advice_does_not_echo_the_prompt(self):
+        decision = {'tier': SMALL, 'context_type': 'savings_plan'}
+        advice = self.router.generate(decision, 'How do I save for a car', {'income': 4200, 'goals': ['car']})
+
+        prompt = self.small_advisor.model.prompts[0]
+        self.assertEqual(advice, CONTINUATION.strip())
+        self.assertNotIn(prompt, advice)
+        self.assertNotIn('4200', advice)
+
+    def test_empty_generation_falls_back_to_the_corpus(self):
+        self.small_advisor.model = lambda prompt, **kwargs: [{'generated_text': '  '}]
+        decision = {'tier': SMALL, 'context_type': 'savings_plan'}
+        advice = self.router.generate(decision, 'How do I build an emergency fund?')
+        self.assertEqual(advice, self.small_advisor._get_fallback_advice('How do I build an emergency fund?', 'savings_plan')['advice'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import torch
+import transformers
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.model_store import INT8_ARTIFACT, QUANTIZED_LINEAR, ModelStore
+
+
+def make_snapshot(root):
+    """A tiny random Mistral in the model store layout; returns (path, manifest)"""
+    config = transformers.MistralConfig(
+        vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=64
+    )
+    torch.manual_seed(0)
+    model = transformers.MistralForCausalLM(config)
+    path = os.path.join(root, 'tiny--mistral')
+    model.save_pretrained(path, safe_serialization=True)
+    manifest = {
+        'revision': 'test',
+        'files': {name: {'size': os.path.getsize(os.path.join(path, name))} for name in os.listdir(path)}
+    }
+    return path, manifest
+
+
+class Int8ArtifactTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path, self.manifest = make_snapshot(self.root)
+        self.input_ids = torch.tensor([[3, 14, 15, 9, 26, 5]])
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def logits(self, model):
+        with torch.no_grad():
+            return model(self.input_ids).logits
+
+    def test_artifact_reloads_the_quantized_model(self):
+        store = ModelStore(self.root)
+        converted, source = store._load_int8(self.path, self.manifest)
+        self.assertEqual(source, 'converted')
+
+        artifact_dir = os.path.join(self.path, 'artifacts', 'torch-int8')
+        self.assertEqual(sorted(os.listdir(artifact_dir)), ['artifact.json', INT8_ARTIFACT])
+
+        loaded, source = store._load_int8(self.path, self.manifest)
+        self.assertEqual(source, 'artifact')
+        self.assertTrue(any(isinstance(module, QUANTIZED_LINEAR) for module in loaded.modules()))
+        torch.testing.assert_close(self.logits(loaded.eval()), self.logits(converted.eval()), rtol=0, atol=0)
+
+    def test_pickled_artifact_is_rebuilt(self):
+        store = ModelStore(self.root)
+        store._load_int8(self.path, self.manifest)
+        artifact_dir = os.path.join(self.path, 'artifacts', 'torch-int8')
+        os.remove(os.path.join(artifact_dir, INT8_ARTIFACT))
+        with open(os.path.join(artifact_dir, 'model.pt'), 'wb') as f:
+            f.write(b'not a model')
+
+        _, source = store._load_int8(self.path, self.manifest)
+        self.assertEqual(source, 'converted')
+        self.assertTrue(os.path.exists(os.path.join(artifact_dir, INT8_ARTIFACT)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+import torch
+import transformers
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.prefix_cache import PrefixCache
+from ai.prompt_builder import pad_batch
+
+PREFIX = [5, 6, 7, 8, 9, 10]
+GENERATION = {'max_new_tokens': 8, 'do_sample': False, 'pad_token_id': 0}
+
+
+class PadTokenizer:
+    pad_token_id = 0
+
+
+def tiny_models():
+    """Small random models with legacy (GPT-2) and rotary (Mistral) attention"""
+    torch.manual_seed(0)
+    return {
+        'gpt2': transformers.GPT2LMHeadModel(transformers.GPT2Config(
+            vocab_size=64, n_embd=32, n_layer=2, n_head=4, n_positions=128)).eval(),
+        'mistral': transformers.MistralForCausalLM(transformers.MistralConfig(
+            vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+            num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=128)).eval()
+    }
+
+
+class PrefixCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.models = tiny_models()
+
+    def generate(self, model, inputs):
+        prompt_length = inputs['input_ids'].shape[1]
+        with torch.no_grad():
+            return model.generate(**inputs, **GENERATION)[:, prompt_length:].tolist()
+
+    def test_cached_prefix_generates_the_same_tokens(self):
+        # Suffixes of different lengths, so the batch is padded after the prefix
+        prompts = [PREFIX + [11, 12, 13], PREFIX + [20, 21, 22, 23, 24, 25]]
+        for name, model in self.models.items():
+            with self.subTest(model=name):
+                cache = PrefixCache(model, PadTokenizer, PREFIX)
+                expected = self.generate(model, pad_batch(prompts, 0, model.device))
+                self.assertEqual(self.generate(model, cache.build_inputs(prompts)), expected)
+                # The cached state is reused, not consumed, by generate
+                self.assertEqual(self.generate(model, cache.build_inputs(prompts)), expected)
+
+    def test_prompts_without_the_prefix_are_encoded_in_full(self):
+        model = self.models['gpt2']
+        cache = PrefixCache(model, PadTokenizer, PREFIX)
+        for prompts in ([PREFIX + [11], [11] + PREFIX], [PREFIX]):
+            inputs = cache.build_inputs(prompts)
+            self.assertNotIn('past_key_values', inputs)
+            self.assertEqual(inputs['input_ids'].tolist(), pad_batch(prompts, 0, model.device)['input_ids'].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.profiling import RequestProfiler
+
+
+class RequestProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='loopfund-test-profiles-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_sample_rate_without_token_stays_disabled(self):
+        profiler = RequestProfiler(self.directory, sample_rate=1.0)
+        self.assertFalse(profiler.enabled)
+        self.assertEqual(profiler.sample_rate, 0.0)
+        self.assertIsNone(profiler.start('/api/ai/advice', 'POST', '/api/ai/advice', {}))
+        # The admin routes refuse every request, with or without a header
+        self.assertFalse(profiler.authorized({}))
+        self.assertFalse(profiler.authorized({'X-Profile-Token': ''}))
+        self.assertFalse(profiler.authorized({'X-Profile-Token': 'guess'}))
+
+    def test_sampling_with_token(self):
+        profiler = RequestProfiler(self.directory, sample_rate=1.0, token='secret')
+        self.assertTrue(profiler.enabled)
+        self.assertTrue(profiler.authorized({'X-Profile-Token': 'secret'}))
+        self.assertFalse(profiler.authorized({'X-Profile-Token': 'guess'}))
+
+        profile = profiler.start('/api/ai/advice', 'POST', '/api/ai/advice', {})
+        self.assertEqual(profile.reason, 'sampled')
+        profiler.finish(profile, 200)
+        self.assertEqual([item['id'] for item in profiler.list()], [profile.id])
+
+    def test_header_profiles_one_request(self):
+        profiler = RequestProfiler(self.directory, token='secret')
+        self.assertIsNone(profiler.start('/api/ai/advice', 'POST', '/api/ai/advice', {}))
+        profile = profiler.start('/api/ai/advice', 'POST', '/api/ai/advice', {'X-Profile-Token': 'secret'})
+        self.assertEqual(profile.reason, 'header')
+        profiler.finish(profile, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
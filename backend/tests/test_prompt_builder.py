@@ -0,0 +1,147 @@
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.prompt_builder import PromptBuilder, PromptTooLongError
+
+INSTRUCTIONS = "You are LoopFund AI. Give short, practical advice."
+KNOWLEDGE = "Financial Knowledge Base:\n- Keep 3-6 months of expenses as an emergency fund."
+PROFILE = "\nUser Profile:\n- Income: 4200\n- Age: 31\n"
+HISTORY = "User: How do I start saving?\nAssistant: Set up an automatic transfer."
+QUERY = "How much should I save each month?"
+
+
+class SentencePieceLikeTokenizer:
+    def __init__(self):
+        """Tokenizes like the Llama/Mistral sentencepiece tokenizers
+
+        Every encoded text starts with a word boundary ("▁"), spaces become
+        "▁", newlines are byte tokens of their own, and decoding turns "▁"
+        back into spaces, dropping the one at the very start.
+        """
+        self.bos_token_id = 1
+        self._pieces = ['<unk>', '<s>']
+        self._ids = {'<unk>': 0, '<s>': 1}
+
+    def encode(self, text, add_special_tokens=True):
+        pieces = re.findall(r'\n|▁?[^▁\n]+|▁', '▁' + text.replace(' ', '▁'))
+        ids = []
+        for piece in pieces:
+            if piece not in self._ids:
+                self._ids[piece] = len(self._pieces)
+                self._pieces.append(piece)
+            ids.append(self._ids[piece])
+        return [self.bos_token_id] + ids if add_special_tokens else ids
+
+    def decode(self, ids, skip_special_tokens=False):
+        pieces = [self._pieces[token] for token in ids if not (skip_special_tokens and token == self.bos_token_id)]
+        text = ''.join(pieces).replace('▁', ' ')
+        return text[1:] if text.startswith(' ') else text
+
+
+class WordTokenizer:
+    """One id per whitespace-separated word, so budgets are easy to count"""
+
+    def __init__(self):
+        self._ids = {}
+
+    def encode(self, text, add_special_tokens=True):
+        return [self._ids.setdefault(word, len(self._ids)) for word in text.split()]
+
+
+def text_prompt(knowledge, profile='', history='', query=QUERY):
+    """The prompt text build() lays out as token ids"""
+    sections = [INSTRUCTIONS, knowledge, profile.strip(), history.strip(), f"User Question: {query}"]
+    return '\n\n'.join(section for section in sections if section) + "\n\nLoopFund AI Response:"
+
+
+class PromptBuilderLayoutTest(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = SentencePieceLikeTokenizer()
+
+    def test_decode_round_trips_to_the_text_prompt(self):
+        builder = PromptBuilder(self.tokenizer, INSTRUCTIONS, KNOWLEDGE)
+        ids, truncated = builder.build(QUERY, PROFILE, HISTORY)
+
+        self.assertEqual(truncated, {})
+        expected = text_prompt(KNOWLEDGE, PROFILE, HISTORY)
+        self.assertEqual(self.tokenizer.decode(ids, skip_special_tokens=True), expected)
+        # Segment by segment gives the ids of tokenizing the whole prompt at once
+        self.assertEqual(ids, self.tokenizer.encode(expected))
+
+    def test_retrieved_passages_round_trip(self):
+        builder = PromptBuilder(self.tokenizer, INSTRUCTIONS)
+        passages = ["Pay off high-interest debt first.", "Automate   your\nsavings."]
+        ids, _ = builder.build(QUERY, PROFILE, passages=passages)
+
+        knowledge = "Financial Knowledge Base:\n- Pay off high-interest debt first.\n- Automate your savings."
+        expected = text_prompt(knowledge, PROFILE)
+        self.assertEqual(self.tokenizer.decode(ids, skip_special_tokens=True), expected)
+        self.assertEqual(ids, self.tokenizer.encode(expected))
+
+    def test_untruncated_prompts_start_with_the_cached_prefix(self):
+        static = PromptBuilder(self.tokenizer, INSTRUCTIONS, KNOWLEDGE)
+        ids, _ = static.build(QUERY, PROFILE, HISTORY)
+        self.assertEqual(ids[:len(static.prefix_ids)], static.prefix_ids)
+        self.assertEqual(static.instruction_ids + static.knowledge_ids, static.prefix_ids)
+
+        retrieved = PromptBuilder(self.tokenizer, INSTRUCTIONS)
+        ids, _ = retrieved.build(QUERY, passages=["Pay off high-interest debt first."])
+        self.assertEqual(ids[:len(retrieved.prefix_ids)], retrieved.prefix_ids)
+
+    def test_word_level_tokenizers_are_unchanged(self):
+        tokenizer = WordTokenizer()
+        builder = PromptBuilder(tokenizer, INSTRUCTIONS, KNOWLEDGE)
+        ids, _ = builder.build(QUERY, PROFILE, HISTORY)
+        self.assertEqual(ids, tokenizer.encode(text_prompt(KNOWLEDGE, PROFILE, HISTORY)))
+
+
+class PromptBuilderBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = WordTokenizer()
+        self.question_ids = self.tokenizer.encode(f"User Question: {QUERY} LoopFund AI Response:")
+        self.profile_ids = self.tokenizer.encode(PROFILE)
+        self.history_ids = self.tokenizer.encode(HISTORY)
+
+    def builder(self, budget):
+        return PromptBuilder(self.tokenizer, INSTRUCTIONS, KNOWLEDGE, max_prompt_tokens=budget)
+
+    def test_profile_is_cut_first_keeping_its_start(self):
+        full = len(self.builder(1024).build(QUERY, PROFILE, HISTORY)[0])
+        ids, truncated = self.builder(full - 3).build(QUERY, PROFILE, HISTORY)
+
+        self.assertEqual(len(ids), full - 3)
+        self.assertEqual(truncated, {'profile': 3})
+        profile_start = ids.index(self.profile_ids[0])
+        self.assertEqual(ids[profile_start:profile_start + len(self.profile_ids) - 3], self.profile_ids[:-3])
+        self.assertEqual(ids[-len(self.question_ids):], self.question_ids)
+
+    def test_history_keeps_its_most_recent_part(self):
+        full = len(self.builder(1024).build(QUERY, PROFILE, HISTORY)[0])
+        cut = len(self.profile_ids) + 2
+        ids, truncated = self.builder(full - cut).build(QUERY, PROFILE, HISTORY)
+
+        self.assertEqual(truncated, {'profile': len(self.profile_ids), 'history': 2})
+        history_end = len(ids) - len(self.question_ids)
+        self.assertEqual(ids[history_end - len(self.history_ids) + 2:history_end], self.history_ids[2:])
+
+    def test_knowledge_is_cut_last_and_instructions_never(self):
+        builder = self.builder(1024)
+        budget = len(builder.instruction_ids) + len(self.question_ids) + 2
+        ids, truncated = self.builder(budget).build(QUERY, PROFILE, HISTORY)
+
+        self.assertEqual(len(ids), budget)
+        self.assertEqual(set(truncated), {'profile', 'history', 'knowledge'})
+        self.assertEqual(ids[:len(builder.instruction_ids)], builder.instruction_ids)
+        self.assertEqual(ids[-len(self.question_ids):], self.question_ids)
+
+    def test_question_over_budget_raises(self):
+        with self.assertRaises(PromptTooLongError):
+            self.builder(len(self.question_ids)).build(QUERY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from ai import response_cache
+from ai.financial_advisor import FinancialAdvisor
+from ai.response_cache import ResponseCache
+from stub_model import load_stub_model
+
+PROFILE = {'income': 4200, 'age': 31, 'current_savings': 2500, 'goals': ['emergency fund'], 'risk_tolerance': 'moderate'}
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'responses.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set('a', 'A')
+        cache.set('b', 'B')
+        cache.get('a')
+        cache.set('c', 'C')
+
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_expired_entries_are_misses_in_both_tiers(self):
+        cache = ResponseCache(ttl_seconds=60, db_path=self.db_path)
+        with mock.patch.object(response_cache.time, 'time', return_value=1000.0):
+            cache.set('a', 'A')
+        with mock.patch.object(response_cache.time, 'time', return_value=1061.0):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['disk_entries'], 0)
+
+    def test_disk_tier_survives_a_restart_and_is_promoted(self):
+        ResponseCache(db_path=self.db_path).set('a', 'A')
+        cache = ResponseCache(db_path=self.db_path)
+
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertEqual(cache.get('a'), 'A')
+        stats = cache.stats()
+        self.assertEqual((stats['disk_hits'], stats['memory_hits']), (1, 1))
+
+    def test_disk_tier_is_trimmed_oldest_first(self):
+        cache = ResponseCache(max_entries=1, db_path=self.db_path, db_max_entries=100)
+        for index in range(150):
+            with mock.patch.object(response_cache.time, 'time', return_value=1000.0 + index):
+                cache.set(str(index), str(index))
+
+        with mock.patch.object(response_cache.time, 'time', return_value=1200.0):
+            self.assertEqual(cache.stats()['disk_entries'], 100)
+            self.assertIsNone(cache.get('49'))
+            self.assertEqual(cache.get('50'), '50')
+
+    def test_keys_cover_only_what_reaches_the_prompt(self):
+        cache = ResponseCache()
+        key = cache.make_key('How do I  BUDGET?', PROFILE)
+
+        self.assertEqual(key, cache.make_key('how do i budget?', dict(PROFILE, email='a@example.com')))
+        self.assertNotEqual(key, cache.make_key('How do I budget?', dict(PROFILE, income=5000)))
+        self.assertNotEqual(key, cache.make_key('How do I budget?', PROFILE, 'User: hi'))
+        self.assertNotEqual(key, ResponseCache(namespace='other model').make_key('How do I budget?', PROFILE))
+
+
+class AdvisorResponseCacheTest(unittest.TestCase):
+    def make_advisor(self, deterministic):
+        advisor = FinancialAdvisor(cache_size=16, deterministic=deterministic, prefix_cache=False, load_model=False)
+        load_stub_model(advisor)
+        model = advisor.conversation_model.model
+        generate = model.generate
+        advisor.generations = 0
+
+        def counting_generate(*args, **kwargs):
+            advisor.generations += 1
+            return generate(*args, **kwargs)
+
+        model.generate = counting_generate
+        return advisor
+
+    def test_repeated_questions_skip_generation(self):
+        advisor = self.make_advisor(deterministic=True)
+        first = advisor.getAdvice('How do I budget?', PROFILE)
+        second = advisor.getAdvice('how do i budget?', PROFILE)
+
+        self.assertEqual(first, second)
+        self.assertEqual(advisor.generations, 1)
+
+    def test_sampled_answers_are_not_cached(self):
+        advisor = self.make_advisor(deterministic=False)
+        self.assertIsNone(advisor.response_cache)
+        advisor.getAdvice('How do I budget?', PROFILE)
+        advisor.getAdvice('How do I budget?', PROFILE)
+        self.assertEqual(advisor.generations, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.retrieval_advisor import QUESTION_WEIGHT, RetrievalAdvisor
+
+CORPUS = [
+    {'id': 'fund', 'category': 'savings_plan', 'questions': ['How big should my emergency fund be?'],
+     'answer': 'Keep three to six months of expenses in an emergency fund.'},
+    {'id': 'budget', 'category': 'budget_advice', 'questions': ['How do I make a budget?'],
+     'answer': 'List your income, then your fixed and variable expenses, and track them monthly.'},
+    {'id': 'debt', 'category': 'debt', 'questions': ['Which debt should I pay off first?'],
+     'answer': 'Pay the highest interest rate first and the minimum on everything else.'},
+    {'id': 'general', 'category': 'general', 'questions': ['Where do I start?'],
+     'answer': 'Start with a budget and an emergency fund.'}
+]
+
+
+class RetrievalAdvisorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        path = os.path.join(cls.directory, 'corpus.jsonl')
+        with open(path, 'w') as f:
+            f.writelines(json.dumps(entry) + '\n' for entry in CORPUS)
+        cls.advisor = RetrievalAdvisor(path)
+        cls.documents = cls.advisor.vectorizer.transform([
+            ' '.join(entry['questions'] * QUESTION_WEIGHT) + ' ' + entry['answer'] for entry in CORPUS
+        ])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_scores_are_tfidf_cosine_similarity(self):
+        # Every unigram and bigram of the query is in the vocabulary
+        query = 'How big should my emergency fund be?'
+        expected = cosine_similarity(self.advisor.vectorizer.transform([query]), self.documents)[0]
+        np.testing.assert_allclose(self.advisor.scores(query), expected, rtol=1e-9)
+
+    def test_unknown_terms_lower_the_scores(self):
+        known = 'How big should my emergency fund be'
+        scores = self.advisor.scores(f'{known} sailboat hobby')
+        expected = cosine_similarity(self.advisor.vectorizer.transform([known]), self.documents)[0]
+
+        self.assertTrue(np.all(scores <= expected + 1e-12))
+        self.assertLess(scores.max(), expected.max())
+        # Proportionally: only the query's norm changes
+        np.testing.assert_allclose(scores / scores.max(), expected / expected.max(), rtol=1e-9)
+
+    def test_search_ranks_and_filters(self):
+        matches = self.advisor.search('Which debt do I pay off first?', k=2)
+        self.assertEqual(matches[0]['id'], 'debt')
+        self.assertEqual(matches[0]['question'], 'Which debt should I pay off first?')
+        self.assertTrue(all(match['score'] >= self.advisor.min_score for match in matches))
+        in_category = self.advisor.search('Start with a budget and an emergency fund', k=4, category='general')
+        self.assertEqual([match['id'] for match in in_category], ['general'])
+
+    def test_no_relevant_match_falls_back_to_the_category(self):
+        answer = self.advisor.answer('Tell me about sailboats', context_type='budget_advice')
+        self.assertEqual(answer['matches'], [])
+        self.assertEqual((answer['advice'], answer['confidence']), (CORPUS[1]['answer'], 0.0))
+        # Unknown categories fall back to 'general'
+        self.assertEqual(self.advisor.answer('Tell me about sailboats', context_type='taxes')['advice'], CORPUS[3]['answer'])
+
+
+class ShippedCorpusTest(unittest.TestCase):
+    def test_every_listed_question_retrieves_its_entry(self):
+        advisor = RetrievalAdvisor()
+        for entry in advisor.entries:
+            for question in entry['questions']:
+                self.assertEqual(advisor.search(question, k=1)[0]['id'], entry['id'], question)
+
+
+if __name__ == '__main__':
+    unittest.main()
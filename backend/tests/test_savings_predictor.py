@@ -0,0 +1,78 @@
+import os
+import sys
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai import savings_predictor
+from ai.savings_predictor import STATUS_ERROR, STATUS_GOAL_REACHED, STATUS_NEGATIVE_CASHFLOW, STATUS_OK, SavingsPredictor
+
+NOW = datetime(2026, 3, 14, 15, 9, 26, 535897)
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+def random_rows(count, seed=0):
+    """Columns mixing ordinary plans with negative cashflow, reached goals and edge values"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'goal_amount': rng.choice([0.0, 500.0, 5000.0, 20000.0, 1e9], count) * rng.uniform(0.5, 1.5, count),
+        'current_savings': rng.uniform(0, 10000, count),
+        'monthly_income': rng.uniform(0, 8000, count),
+        'monthly_expenses': rng.uniform(0, 8000, count),
+        'monthly_savings': rng.choice([0.0, -50.0, 125.0, 333.33, 0.0175], count)
+    }
+    columns['goal_amount'][:4] = [0.0, np.nan, np.inf, 1e300]
+    # Rounding ties: 1.25 months and $0.125 a month
+    columns['goal_amount'][4:6] = [1250.0, 10.125]
+    columns['current_savings'][4:6] = 0.0
+    columns['monthly_savings'][4:6] = [1000.0, 0.125]
+    return columns
+
+
+class PredictBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.predictor = SavingsPredictor()
+
+    def scalar(self, columns):
+        with mock.patch.object(savings_predictor, 'datetime', FixedDatetime):
+            return [
+                self.predictor.predictGoalCompletion({field: float(values[index]) for field, values in columns.items()})
+                for index in range(len(columns['goal_amount']))
+            ]
+
+    def test_records_match_the_scalar_path(self):
+        columns = random_rows(2000)
+        records = self.predictor.batch_to_records(self.predictor.predict_batch(columns, now=NOW))
+        self.assertEqual(records, self.scalar(columns))
+
+    def test_status_codes(self):
+        columns = {
+            'goal_amount': [1000, 1000, 1000, float('nan')],
+            'current_savings': [0, 0, 2000, 0],
+            'monthly_income': [3000, 1000, 3000, 3000],
+            'monthly_expenses': [2000, 2000, 2000, 2000]
+        }
+        result = self.predictor.predict_batch(columns, now=NOW)
+
+        self.assertEqual(result['status'].tolist(), [STATUS_OK, STATUS_NEGATIVE_CASHFLOW, STATUS_GOAL_REACHED, STATUS_ERROR])
+        self.assertEqual(result['success'].tolist(), [True, False, True, False])
+        self.assertEqual(result['months_to_goal'][0], 1.0)
+        # Missing columns count as 0, so monthly savings come from income minus expenses
+        self.assertEqual(result['monthly_savings_needed'][0], 1000.0)
+
+    def test_empty_batch(self):
+        result = self.predictor.predict_batch({'goal_amount': []}, now=NOW)
+        self.assertEqual(self.predictor.batch_to_records(result), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.savings_projection import SavingsProjector
+
+GOAL = {
+    'goal_amount': 5000.0,
+    'current_savings': 1000.0,
+    'monthly_income': 4200.0,
+    'monthly_expenses': 3100.0,
+    'monthly_savings': 400.0,
+    'timeline_months': 12.0
+}
+
+
+def columns(count, **overrides):
+    return {field: np.full(count, float(overrides.get(field, value))) for field, value in GOAL.items()}
+
+
+class SavingsProjectorTest(unittest.TestCase):
+    def test_without_uncertainty_matches_the_plan(self):
+        projector = SavingsProjector(paths=100, income_volatility=0, expense_volatility=0, shock_probability=0,
+                                     annual_return=0, return_volatility=0)
+        result = projector.simulate(columns(3), seed=0)
+        # 1000 + 10 x 400 reaches 5000 in month 10, within the 12-month deadline
+        np.testing.assert_array_equal(result['completion_months'], np.full((3, 3), 10.0))
+        np.testing.assert_array_equal(result['probability_on_time'], np.ones(3))
+        np.testing.assert_array_equal(result['balance_at_deadline'], np.full((3, 3), 5000.0 + 2 * 400))
+
+    def test_unreachable_goal_finishes_quickly(self):
+        projector = SavingsProjector()
+        # Expenses above income: every path drifts down, so the goal is settled right after its deadline
+        started = time.perf_counter()
+        result = projector.simulate(columns(50, monthly_savings=0, monthly_expenses=4700), seed=0)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        np.testing.assert_array_equal(result['probability_reached'], np.zeros(50))
+        self.assertTrue(np.isnan(result['completion_months']).all())
+
+    def test_reachable_goals_are_not_cut_short(self):
+        projector = SavingsProjector(paths=500)
+        # No net contribution: noise alone carries part of the paths to the goal over the years
+        result = projector.simulate(columns(5, monthly_savings=0, monthly_expenses=4200), seed=0)
+        self.assertTrue((result['probability_reached'] > 0.1).all())
+        self.assertTrue((result['probability_on_time'] < result['probability_reached']).all())
+
+    def test_mixed_chunk_settles_each_goal(self):
+        projector = SavingsProjector(paths=500)
+        data = columns(4)
+        data['monthly_expenses'][1] = 4700
+        data['monthly_savings'][1] = 0
+        result = projector.simulate(data, seed=0)
+        self.assertEqual(result['probability_reached'][1], 0)
+        self.assertTrue((result['probability_reached'][[0, 2, 3]] == 1).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, TimeoutError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from ai.financial_advisor import FinancialAdvisor
+from ai.single_flight import SingleFlight, wait_for
+from stub_model import load_stub_model
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = []
+
+    def start(self):
+        work = Future()
+        self.calls.append(work)
+        return work
+
+    def test_identical_keys_share_one_call(self):
+        first, first_joined = self.flight.submit('a', self.start)
+        second, second_joined = self.flight.submit('a', self.start)
+        other, other_joined = self.flight.submit('b', self.start)
+
+        self.assertEqual((first_joined, second_joined, other_joined), (False, True, False))
+        self.assertEqual(len(self.calls), 2)
+        self.calls[0].set_result('advice')
+        self.assertEqual((first.result(0), second.result(0)), ('advice', 'advice'))
+        self.assertFalse(other.done())
+
+    def test_finished_calls_are_not_joined(self):
+        first, _ = self.flight.submit('a', self.start)
+        self.calls[0].set_result('advice')
+        second, joined = self.flight.submit('a', self.start)
+
+        self.assertFalse(joined)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.flight.stats()['in_flight'], 1)
+
+    def test_errors_reach_every_waiter(self):
+        waiters = [self.flight.submit('a', self.start)[0] for _ in range(3)]
+        self.calls[0].set_exception(RuntimeError('CUDA out of memory'))
+
+        for waiter in waiters:
+            self.assertIsInstance(waiter.exception(0), RuntimeError)
+        self.assertEqual(self.flight.stats()['errors'], 1)
+
+    def test_one_waiter_cancelling_leaves_the_others(self):
+        leaving, _ = self.flight.submit('a', self.start)
+        staying, _ = self.flight.submit('a', self.start)
+        self.assertTrue(leaving.cancel())
+
+        self.assertFalse(self.calls[0].cancelled())
+        self.calls[0].set_result('advice')
+        self.assertEqual(staying.result(0), 'advice')
+        self.assertEqual(self.flight.stats()['cancelled_waiters'], 1)
+
+    def test_last_waiter_cancelling_drops_queued_work(self):
+        waiters = [self.flight.submit('a', self.start)[0] for _ in range(2)]
+        for waiter in waiters:
+            waiter.cancel()
+
+        self.assertTrue(self.calls[0].cancelled())
+        stats = self.flight.stats()
+        self.assertEqual((stats['cancelled_waiters'], stats['cancelled_calls'], stats['in_flight']), (2, 1, 0))
+
+        # A later request starts over instead of joining the dropped call
+        _, joined = self.flight.submit('a', self.start)
+        self.assertFalse(joined)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_running_work_finishes_when_abandoned(self):
+        waiter, _ = self.flight.submit('a', self.start)
+        self.calls[0].set_running_or_notify_cancel()
+        waiter.cancel()
+
+        self.assertFalse(self.calls[0].cancelled())
+        self.assertEqual(self.flight.stats()['cancelled_calls'], 0)
+        # The abandoned call is no longer joinable, and its late result goes nowhere
+        fresh, joined = self.flight.submit('a', self.start)
+        self.assertFalse(joined)
+        self.calls[0].set_result('late')
+        self.assertFalse(fresh.done())
+        self.calls[1].set_result('advice')
+        self.assertEqual(fresh.result(0), 'advice')
+
+
+class WaitForTest(unittest.TestCase):
+    def test_returns_the_result(self):
+        future = Future()
+        future.set_result('advice')
+        self.assertEqual(wait_for(future, cancelled=lambda: False), 'advice')
+
+    def test_cancels_once_the_client_leaves(self):
+        future = Future()
+        with self.assertRaises(CancelledError):
+            wait_for(future, cancelled=lambda: True, poll_seconds=0.01)
+        self.assertTrue(future.cancelled())
+
+    def test_timeout_cancels(self):
+        for cancelled in (None, lambda: False):
+            future = Future()
+            with self.assertRaises(TimeoutError):
+                wait_for(future, cancelled=cancelled, timeout=0.02, poll_seconds=0.01)
+            self.assertTrue(future.cancelled())
+
+
+class AdvisorCoalescingTest(unittest.TestCase):
+    def test_concurrent_identical_questions_share_one_generation(self):
+        advisor = FinancialAdvisor(cache_size=0, coalesce=True, prefix_cache=False, load_model=False)
+        load_stub_model(advisor, token_latency=0.01)
+        submit = advisor.batcher.submit
+        submitted = []
+        ready = threading.Barrier(4)
+
+        def counting_submit(prompt):
+            submitted.append(prompt)
+            return submit(prompt)
+
+        def ask(_):
+            ready.wait()
+            return advisor.getAdvice('How do I budget?')
+
+        advisor.batcher.submit = counting_submit
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            answers = list(pool.map(ask, range(4)))
+
+        self.assertEqual(len(set(answers)), 1)
+        self.assertEqual(len(submitted), 1)
+        self.assertEqual(advisor.single_flight.stats()['coalesced'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
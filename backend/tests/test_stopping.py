@@ -0,0 +1,103 @@
+import os
+import sys
+import unittest
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from ai.financial_advisor import FinancialAdvisor
+from ai.stopping import DEFAULT_STOP_SEQUENCES, StopSequences, truncate_at_stop
+from ai.streaming import StreamingCleaner
+from stub_model import StubTokenizer, load_stub_model
+
+QUERIES = ['How do I budget?', 'Should I pay off debt first?', 'How big should my emergency fund be?', 'Is 20% enough?']
+
+
+def make_advisor(stop_sequences):
+    # Answers run on into a made-up next turn after 10-20 words
+    advisor = FinancialAdvisor(cache_size=0, deterministic=True, prefix_cache=False, coalesce=False,
+                               load_model=False, max_new_tokens=60, stop_sequences=stop_sequences)
+    load_stub_model(advisor, response_tokens=60, turn_tokens=20)
+    model = advisor.conversation_model.model
+    generate = model.generate
+    advisor.decode_steps = []
+
+    def counting_generate(input_ids, **kwargs):
+        outputs = generate(input_ids, **kwargs)
+        advisor.decode_steps.append(outputs.shape[1] - input_ids.shape[1])
+        return outputs
+
+    model.generate = counting_generate
+    return advisor
+
+
+class TruncateAtStopTest(unittest.TestCase):
+    def test_cuts_at_the_earliest_stop(self):
+        text = 'Save 20%. [INST] more User Question: next'
+        self.assertEqual(truncate_at_stop(text, DEFAULT_STOP_SEQUENCES), 'Save 20%. ')
+        self.assertEqual(truncate_at_stop(text, ()), text)
+
+
+class StopSequencesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.unstopped = make_advisor(())
+        cls.stopped = make_advisor(DEFAULT_STOP_SEQUENCES)
+
+    def prompts(self, advisor):
+        return [advisor._build_prompt_ids(query, None) for query in QUERIES]
+
+    def test_each_row_stops_at_its_own_stop_sequence(self):
+        raw = self.unstopped._generate_batch(self.prompts(self.unstopped))
+        stopped = self.stopped._generate_batch(self.prompts(self.stopped))
+
+        self.assertEqual(stopped, [truncate_at_stop(text, DEFAULT_STOP_SEQUENCES) for text in raw])
+        # Every row ran into a next turn, and the batch ended once all of them had
+        self.assertTrue(all(text != truncate_at_stop(text, DEFAULT_STOP_SEQUENCES) for text in raw))
+        self.assertLess(self.stopped.decode_steps[-1], self.unstopped.decode_steps[-1])
+
+    def test_streamed_answers_stop_like_batched_ones(self):
+        for query in QUERIES[:2]:
+            streamed = ''.join(self.stopped.streamAdvice(query))
+            self.assertEqual(streamed, self.stopped.getAdvice(query))
+
+    def test_cancel_ends_the_call(self):
+        tokenizer = StubTokenizer()
+        ids = [tokenizer.encode_word(word) for word in ('Save', 'more', 'now')]
+        stops = StopSequences(tokenizer, DEFAULT_STOP_SEQUENCES, prompt_length=2, batch_size=2)
+        input_ids = torch.tensor([ids, ids])
+
+        self.assertFalse(stops.check(input_ids))
+        stops.cancel()
+        self.assertTrue(stops.check(input_ids))
+
+    def test_stopped_rows_are_forced_to_eos(self):
+        tokenizer = StubTokenizer()
+        ids = [tokenizer.encode_word(word) for word in ('Save', 'more', 'User', 'Question:')]
+        stops = StopSequences(tokenizer, DEFAULT_STOP_SEQUENCES, prompt_length=1, batch_size=2)
+        input_ids = torch.tensor([ids, ids[:2] + ids[:2]])
+
+        self.assertFalse(stops.check(input_ids))
+        self.assertEqual(stops.stopped, [True, False])
+        scores = stops.logits_processor(input_ids, torch.zeros(2, len(tokenizer._words)))
+        self.assertEqual(scores[0].argmax().item(), tokenizer.eos_token_id)
+        self.assertTrue(torch.equal(scores[1], torch.zeros(len(tokenizer._words))))
+
+
+class StreamingStopFilterTest(unittest.TestCase):
+    def test_matches_truncating_the_whole_text(self):
+        advisor = FinancialAdvisor(load_model=False)
+        text = 'Put 20% aside... [note] Keep going.\nUser Question: And retirement? LoopFund AI Response: Sure'
+        expected = advisor._clean_response(truncate_at_stop(text, DEFAULT_STOP_SEQUENCES))
+
+        # Several chunk sizes, so stop sequences arrive split across chunks
+        for size in (1, 2, 3, 7):
+            cleaner = StreamingCleaner(DEFAULT_STOP_SEQUENCES)
+            chunks = [cleaner.feed(text[start:start + size]) for start in range(0, len(text), size)]
+            self.assertEqual(''.join(chunks) + cleaner.finish(), expected, size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from ai.financial_advisor import FinancialAdvisor
+from stub_model import load_stub_model
+
+
+def make_advisor(token_latency=0.0, response_tokens=32):
+    advisor = FinancialAdvisor(cache_size=0, prefix_cache=False, load_model=False, max_new_tokens=response_tokens)
+    load_stub_model(advisor, token_latency, response_tokens)
+    return advisor
+
+
+def consume(generator, timeout=10):
+    """Join the streamed chunks on another thread; returns (text, exception), failing if it hangs"""
+    result = {}
+
+    def run():
+        try:
+            result['text'] = ''.join(generator)
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise AssertionError(f"streamAdvice did not finish within {timeout}s")
+    return result.get('text'), result.get('error')
+
+
+class StreamAdviceTest(unittest.TestCase):
+    def test_streams_the_batched_answer(self):
+        advisor = make_advisor()
+        text, error = consume(advisor.streamAdvice('How do I budget?'))
+        self.assertIsNone(error)
+        self.assertEqual(text, advisor.getAdvice('How do I budget?'))
+
+    def test_generation_error_reaches_the_consumer(self):
+        advisor = make_advisor()
+
+        def failing_generate(*args, **kwargs):
+            raise RuntimeError('CUDA out of memory')
+
+        advisor.conversation_model.model.generate = failing_generate
+        text, error = consume(advisor.streamAdvice('How do I budget?'))
+        self.assertIsInstance(error, RuntimeError)
+
+    def test_closing_the_stream_stops_generation(self):
+        advisor = make_advisor(token_latency=0.01, response_tokens=200)
+        model = advisor.conversation_model.model
+        generate = model.generate
+        done = threading.Event()
+        lengths = []
+
+        def recording_generate(input_ids, **kwargs):
+            outputs = generate(input_ids, **kwargs)
+            lengths.append(outputs.shape[1] - input_ids.shape[1])
+            done.set()
+            return outputs
+
+        model.generate = recording_generate
+        stream = advisor.streamAdvice('How do I budget?')
+        next(stream)
+        stream.close()
+
+        self.assertTrue(done.wait(5))
+        self.assertLess(lengths[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()